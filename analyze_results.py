@@ -4,13 +4,25 @@
 """
 
 from phone_numerology import PhoneNumerology
+from phone_normalizer import iter_normalized_file, format_phone_number
+from number_index import NumberIndex
+from report_writer import FORMATS, DirectorySink, ReportWriter, open_sink
 import os
 import sys
 import argparse
+import heapq
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 import re
 
 
+# 各行程依出生日期保留的分析器
+_analyzers = {}
+
+
 def get_desktop_path():
     """獲取桌面路徑"""
     return str(Path.home() / "Desktop")
@@ -23,13 +35,162 @@ def sanitize_filename(phone_number: str) -> str:
     return sanitized
 
 
-def analyze_found_numbers(birthdate: str = "1985/11/11", phone_number: str = None):
+def print_ranking(results: list):
+    """顯示依綜合評分排序的號碼排名"""
+    # 生成排名報告
+    print("="*70)
+    print("電話號碼排名(依綜合評分)")
+    print("="*70)
+    print(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}")
+    print("-"*70)
+    
+    for i, result in enumerate(results, 1):
+        print(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}")
+    
+    print("="*70)
+    print()
+
+
+def save_reports(analyzer: PhoneNumerology, birthdate: str, results: list, executor=None, max_pending: int = 2,
+                 output_dir: str = None, output_format: str = 'files', shard_size: int = 1000, analyses: list = None):
+    """
+    顯示前 3 名的詳細分析,並將個別報告與總覽報告儲存到桌面
+    
+    Args:
+        analyzer: 分析器
+        birthdate: 出生日期
+        results: 依排名排序的 {'phone_number', 'final_score', 'recommendation'} 列表
+        executor: 行程池 (可選),提供時由各行程分析號碼並產生報告
+        max_pending: 同時提交給行程池的工作數量上限
+        output_dir: 輸出目錄 (可選,預設為桌面)
+        output_format: 個別報告的格式,files (分片目錄)、zip 或 jsonl,僅在指定 output_dir 時使用
+        shard_size: files 格式每個子目錄的檔案數量
+        analyses: 與 results 對應的 comprehensive_analysis 結果 (可選),提供時直接產生報告,不重新分析
+    """
+    # 顯示前3名的詳細分析
+    top_n = min(3, len(results))
+    print(f"\n{'='*70}")
+    print(f"前 {top_n} 名詳細分析")
+    print(f"{'='*70}\n")
+    
+    # 儲存完整報告: 預設每個號碼一個檔案存到桌面,指定輸出目錄時可改為分片目錄、zip 或 JSONL
+    if output_dir is None:
+        output_path = get_desktop_path()
+        sink = DirectorySink(output_path)
+    else:
+        output_path = output_dir
+        os.makedirs(output_path, exist_ok=True)
+        extension = {'files': '', 'zip': '.zip', 'jsonl': '.jsonl'}.get(output_format, '')
+        reports_path = os.path.join(output_path, f"分析報告{extension}")
+        sink = open_sink(output_format, reports_path, shard_size)
+    
+    # 同時生成一個總覽報告
+    summary_filename = f"電話號碼分析總覽_{len(results)}個號碼.txt"
+    summary_file = os.path.join(output_path, summary_filename)
+    
+    # 個別報告由背景執行緒寫入,與報告產生同時進行
+    saved_files = []
+    with open(summary_file, 'w', encoding='utf-8', buffering=1 << 20) as summary, ReportWriter(sink) as writer:
+        summary.write("="*70 + "\n")
+        summary.write("電話號碼命理分析完整報告\n")
+        summary.write(f"出生日期: {birthdate}\n")
+        summary.write(f"分析數量: {len(results)} 個號碼\n")
+        summary.write("="*70 + "\n\n")
+        
+        summary.write("排名總覽\n")
+        summary.write("-"*70 + "\n")
+        summary.write(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}\n")
+        summary.write("-"*70 + "\n")
+        
+        for i, result in enumerate(results, 1):
+            summary.write(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}\n")
+        
+        summary.write("\n\n")
+        summary.write("="*70 + "\n")
+        summary.write("詳細分析\n")
+        summary.write("="*70 + "\n\n")
+        
+        # 每個號碼只分析與產生報告一次,同時用於螢幕顯示、個別報告與總覽報告
+        # (排名階段只有批次評分,完整分析在此進行;已有分析結果時直接產生報告)
+        if analyses is not None:
+            reports = (analyzer.render_report(analysis) for analysis in analyses)
+        else:
+            tasks = ((birthdate, [result['phone_number'] for result in chunk]) for chunk in _chunks(results, 500))
+            reports = itertools.chain.from_iterable(_ordered_map(executor, _render_reports, tasks, max_pending))
+        
+        for i, (result, report_content) in enumerate(zip(results, reports), 1):
+            phone_num = result['phone_number']
+            
+            if i <= top_n:
+                print(f"\n{'#'*70}")
+                print(f"第 {i} 名")
+                print(f"{'#'*70}")
+                print(report_content)
+            
+            # 為每個號碼生成獨立的報告
+            filename = f"{sanitize_filename(phone_num)}_分析報告.txt"
+            writer.write(
+                filename,
+                "="*70 + "\n" +
+                f"電話號碼命理分析報告 - 排名第 {i} 名\n" +
+                f"出生日期: {birthdate}\n" +
+                "="*70 + "\n\n" +
+                report_content +
+                "\n\n" +
+                "="*70 + "\n" +
+                f"綜合評分: {result['final_score']}/100\n" +
+                f"推薦度: {result['recommendation']}\n" +
+                f"排名: 第 {i} 名 (共 {len(results)} 個號碼)\n" +
+                "="*70 + "\n",
+                rank=i,
+                phone_number=phone_num,
+                final_score=result['final_score'],
+                recommendation=result['recommendation']
+            )
+            
+            saved_files.append(filename)
+            
+            summary.write(f"\n{'#'*70}\n")
+            summary.write(f"第 {i} 名\n")
+            summary.write(f"{'#'*70}\n")
+            summary.write(report_content)
+            summary.write("\n\n")
+    
+    # 重複的號碼只寫入排名最前的一份報告
+    duplicates = len(saved_files) - writer.written
+    duplicates_text = f" (略過 {duplicates} 份重複號碼)" if duplicates else ""
+    
+    if output_dir is not None:
+        print(f"\n✅ 分析報告已儲存至: {output_path}")
+        print(f"   📄 總覽報告: {summary_filename}")
+        print(f"   📱 個別報告: {writer.written} 份 ({os.path.basename(reports_path)}){duplicates_text}")
+        return
+    
+    print(f"\n✅ 分析報告已儲存至桌面:")
+    print(f"   📄 總覽報告: {summary_filename}")
+    print(f"   📱 個別報告: {writer.written} 個檔案{duplicates_text}")
+    for filename in dict.fromkeys(saved_files):
+        print(f"      - {filename}")
+    print(f"\n   完整路徑: {output_path}")
+
+
+def analyze_found_numbers(birthdate: str = "1985/11/11", phone_number: str = None, filters: dict = None,
+                          numbers_file: str = "found_numbers.txt", workers: int = 1,
+                          output_dir: str = None, output_format: str = 'files'):
     """
     分析已找到的電話號碼
     
     Args:
         birthdate: 出生日期 (格式: YYYY/MM/DD)
         phone_number: 指定的電話號碼 (可選,如果提供則只分析此號碼)
+        filters: 篩選條件 (可選,參數同 NumberIndex.query,例如 {'fields': {'天醫': 2}, 'min_score': 80})
+        numbers_file: 號碼檔案 (每行一個號碼)
+        workers: 行程數量,大於 1 時號碼分析與報告產生分散到行程池
+        output_dir: 輸出目錄 (可選,預設為桌面)
+        output_format: 個別報告的格式,files、zip 或 jsonl (參見 save_reports)
+    
+    Returns:
+        依排名排序的 phone_number、final_score、recommendation 列表 (只分析指定號碼或沒有號碼時為 None)
     """
     # 創建分析器
     analyzer = PhoneNumerology(birthdate)
@@ -40,28 +201,26 @@ def analyze_found_numbers(birthdate: str = "1985/11/11", phone_number: str = Non
         report_content = analyzer.generate_report(phone_number)
         print(report_content)
         
-        # 儲存報告到桌面,以電話號碼命名
-        desktop_path = get_desktop_path()
+        # 儲存報告到桌面 (或輸出目錄),以電話號碼命名
+        desktop_path = output_dir or get_desktop_path()
+        os.makedirs(desktop_path, exist_ok=True)
         filename = f"{sanitize_filename(phone_number)}.txt"
         report_file = os.path.join(desktop_path, filename)
         
         with open(report_file, 'w', encoding='utf-8') as f:
             f.write(report_content)
         
-        print(f"\n✅ 報告已儲存至桌面: {filename}")
+        print(f"\n✅ 報告已儲存至{'輸出目錄' if output_dir else '桌面'}: {filename}")
         print(f"   完整路徑: {report_file}")
         return
     
     # 讀取找到的號碼
-    numbers_file = "found_numbers.txt"
-    
     if not os.path.exists(numbers_file):
         print(f"❌ 找不到檔案: {numbers_file}")
         print("請先執行 cht_crawler.py 來搜尋電話號碼,或使用 --phone 參數指定號碼")
         return
     
-    with open(numbers_file, 'r', encoding='utf-8') as f:
-        numbers = [line.strip() for line in f if line.strip()]
+    numbers = list(iter_normalized_file(numbers_file))
     
     if not numbers:
         print("❌ 沒有找到任何電話號碼")
@@ -70,108 +229,257 @@ def analyze_found_numbers(birthdate: str = "1985/11/11", phone_number: str = Non
     print(f"📊 找到 {len(numbers)} 個符合條件的電話號碼\n")
     print("開始進行命理分析...\n")
     
-    # 分析所有號碼
-    results = []
-    for number in numbers:
-        # 格式化號碼(加上連字號)
-        if len(number) == 10:
-            formatted = f"{number[:4]}-{number[4:7]}-{number[7:]}"
-        else:
-            formatted = number
+    with _process_pool(workers) as executor:
+        # 建立索引 (格式化號碼,加上連字號): 以 score_batch 批次評分,完整分析只在產生報告時進行
+        index = NumberIndex.build(birthdate, (format_phone_number(number) for number in numbers),
+                                  executor=executor, max_pending=2 * workers)
+        
+        # 依綜合評分排序,有篩選條件時只取出符合的號碼
+        ranked_ids = index.query(**(filters or {}))
+        results = [
+            {
+                'phone_number': index.numbers[number_id],
+                'final_score': index.scores[number_id],
+                'recommendation': index.recommendations[number_id]
+            }
+            for number_id in ranked_ids
+        ]
+        
+        if not results:
+            print("❌ 沒有符合篩選條件的電話號碼")
+            return results
         
-        analysis = analyzer.comprehensive_analysis(formatted)
-        results.append(analysis)
+        if filters:
+            print(f"🔎 符合篩選條件: {len(results)} 個號碼\n")
+        
+        print_ranking(results)
+        save_reports(analyzer, birthdate, results, executor=executor, max_pending=2 * workers,
+                     output_dir=output_dir, output_format=output_format)
+    return results
+
+
+def _worker_analyzer(birthdate: str) -> PhoneNumerology:
+    """各行程依出生日期只建立一次分析器"""
+    analyzer = _analyzers.get(birthdate)
+    if analyzer is None:
+        analyzer = _analyzers[birthdate] = PhoneNumerology(birthdate)
+    return analyzer
+
+
+@contextmanager
+def _process_pool(workers: int):
+    """workers 大於 1 時建立行程池,否則不使用行程池 (None)"""
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield executor
+    else:
+        yield None
+
+
+def _ordered_map(executor, fn, tasks, max_pending: int):
+    """
+    依序回傳 fn(*task) 的結果
     
-    # 按照綜合評分排序
-    results.sort(key=lambda x: x['final_score'], reverse=True)
+    有行程池時同時最多提交 max_pending 個工作,記憶體用量不隨工作總數增加
+    """
+    if executor is None:
+        for task in tasks:
+            yield fn(*task)
+        return
     
-    # 生成排名報告
-    print("="*70)
-    print("電話號碼排名(依綜合評分)")
-    print("="*70)
-    print(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}")
-    print("-"*70)
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, *task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(items, size: int):
+    """將可迭代物件切成每塊 size 個的列表"""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _render_reports(birthdate: str, phone_numbers: list) -> list:
+    """分析並產生一批號碼的報告"""
+    analyzer = _worker_analyzer(birthdate)
+    return [analyzer.render_report(analyzer.comprehensive_analysis(number)) for number in phone_numbers]
+
+
+def _scan_chunk(birthdate: str, chunk: list, start: int, filters: dict, top_n: int) -> tuple:
+    """
+    串流模式的單批評分
     
-    for i, result in enumerate(results, 1):
-        print(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}")
+    Args:
+        birthdate: 出生日期
+        chunk: 正規化後的號碼
+        start: 此批第一個號碼的讀取順序
+        filters: 篩選條件
+        top_n: 保留的名次數量
     
-    print("="*70)
-    print()
+    Returns:
+        (此批前 N 名的 (綜合評分, -讀取順序, 號碼) 列表, 號碼數量, 略過數量, 符合數量, 評分總和, 最高分, 最低分, 各評分區間數量)
+    """
+    import numpy as np
     
-    # 顯示前3名的詳細分析
-    top_n = min(3, len(results))
-    print(f"\n{'='*70}")
-    print(f"前 {top_n} 名詳細分析")
-    print(f"{'='*70}\n")
+    analyzer = _worker_analyzer(birthdate)
     
-    for i in range(top_n):
-        print(f"\n{'#'*70}")
-        print(f"第 {i+1} 名")
-        print(f"{'#'*70}")
-        print(analyzer.generate_report(results[i]['phone_number']))
+    # 篩選用的查表: 兩位數 -> 磁場編號、靈動數 -> 吉凶
+    field_names = list(PhoneNumerology.MAGNETIC_FIELDS)
+    pair_fields = np.array([field_names.index(entry[0]) if entry else -1 for entry in PhoneNumerology._PAIR_TABLE])
     
-    # 儲存完整報告到桌面
-    desktop_path = get_desktop_path()
+    valid = [i for i, number in enumerate(chunk) if len(number) == 10]
+    skipped = len(chunk) - len(valid)
+    if not valid:
+        return [], len(chunk), skipped, 0, 0.0, None, None, [0] * 10
     
-    # 為每個號碼生成獨立的報告檔案
-    saved_files = []
-    for i, result in enumerate(results, 1):
-        phone_num = result['phone_number']
-        filename = f"{sanitize_filename(phone_num)}_分析報告.txt"
-        report_file = os.path.join(desktop_path, filename)
-        
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write("="*70 + "\n")
-            f.write(f"電話號碼命理分析報告 - 排名第 {i} 名\n")
-            f.write(f"出生日期: {birthdate}\n")
-            f.write("="*70 + "\n\n")
-            f.write(analyzer.generate_report(phone_num))
-            f.write("\n\n")
-            f.write("="*70 + "\n")
-            f.write(f"綜合評分: {result['final_score']}/100\n")
-            f.write(f"推薦度: {result['recommendation']}\n")
-            f.write(f"排名: 第 {i} 名 (共 {len(results)} 個號碼)\n")
-            f.write("="*70 + "\n")
-        
-        saved_files.append(filename)
+    digits = PhoneNumerology._digit_matrix([chunk[i] for i in valid])
+    batch = analyzer.score_batch(digits)
+    scores = batch['final_score']
     
-    # 同時生成一個總覽報告
-    summary_filename = f"電話號碼分析總覽_{len(results)}個號碼.txt"
-    summary_file = os.path.join(desktop_path, summary_filename)
-    
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        f.write("="*70 + "\n")
-        f.write("電話號碼命理分析完整報告\n")
-        f.write(f"出生日期: {birthdate}\n")
-        f.write(f"分析數量: {len(results)} 個號碼\n")
-        f.write("="*70 + "\n\n")
-        
-        f.write("排名總覽\n")
-        f.write("-"*70 + "\n")
-        f.write(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}\n")
-        f.write("-"*70 + "\n")
-        
-        for i, result in enumerate(results, 1):
-            f.write(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}\n")
-        
-        f.write("\n\n")
-        f.write("="*70 + "\n")
-        f.write("詳細分析\n")
-        f.write("="*70 + "\n\n")
+    mask = np.ones(len(valid), dtype=bool)
+    if filters.get('fields'):
+        pair_ids = pair_fields[digits[:, :-1] * 10 + digits[:, 1:]]
+        for field_name, minimum in filters['fields'].items():
+            mask &= (pair_ids == field_names.index(field_name)).sum(axis=1) >= minimum
+    if filters.get('lingdong_type'):
+        wanted = [n for n in range(1, 81) if PhoneNumerology.LINGDONG_81[n]['type'] == filters['lingdong_type']]
+        mask &= np.isin(batch['lingdong_number'], wanted)
+    if filters.get('min_score') is not None:
+        mask &= scores >= filters['min_score']
+    if filters.get('max_score') is not None:
+        mask &= scores <= filters['max_score']
+    
+    selected = np.nonzero(mask)[0]
+    if not selected.size:
+        return [], len(chunk), skipped, 0, 0.0, None, None, [0] * 10
+    
+    chunk_scores = scores[selected]
+    bands = np.bincount(np.clip(chunk_scores // 10, 0, 9).astype(np.int64), minlength=10)
+    
+    # 此批前 N 名 (同分時先讀到的號碼優先)
+    items = [(float(scores[i]), -(start + valid[i]), chunk[valid[i]]) for i in selected.tolist()]
+    top = heapq.nlargest(top_n, items)
+    
+    return (top, len(chunk), skipped, int(selected.size), float(chunk_scores.sum()),
+            float(chunk_scores.max()), float(chunk_scores.min()), bands.tolist())
+
+
+def stream_found_numbers(birthdate: str, numbers_file: str = "found_numbers.txt", filters: dict = None,
+                         top_n: int = 100, chunk_size: int = 100000, workers: int = 1,
+                         output_dir: str = None, output_format: str = 'files'):
+    """
+    串流分析大型號碼檔案,記憶體用量與檔案大小無關
+    
+    逐塊讀取號碼並以 score_batch 批次評分,只保留前 N 名與統計數據,
+    最後才為前 N 名產生完整分析報告
+    
+    前 N 名與預設模式排名的前 N 名相同;統計數據逐行計算,重複的號碼每次出現都計入
+    
+    Args:
+        birthdate: 出生日期 (格式: YYYY/MM/DD)
+        numbers_file: 號碼檔案 (每行一個號碼,非 10 碼的號碼略過)
+        filters: 篩選條件 (可選,支援 fields、lingdong_type、min_score、max_score)
+        top_n: 保留的名次數量
+        chunk_size: 每批評分的號碼數量
+        workers: 行程數量,大於 1 時各批分散到行程池評分
+        output_dir: 輸出目錄 (可選,預設為桌面)
+        output_format: 個別報告的格式,files、zip 或 jsonl (參見 save_reports)
+    
+    Returns:
+        (前 N 名的 phone_number、final_score、recommendation 列表, 統計數據),找不到檔案時為 None;
+        統計數據包含 processed、skipped、matched、mean、max、min 與 bands (各 10 分區間的數量)
+    """
+    if not os.path.exists(numbers_file):
+        print(f"❌ 找不到檔案: {numbers_file}")
+        return None
+    
+    analyzer = PhoneNumerology(birthdate)
+    filters = filters or {}
+    unsupported = set(filters) - {'fields', 'lingdong_type', 'min_score', 'max_score'}
+    if unsupported:
+        raise ValueError(f"串流模式不支援的篩選條件: {', '.join(sorted(unsupported))}")
+    
+    print(f"📊 串流分析: {numbers_file} (保留前 {top_n} 名)\n")
+    
+    heap = []  # (綜合評分, -讀取順序, 號碼) 的最小堆積,同分時先讀到的號碼優先
+    processed = skipped = matched = 0
+    score_sum = 0.0
+    best = worst = None
+    bands = [0] * 10
+    
+    with _process_pool(workers) as executor:
+        chunks = _chunks(iter_normalized_file(numbers_file), chunk_size)
+        tasks = ((birthdate, chunk, i * chunk_size, filters, top_n) for i, chunk in enumerate(chunks))
         
-        for i, result in enumerate(results, 1):
-            f.write(f"\n{'#'*70}\n")
-            f.write(f"第 {i} 名\n")
-            f.write(f"{'#'*70}\n")
-            f.write(analyzer.generate_report(result['phone_number']))
-            f.write("\n\n")
+        for items, chunk_count, chunk_skipped, chunk_matched, chunk_sum, chunk_best, chunk_worst, chunk_bands in \
+                _ordered_map(executor, _scan_chunk, tasks, 2 * workers):
+            processed += chunk_count
+            skipped += chunk_skipped
+            if chunk_matched:
+                matched += chunk_matched
+                score_sum += chunk_sum
+                best = chunk_best if best is None else max(best, chunk_best)
+                worst = chunk_worst if worst is None else min(worst, chunk_worst)
+                bands = [a + b for a, b in zip(bands, chunk_bands)]
+            
+            for item in items:
+                if len(heap) < top_n:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            
+            best_text = f"{best:.2f}" if best is not None else "-"
+            print(f"\r   已處理 {processed:,} 個號碼,符合條件 {matched:,} 個,目前最高 {best_text} 分", end='', flush=True)
     
-    print(f"\n✅ 分析報告已儲存至桌面:")
-    print(f"   📄 總覽報告: {summary_filename}")
-    print(f"   📱 個別報告: {len(saved_files)} 個檔案")
-    for filename in saved_files:
-        print(f"      - {filename}")
-    print(f"\n   完整路徑: {desktop_path}")
+    print("\n")
+    stats = {
+        'processed': processed,
+        'skipped': skipped,
+        'matched': matched,
+        'mean': score_sum / matched if matched else None,
+        'max': best,
+        'min': worst,
+        'bands': bands
+    }
+    if skipped:
+        print(f"⚠️  略過 {skipped:,} 個非 10 碼的號碼\n")
+    if not heap:
+        print("❌ 沒有符合篩選條件的電話號碼")
+        return [], stats
+    
+    # 統計數據
+    print("="*70)
+    print(f"評分統計 (符合條件 {matched:,} 個號碼)")
+    print("="*70)
+    print(f"平均: {stats['mean']:.2f}   最高: {best:.2f}   最低: {worst:.2f}")
+    for band in range(9, -1, -1):
+        if bands[band]:
+            print(f"  {band * 10:>3}-{band * 10 + 10:<4} {bands[band]:>12,} ({bands[band] / matched * 100:.2f}%)")
+    print()
+    
+    # 只為前 N 名產生完整分析 (數量少,不使用行程池),分析結果直接用於產生報告
+    results = []
+    analyses = []
+    for _, _, number in sorted(heap, reverse=True):
+        analysis = analyzer.comprehensive_analysis(format_phone_number(number))
+        analyses.append(analysis)
+        results.append({
+            'phone_number': analysis['phone_number'],
+            'final_score': analysis['final_score'],
+            'recommendation': analysis['recommendation']
+        })
+    
+    print_ranking(results)
+    save_reports(analyzer, birthdate, results, output_dir=output_dir, output_format=output_format,
+                 analyses=analyses)
+    return results, stats
 
 
 if __name__ == "__main__":
@@ -191,6 +499,18 @@ if __name__ == "__main__":
   
   # 指定出生日期和電話號碼
   python analyze_results.py --birthdate 1990/09/25 --phone 0978-759-196
+  
+  # 篩選: 天醫至少出現 2 次、靈動數大吉、綜合評分 80 分以上
+  python analyze_results.py --field 天醫:2 --lingdong-type 大吉 --min-score 80
+  
+  # 串流分析大型號碼檔案,只保留前 100 名 (記憶體用量固定)
+  python analyze_results.py --input carrier_dump.txt --stream --top 100
+  
+  # 使用 8 個行程平行分析
+  python analyze_results.py --input carrier_dump.txt --stream --workers 8
+  
+  # 報告寫入指定目錄的單一 zip 壓縮檔 (或 --format jsonl / files)
+  python analyze_results.py --output reports --format zip
         '''
     )
     
@@ -208,8 +528,99 @@ if __name__ == "__main__":
         help='要分析的電話號碼 (可選,如果不提供則分析 found_numbers.txt 中的所有號碼)'
     )
     
+    parser.add_argument(
+        '--field',
+        action='append',
+        default=[],
+        metavar='磁場:次數',
+        help='只保留該磁場至少出現指定次數的號碼,可重複指定 (例: 天醫:2)'
+    )
+    
+    parser.add_argument(
+        '--lingdong-type',
+        type=str,
+        default=None,
+        help='只保留靈動數為指定吉凶的號碼 (例: 大吉)'
+    )
+    
+    parser.add_argument(
+        '--min-score',
+        type=float,
+        default=None,
+        help='只保留綜合評分不低於此值的號碼'
+    )
+    
+    parser.add_argument(
+        '--input', '-i',
+        type=str,
+        default='found_numbers.txt',
+        help='號碼檔案,每行一個號碼 (預設: found_numbers.txt)'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='串流模式: 逐塊評分並只保留前 N 名,適合數千萬行的大型檔案'
+    )
+    
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=100,
+        help='串流模式保留的名次數量 (預設: 100)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=100000,
+        help='串流模式每批評分的號碼數量 (預設: 100000)'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='平行分析的行程數量 (預設: 1)'
+    )
+    
+    parser.add_argument(
+        '--output', '-o',
+        type=str,
+        default=None,
+        help='報告輸出目錄 (預設: 桌面,每個號碼一個檔案)'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='files',
+        help='指定 --output 時個別報告的格式: files (每 1000 份一個子目錄)、zip 或 jsonl (預設: files)'
+    )
+    
     args = parser.parse_args()
     
+    # 整理篩選條件
+    filters = {}
+    try:
+        fields = {}
+        for spec in args.field:
+            field_name, _, count = spec.partition(':')
+            if field_name not in PhoneNumerology.MAGNETIC_FIELDS:
+                raise ValueError
+            fields[field_name] = int(count) if count else 1
+            if fields[field_name] < 1:
+                raise ValueError
+    except ValueError:
+        print(f"❌ 錯誤: --field 格式不正確,請使用 磁場:次數 (例如: 天醫:2)")
+        sys.exit(1)
+    if fields:
+        filters['fields'] = fields
+    if args.lingdong_type:
+        filters['lingdong_type'] = args.lingdong_type
+    if args.min_score is not None:
+        filters['min_score'] = args.min_score
+    
     # 驗證出生日期格式
     try:
         parts = args.birthdate.split('/')
@@ -223,5 +634,18 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # 執行分析
-    analyze_found_numbers(birthdate=args.birthdate, phone_number=args.phone)
+    if args.stream and not args.phone:
+        if args.top < 1 or args.chunk_size < 1 or args.workers < 1:
+            print(f"❌ 錯誤: --top、--chunk-size 與 --workers 必須大於 0")
+            sys.exit(1)
+        stream_found_numbers(args.birthdate, numbers_file=args.input, filters=filters,
+                             top_n=args.top, chunk_size=args.chunk_size, workers=args.workers,
+                             output_dir=args.output, output_format=args.format)
+    else:
+        if args.workers < 1:
+            print(f"❌ 錯誤: --workers 必須大於 0")
+            sys.exit(1)
+        analyze_found_numbers(birthdate=args.birthdate, phone_number=args.phone, filters=filters,
+                              numbers_file=args.input, workers=args.workers,
+                              output_dir=args.output, output_format=args.format)
 
@@ -0,0 +1,123 @@
+"""
+API 共用邏輯
+Flask (app.py) 與 ASGI (asgi_app.py) 兩種服務共用的輸入驗證、端點說明與回應內容
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import normalize_phone_number, format_phone_number
+from typing import Optional, Tuple
+import json
+import re
+
+
+API_INFO = {
+    'name': '電話號碼命理分析 API',
+    'version': '1.0.0',
+    'endpoints': {
+        'POST /analyze': '分析電話號碼',
+        'POST /analyze/batch': '批次分析電話號碼 (NDJSON 串流回應)',
+        'POST /score': '查詢綜合評分',
+        'POST /recommend': '推薦號碼組合',
+        'GET /health': '健康檢查',
+        'GET /metrics': '效能指標 (Prometheus 格式)'
+    }
+}
+
+# 只驗證出生日期時使用的號碼
+PLACEHOLDER_PHONE = '0900000000'
+
+
+def check_input(data) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    驗證請求數據
+
+    Returns:
+        (清理後的手機號碼, 出生日期, None) 或 (None, None, 錯誤訊息)
+    """
+    if not data or not isinstance(data, dict):
+        return None, None, '請提供 JSON 數據'
+
+    phone_number = data.get('phone_number', '')
+    birthdate = data.get('birthdate', '')
+
+    # 驗證輸入（JSON 中的數字等非字串值視為格式錯誤）
+    if not isinstance(phone_number, str) or not isinstance(birthdate, str):
+        return None, None, '手機號碼和出生日期必須為字串'
+    phone_number = phone_number.strip()
+    birthdate = birthdate.strip()
+    if not phone_number or not birthdate:
+        return None, None, '請提供手機號碼和出生日期'
+
+    # 驗證手機號碼格式（接受 +886 國際格式）
+    phone_clean = normalize_phone_number(phone_number)
+    if not re.match(r'^09\d{8}$', phone_clean):
+        return None, None, '手機號碼格式不正確，請輸入 09 開頭的 10 位數字'
+
+    # 驗證出生日期格式
+    if not re.match(r'^\d{4}/\d{2}/\d{2}$', birthdate):
+        return None, None, '出生日期格式不正確，請使用 YYYY/MM/DD 格式'
+
+    # 驗證日期數值
+    try:
+        year, month, day = map(int, birthdate.split('/'))
+        if not (1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31):
+            raise ValueError
+    except:
+        return None, None, '出生日期數值不正確'
+
+    return phone_clean, birthdate, None
+
+
+def check_count(count) -> Optional[str]:
+    """驗證推薦數量，正確時回傳 None"""
+    # JSON 的 true/false 在 Python 中是 int 的子類別，需另外排除
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= 50:
+        return '推薦數量必須為 1 到 50 的整數'
+    return None
+
+
+def analysis_payload(analyzer: PhoneNumerology, phone_clean: str) -> dict:
+    """
+    執行分析並產生 /analyze 的回應內容
+
+    Args:
+        analyzer: 已設定出生日期的分析器
+        phone_clean: check_input 驗證後的號碼
+    """
+    # 格式化手機號碼
+    formatted_phone = format_phone_number(phone_clean)
+
+    # 執行分析
+    analysis = analyzer.comprehensive_analysis(formatted_phone)
+    report = analyzer.render_report(analysis)
+
+    return {
+        'success': True,
+        'phone_number': formatted_phone,
+        'birthdate': analyzer.birthdate,
+        'report': report,
+        'score': analysis['final_score'],
+        'recommendation': analysis['recommendation'],
+        'details': {
+            'magnetic_fields': analysis['magnetic_fields']['field_counts'],
+            'lingdong_81': {
+                'number': analysis['lingdong_81']['lingdong_number'],
+                'type': analysis['lingdong_81']['type'],
+                'meaning': analysis['lingdong_81']['meaning']
+            },
+            'five_elements': {
+                'birth_element': analysis['five_elements']['birth_element'],
+                'compatibility_score': analysis['five_elements']['compatibility_score']
+            }
+        }
+    }
+
+
+def analysis_body(analyzer: PhoneNumerology, phone_clean: str) -> bytes:
+    """
+    /analyze 的回應內容 (UTF-8 JSON)
+
+    Flask 與 ASGI 服務都以此序列化，相同輸入的回應內容與 ETag 完全相同
+    """
+    payload = analysis_payload(analyzer, phone_clean)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -3,31 +3,109 @@ Flask 後端 API 服務
 提供電話號碼命理分析的 REST API
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from phone_numerology import PhoneNumerology
-import re
+from phone_numerology import PhoneNumerology, AnalysisCache
+from phone_normalizer import format_phone_number
+from score_table import ScoreTable
+from metrics import REGISTRY, CONTENT_TYPE, STAGE_BUCKETS, Counter, Histogram, CallbackMetric
+from batch_request import BatchParser, BatchParseError, MAX_BATCH_SIZE, analyze_items, to_ndjson
+from response_cache import ResponseCache
+from api_common import API_INFO, PLACEHOLDER_PHONE, check_input, check_count, analysis_body
+import os
+import time
 
 app = Flask(__name__)
 CORS(app)  # 允許跨域請求
 
+# 所有請求共用的號碼分析快取（與出生日期無關的部分只算一次）
+analysis_cache = AnalysisCache()
+
+# /analyze 的回應快取（容量與存活秒數可由環境變數 RESPONSE_CACHE_SIZE、RESPONSE_CACHE_TTL 設定）
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 3600))
+)
+
+# 預先計算的全空間評分表（以環境變數 SCORE_TABLE_PATH 指定，由 score_table.py build 產生）
+score_table = ScoreTable(os.environ['SCORE_TABLE_PATH']) if os.environ.get('SCORE_TABLE_PATH') else None
+
+# 效能指標（GET /metrics，Prometheus 文字格式；每個行程各自計數）
+request_seconds = Histogram('phone_api_request_seconds', 'HTTP 請求處理時間 (秒)', ['endpoint', 'method'])
+requests_total = Counter('phone_api_requests_total', 'HTTP 請求數量', ['endpoint', 'method', 'status'])
+errors_total = Counter('phone_api_errors_total', 'HTTP 錯誤回應數量 (client: 4xx, server: 5xx)', ['endpoint', 'kind'])
+analysis_stage_seconds = Histogram(
+    'phone_analysis_stage_seconds', '號碼分析各階段耗時 (秒)', ['stage'], buckets=STAGE_BUCKETS
+)
+batch_numbers_total = Counter('phone_api_batch_numbers_total', '批次分析處理的號碼數量')
+CallbackMetric('phone_analysis_cache_hits_total', '分析快取命中次數', lambda: analysis_cache.hits, 'counter')
+CallbackMetric('phone_analysis_cache_misses_total', '分析快取未命中次數', lambda: analysis_cache.misses, 'counter')
+CallbackMetric('phone_analysis_cache_entries', '分析快取中的號碼數量', lambda: len(analysis_cache))
+CallbackMetric('phone_response_cache_hits_total', '/analyze 回應快取命中次數', lambda: response_cache.hits, 'counter')
+CallbackMetric('phone_response_cache_misses_total', '/analyze 回應快取未命中次數', lambda: response_cache.misses, 'counter')
+CallbackMetric('phone_response_cache_evictions_total', '/analyze 回應快取因容量淘汰的次數',
+               lambda: response_cache.evictions, 'counter')
+CallbackMetric('phone_response_cache_expirations_total', '/analyze 回應快取過期移除的次數',
+               lambda: response_cache.expirations, 'counter')
+CallbackMetric('phone_response_cache_entries', '/analyze 回應快取中的回應數量', lambda: len(response_cache))
+
+_stage_timers = {stage: analysis_stage_seconds.labels(stage) for stage in PhoneNumerology.STAGES}
+
+
+def observe_stage(stage, seconds):
+    """PhoneNumerology 的 on_stage 回呼: 記錄分析階段耗時"""
+    _stage_timers[stage].observe(seconds)
+
+
+def _endpoint_label():
+    """以路由規則作為標籤，避免未知路徑造成大量標籤值"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = _endpoint_label()
+        request_seconds.labels(endpoint, request.method).observe(time.perf_counter() - start)
+        requests_total.labels(endpoint, request.method, response.status_code).inc()
+        if response.status_code >= 400:
+            errors_total.labels(endpoint, 'server' if response.status_code >= 500 else 'client').inc()
+    return response
+
+
+def validate_input(data):
+    """
+    驗證請求數據
+    
+    Returns:
+        (清理後的手機號碼, 出生日期, None) 或 (None, None, (錯誤回應, 狀態碼))
+    """
+    phone_clean, birthdate, message = check_input(data)
+    if message:
+        return None, None, (jsonify({'error': message}), 400)
+    return phone_clean, birthdate, None
+
 @app.route('/')
 def index():
     """首頁 - 返回 API 資訊"""
-    return jsonify({
-        'name': '電話號碼命理分析 API',
-        'version': '1.0.0',
-        'endpoints': {
-            'POST /analyze': '分析電話號碼',
-            'GET /health': '健康檢查'
-        }
-    })
+    return jsonify(API_INFO)
 
 @app.route('/health')
 def health():
     """健康檢查端點"""
     return jsonify({'status': 'healthy'})
 
+@app.route('/metrics')
+def metrics():
+    """效能指標 (Prometheus 文字格式)"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """
@@ -45,74 +123,183 @@ def analyze():
         "score": 85.5,
         "recommendation": "★★★★☆ 非常適合"
     }
+    
+    回應帶有 ETag，請求標頭 If-None-Match 相符時回傳 304（不重新分析）
     """
     try:
-        # 獲取請求數據
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': '請提供 JSON 數據'}), 400
+        # 獲取並驗證請求數據
+        phone_clean, birthdate, error = validate_input(request.get_json(silent=True))
+        if error:
+            return error
         
-        phone_number = data.get('phone_number', '').strip()
-        birthdate = data.get('birthdate', '').strip()
+        # 結果只取決於正規化後的號碼與出生日期，相同輸入直接使用快取的回應內容
+        key = (phone_clean, birthdate)
+        cached = response_cache.get(key)
+        if cached is None:
+            cached = response_cache.put(key, analysis_response(phone_clean, birthdate))
         
-        # 驗證輸入
-        if not phone_number or not birthdate:
-            return jsonify({'error': '請提供手機號碼和出生日期'}), 400
+        # 用戶端已有相同內容時回傳 304
+        if request.if_none_match.contains_weak(cached.etag):
+            response = Response(status=304)
+        else:
+            response = Response(cached.body, mimetype='application/json')
+        response.set_etag(cached.etag)
+        return response
+    
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return jsonify({'error': f'分析過程發生錯誤: {str(e)}'}), 500
+
+def analysis_response(phone_clean, birthdate):
+    """執行分析並產生 /analyze 的回應內容 (與 asgi_app.py 相同的位元組)"""
+    analyzer = PhoneNumerology(birthdate, cache=analysis_cache, on_stage=observe_stage)
+    return analysis_body(analyzer, phone_clean)
+
+# 批次分析每次讀取的請求內容大小與每次評分並送出的號碼數量
+BATCH_READ_SIZE = 64 * 1024
+BATCH_CHUNK_SIZE = 2000
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    批次分析電話號碼，逐塊評分並以 NDJSON 串流回傳（不產生報告）
+    
+    出生日期以查詢參數 ?birthdate=YYYY/MM/DD 指定，或放在 NDJSON 的第一行 {"birthdate": "..."}。
+    請求內容為號碼的 JSON 陣列或 NDJSON（每行一個號碼字串或 {"phone_number": ...}），
+    最多 100,000 個號碼。
+    
+    WSGI 伺服器 (gunicorn、mod_wsgi) 不保證回應開始傳送後仍能讀取請求內容，
+    因此先逐段讀取並解析完整個請求內容（任何格式錯誤都回傳 400），再逐塊評分並串流回傳；
+    邊讀取邊評分請使用 asgi_app.py 的相同端點。
+    
+    Request Body:
+    ["0978-759-196", "0912-345-678"]
+    
+    Response (application/x-ndjson):
+    {"index": 0, "phone_number": "0978-759-196", "score": 37.79, "recommendation": "...", ...}
+    {"index": 1, "phone_number": "12", "error": "手機號碼格式不正確..."}
+    {"done": true, "count": 2, "invalid": 1}
+    """
+    parser = BatchParser(MAX_BATCH_SIZE)
+    items = []
+    try:
+        while True:
+            chunk = request.stream.read(BATCH_READ_SIZE)
+            if not chunk:
+                items.extend(parser.close())
+                break
+            items.extend(parser.feed(chunk))
+    except BatchParseError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if parser.format is None:
+        return jsonify({'error': '請提供號碼清單 (JSON 陣列或 NDJSON)'}), 400
+    
+    birthdate = request.args.get('birthdate') or parser.birthdate
+    _, birthdate, error = validate_input({'phone_number': PLACEHOLDER_PHONE, 'birthdate': birthdate or ''})
+    if error:
+        return error
+    
+    analyzer = PhoneNumerology(birthdate)
+    
+    # 請求內容已讀取完畢，產生器不再存取 request
+    def generate():
+        invalid = 0
+        for start in range(0, len(items), BATCH_CHUNK_SIZE):
+            results = analyze_items(analyzer, items[start:start + BATCH_CHUNK_SIZE], start=start)
+            invalid += sum(1 for result in results if 'error' in result)
+            batch_numbers_total.inc(len(results))
+            yield to_ndjson(results)
+        yield to_ndjson([{'done': True, 'count': len(items), 'invalid': invalid}])
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/score', methods=['POST'])
+def score():
+    """
+    查詢綜合評分（不產生報告）
+    
+    設定評分表時以 mmap 查表（解析度 0.5 分），否則直接計算
+    
+    Request Body:
+    {
+        "phone_number": "0978-759-196",
+        "birthdate": "1990/09/25"
+    }
+    
+    Response:
+    {
+        "score": 85.5,
+        "quantized": true
+    }
+    """
+    try:
+        phone_clean, birthdate, error = validate_input(request.get_json(silent=True))
+        if error:
+            return error
         
-        # 驗證手機號碼格式
-        phone_clean = re.sub(r'\D', '', phone_number)
-        if not re.match(r'^09\d{8}$', phone_clean):
-            return jsonify({'error': '手機號碼格式不正確，請輸入 09 開頭的 10 位數字'}), 400
+        formatted_phone = format_phone_number(phone_clean)
+        if score_table is not None:
+            final_score = score_table.score(phone_clean, birthdate)
+        else:
+            final_score = PhoneNumerology(birthdate).score(phone_clean)
         
-        # 驗證出生日期格式
-        if not re.match(r'^\d{4}/\d{2}/\d{2}$', birthdate):
-            return jsonify({'error': '出生日期格式不正確，請使用 YYYY/MM/DD 格式'}), 400
+        return jsonify({
+            'success': True,
+            'phone_number': formatted_phone,
+            'birthdate': birthdate,
+            'score': final_score,
+            'quantized': score_table is not None
+        })
+    
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return jsonify({'error': f'分析過程發生錯誤: {str(e)}'}), 500
+
+@app.route('/recommend', methods=['POST'])
+def recommend():
+    """
+    依出生日期推薦號碼組合
+    
+    Request Body:
+    {
+        "birthdate": "1990/09/25",
+        "count": 10
+    }
+    
+    Response:
+    {
+        "birth_element": "火",
+        "recommendations": [{"pattern": "13", "type": "...", "reason": "...", "score": 95}, ...]
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': '請提供 JSON 數據'}), 400
         
-        # 驗證日期數值
-        try:
-            year, month, day = map(int, birthdate.split('/'))
-            if not (1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31):
-                raise ValueError
-        except:
-            return jsonify({'error': '出生日期數值不正確'}), 400
+        # 以固定號碼沿用 /analyze 的出生日期驗證
+        _, birthdate, error = validate_input({'phone_number': PLACEHOLDER_PHONE, 'birthdate': data.get('birthdate', '')})
+        if error:
+            return error
         
-        # 格式化手機號碼
-        if len(phone_clean) == 10:
-            formatted_phone = f"{phone_clean[:4]}-{phone_clean[4:7]}-{phone_clean[7:]}"
-        else:
-            formatted_phone = phone_number
+        count = data.get('count', 10)
+        message = check_count(count)
+        if message:
+            return jsonify({'error': message}), 400
         
-        # 執行分析
-        analyzer = PhoneNumerology(birthdate)
-        report = analyzer.generate_report(formatted_phone)
-        analysis = analyzer.comprehensive_analysis(formatted_phone)
+        recommendations = PhoneNumerology(birthdate).recommend_numbers(count=count)
         
-        # 返回結果
         return jsonify({
             'success': True,
-            'phone_number': formatted_phone,
             'birthdate': birthdate,
-            'report': report,
-            'score': analysis['final_score'],
-            'recommendation': analysis['recommendation'],
-            'details': {
-                'magnetic_fields': analysis['magnetic_fields']['field_counts'],
-                'lingdong_81': {
-                    'number': analysis['lingdong_81']['lingdong_number'],
-                    'type': analysis['lingdong_81']['type'],
-                    'meaning': analysis['lingdong_81']['meaning']
-                },
-                'five_elements': {
-                    'birth_element': analysis['five_elements']['birth_element'],
-                    'compatibility_score': analysis['five_elements']['compatibility_score']
-                }
-            }
+            'birth_element': PhoneNumerology(birthdate).birth_element,
+            'recommendations': recommendations
         })
     
     except Exception as e:
         print(f"Error: {str(e)}")
-        return jsonify({'error': f'分析過程發生錯誤: {str(e)}'}), 500
+        return jsonify({'error': f'推薦過程發生錯誤: {str(e)}'}), 500
 
 if __name__ == '__main__':
     print("="*60)
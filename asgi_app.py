@@ -0,0 +1,408 @@
+"""
+ASGI 非同步 API 服務
+與 app.py 相同的路由與輸入驗證，以 Starlette 執行於 uvicorn 等 ASGI 伺服器；
+分析、報告產生與批次評分等 CPU 密集的工作交由預先啟動的行程池處理，
+慢速用戶端與大型批次請求不會阻塞事件迴圈
+"""
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from phone_numerology import PhoneNumerology, AnalysisCache
+from phone_normalizer import format_phone_number
+from score_table import ScoreTable
+from metrics import Registry, CONTENT_TYPE, Counter, Histogram, CallbackMetric
+from batch_request import BatchParser, BatchParseError, MAX_BATCH_SIZE, analyze_items, to_ndjson
+from response_cache import ResponseCache
+from api_common import API_INFO, PLACEHOLDER_PHONE, check_input, check_count, analysis_body
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+
+# 行程池的工作行程數量（可由環境變數 ANALYSIS_WORKERS 設定）
+POOL_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+
+# 批次分析: 每個工作至少包含的號碼數量，以及同時處理中的工作數量上限（超過時暫停讀取請求內容）
+BATCH_TASK_SIZE = 2000
+BATCH_MAX_PENDING = 4
+
+# 與 app.py 相同的回應快取、評分表與推薦號碼表
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 3600))
+)
+score_table = ScoreTable(os.environ['SCORE_TABLE_PATH']) if os.environ.get('SCORE_TABLE_PATH') else None
+
+# 效能指標（分析在工作行程中執行，此處記錄請求與行程池工作的耗時）
+registry = Registry()
+request_seconds = Histogram('phone_api_request_seconds', 'HTTP 請求處理時間 (秒)', ['endpoint', 'method'],
+                            registry=registry)
+requests_total = Counter('phone_api_requests_total', 'HTTP 請求數量', ['endpoint', 'method', 'status'],
+                         registry=registry)
+errors_total = Counter('phone_api_errors_total', 'HTTP 錯誤回應數量 (client: 4xx, server: 5xx)', ['endpoint', 'kind'],
+                       registry=registry)
+task_seconds = Histogram('phone_worker_task_seconds', '行程池工作耗時，含排隊時間 (秒)', ['task'], registry=registry)
+batch_numbers_total = Counter('phone_api_batch_numbers_total', '批次分析處理的號碼數量', registry=registry)
+CallbackMetric('phone_worker_pool_size', '行程池的工作行程數量', lambda: POOL_WORKERS, registry=registry)
+CallbackMetric('phone_response_cache_hits_total', '/analyze 回應快取命中次數', lambda: response_cache.hits, 'counter',
+               registry=registry)
+CallbackMetric('phone_response_cache_misses_total', '/analyze 回應快取未命中次數', lambda: response_cache.misses, 'counter',
+               registry=registry)
+CallbackMetric('phone_response_cache_evictions_total', '/analyze 回應快取因容量淘汰的次數',
+               lambda: response_cache.evictions, 'counter', registry=registry)
+CallbackMetric('phone_response_cache_expirations_total', '/analyze 回應快取過期移除的次數',
+               lambda: response_cache.expirations, 'counter', registry=registry)
+CallbackMetric('phone_response_cache_entries', '/analyze 回應快取中的回應數量', lambda: len(response_cache),
+               registry=registry)
+
+
+# ---- 工作行程 ----
+
+_worker_cache = None
+
+
+def _worker_init():
+    """工作行程初始化: 建立分析快取並先執行一次分析與批次評分，載入所有模組與對照表"""
+    global _worker_cache
+    _worker_cache = AnalysisCache()
+    analyzer = PhoneNumerology('1990/09/25')
+    analyzer.generate_report('0978-759-196')
+    analyzer.score_batch(['0978759196'])
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _analyze_body(phone_clean: str, birthdate: str) -> bytes:
+    """/analyze 的回應內容 (與 app.py 相同的位元組與 ETag)"""
+    return analysis_body(PhoneNumerology(birthdate, cache=_worker_cache), phone_clean)
+
+
+def _score(phone_clean: str, birthdate: str) -> float:
+    return PhoneNumerology(birthdate).score(phone_clean)
+
+
+def _score_chunk(birthdate: str, items: list, start: int):
+    """批次評分一塊號碼，回傳 (NDJSON 文字, 數量, 格式錯誤數量)"""
+    results = analyze_items(PhoneNumerology(birthdate), items, start=start)
+    invalid = sum(1 for result in results if 'error' in result)
+    return to_ndjson(results), len(results), invalid
+
+
+# ---- 事件迴圈 ----
+
+def _submit(request: Request, task: str, function, *args) -> asyncio.Future:
+    """將工作交給行程池，回傳可 await 的結果"""
+    start = time.perf_counter()
+    future = asyncio.wrap_future(request.app.state.executor.submit(function, *args))
+    future.add_done_callback(lambda _: task_seconds.labels(task).observe(time.perf_counter() - start))
+    return future
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """
+    邊讀取請求內容邊輸出的串流回應
+    
+    StreamingResponse 在 ASGI 2.4 以前會另外讀取 receive 偵測斷線，會搶走尚未讀取的請求內容；
+    此處由產生器自行讀取請求內容，斷線時讀取會拋出 ClientDisconnect
+    """
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+def _error(message: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 是否包含指定的 ETag (弱比較)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+
+def instrumented(path: str, handler):
+    """記錄請求耗時、數量與錯誤的路由處理函式"""
+    async def endpoint(request: Request):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status_code
+            return response
+        finally:
+            request_seconds.labels(path, request.method).observe(time.perf_counter() - start)
+            requests_total.labels(path, request.method, status).inc()
+            if status >= 400:
+                errors_total.labels(path, 'server' if status >= 500 else 'client').inc()
+    return endpoint
+
+
+async def index(request: Request):
+    """首頁 - 返回 API 資訊"""
+    return JSONResponse(API_INFO)
+
+
+async def health(request: Request):
+    """健康檢查端點"""
+    return JSONResponse({'status': 'healthy'})
+
+
+async def metrics(request: Request):
+    """效能指標 (Prometheus 文字格式)"""
+    return Response(registry.render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def analyze(request: Request):
+    """分析電話號碼（與 app.py 相同，回應帶有 ETag，If-None-Match 相符時回傳 304）"""
+    try:
+        phone_clean, birthdate, message = check_input(await _json_body(request))
+        if message:
+            return _error(message)
+
+        key = (phone_clean, birthdate)
+        cached = response_cache.get(key)
+        if cached is None:
+            body = await _submit(request, 'analyze', _analyze_body, phone_clean, birthdate)
+            cached = response_cache.put(key, body)
+
+        headers = {'ETag': f'"{cached.etag}"'}
+        if _etag_matches(request.headers.get('if-none-match'), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(cached.body, media_type='application/json', headers=headers)
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return _error(f'分析過程發生錯誤: {str(e)}', 500)
+
+
+async def analyze_batch(request: Request):
+    """
+    批次分析電話號碼並以 NDJSON 串流回傳（與 app.py 相同的請求與回應格式）
+
+    請求內容邊讀取邊解析，累積到 BATCH_TASK_SIZE 個號碼後交給行程池評分；
+    處理中的工作達到 BATCH_MAX_PENDING 時暫停讀取，記憶體用量與請求大小無關
+    """
+    parser = BatchParser(MAX_BATCH_SIZE)
+    chunks = request.stream()
+
+    async def read():
+        """讀取下一段內容並解析，回傳 (元素, 是否結束)"""
+        async for chunk in chunks:
+            if chunk:
+                return parser.feed(chunk), False
+        return parser.close(), True
+
+    # 先讀到第一個元素（或 NDJSON 標頭）以取得出生日期，格式錯誤時仍可回傳 400
+    pending = []
+    finished = False
+    try:
+        while not pending and parser.birthdate is None and not finished:
+            pending, finished = await read()
+    except BatchParseError as e:
+        return _error(str(e))
+    except ClientDisconnect:
+        return _error('請求內容未完整傳送')
+
+    if parser.format is None:
+        return _error('請提供號碼清單 (JSON 陣列或 NDJSON)')
+
+    birthdate = request.query_params.get('birthdate') or parser.birthdate
+    _, birthdate, message = check_input({'phone_number': PLACEHOLDER_PHONE, 'birthdate': birthdate or ''})
+    if message:
+        return _error(message)
+
+    async def generate():
+        buffered = pending
+        done = finished
+        submitted = 0
+        count = 0
+        invalid = 0
+        error = None
+        tasks = deque()
+        while True:
+            if buffered and (len(buffered) >= BATCH_TASK_SIZE or done):
+                tasks.append(_submit(request, 'batch', _score_chunk, birthdate, buffered, submitted))
+                submitted += len(buffered)
+                buffered = []
+
+            # 依序輸出已完成的工作；處理中的工作過多時等待最早的一個
+            while tasks and (done or len(tasks) >= BATCH_MAX_PENDING or tasks[0].done()):
+                lines, chunk_count, chunk_invalid = await tasks.popleft()
+                count += chunk_count
+                invalid += chunk_invalid
+                batch_numbers_total.inc(chunk_count)
+                yield lines
+
+            if done:
+                break
+            try:
+                items, done = await read()
+                buffered += items
+            except BatchParseError as e:
+                # 回應已開始串流，先輸出已解析的號碼，再以最後一行回報錯誤
+                error = str(e)
+                done = True
+            except ClientDisconnect:
+                # 用戶端已斷線，不再處理（已送出的工作由行程池完成後捨棄）
+                return
+
+        if error is not None:
+            yield to_ndjson([{'done': False, 'count': count, 'invalid': invalid, 'error': error}])
+        else:
+            yield to_ndjson([{'done': True, 'count': count, 'invalid': invalid}])
+
+    return _BodyStreamingResponse(generate(), media_type='application/x-ndjson')
+
+
+async def score(request: Request):
+    """查詢綜合評分（設定評分表時以 mmap 查表，否則交由行程池計算）"""
+    try:
+        phone_clean, birthdate, message = check_input(await _json_body(request))
+        if message:
+            return _error(message)
+
+        if score_table is not None:
+            final_score = score_table.score(phone_clean, birthdate)
+        else:
+            final_score = await _submit(request, 'score', _score, phone_clean, birthdate)
+
+        return JSONResponse({
+            'success': True,
+            'phone_number': format_phone_number(phone_clean),
+            'birthdate': birthdate,
+            'score': final_score,
+            'quantized': score_table is not None
+        })
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return _error(f'分析過程發生錯誤: {str(e)}', 500)
+
+
+async def recommend(request: Request):
+    """依出生日期推薦號碼組合（推薦列表依推薦條件快取，計算量小，直接在事件迴圈中執行）"""
+    try:
+        data = await _json_body(request)
+        if not data or not isinstance(data, dict):
+            return _error('請提供 JSON 數據')
+
+        _, birthdate, message = check_input({'phone_number': PLACEHOLDER_PHONE, 'birthdate': data.get('birthdate', '')})
+        if message:
+            return _error(message)
+
+        count = data.get('count', 10)
+        message = check_count(count)
+        if message:
+            return _error(message)
+
+        recommendations = PhoneNumerology(birthdate).recommend_numbers(count=count)
+
+        return JSONResponse({
+            'success': True,
+            'birthdate': birthdate,
+            'birth_element': PhoneNumerology(birthdate).birth_element,
+            'recommendations': recommendations
+        })
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return _error(f'推薦過程發生錯誤: {str(e)}', 500)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """啟動時建立行程池並等待所有工作行程完成初始化，關閉時結束行程池"""
+    # spawn 在各平台行為一致，也避免在已有執行緒的行程中 fork
+    executor = ProcessPoolExecutor(
+        max_workers=POOL_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_worker_init
+    )
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(executor, _worker_ready) for _ in range(POOL_WORKERS)))
+    app.state.executor = executor
+    try:
+        yield
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+routes = [
+    Route('/', instrumented('/', index)),
+    Route('/health', instrumented('/health', health)),
+    Route('/metrics', instrumented('/metrics', metrics)),
+    Route('/analyze', instrumented('/analyze', analyze), methods=['POST']),
+    Route('/analyze/batch', instrumented('/analyze/batch', analyze_batch), methods=['POST']),
+    Route('/score', instrumented('/score', score), methods=['POST']),
+    Route('/recommend', instrumented('/recommend', recommend), methods=['POST']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],  # 允許跨域請求
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='電話號碼命理分析 API 服務 (ASGI)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 以 4 個分析行程啟動
+  python asgi_app.py --workers 4
+
+  # 或直接使用 uvicorn (行程數由環境變數 ANALYSIS_WORKERS 設定)
+  ANALYSIS_WORKERS=4 uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+        '''
+    )
+    parser.add_argument('--host', default='0.0.0.0', help='監聽位址 (預設: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=5000, help='監聽埠號 (預設: 5000)')
+    parser.add_argument('--workers', '-w', type=int, default=POOL_WORKERS,
+                        help=f'分析行程數量 (預設: CPU 核心數 {POOL_WORKERS})')
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("分析行程數量必須大於 0")
+    POOL_WORKERS = args.workers
+
+    import uvicorn
+
+    print("="*60)
+    print("電話號碼命理分析 API 服務 (ASGI)")
+    print("="*60)
+    print(f"伺服器啟動於: http://localhost:{args.port}")
+    print(f"分析行程數量: {POOL_WORKERS}")
+    print("="*60)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,234 @@
+"""
+批次分析請求
+增量解析 JSON 陣列或 NDJSON 格式的號碼清單（不需將整個請求內容讀入記憶體），
+並以 score_batch 逐塊評分，供 API 以 NDJSON 串流回傳
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import normalize_phone_number, format_phone_number
+from typing import Any, List
+import codecs
+import json
+import re
+
+
+# 單一請求最多的號碼數量
+MAX_BATCH_SIZE = 100000
+
+# 單一元素 (一行或一個陣列元素) 的字元數上限，避免不完整的資料無限累積
+MAX_ITEM_CHARS = 4096
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DELIMITERS = frozenset(' \t\n\r,]')
+_MOBILE = re.compile(r'^09\d{8}$')
+
+
+class BatchParseError(ValueError):
+    """請求內容格式錯誤或超過上限"""
+
+
+class BatchParser:
+    """
+    JSON 陣列或 NDJSON 的增量解析器
+
+    依第一個非空白字元判斷格式: '[' 為 JSON 陣列，其他為 NDJSON (每行一個 JSON 值)。
+    元素可為號碼字串或 {"phone_number": ...} 物件；NDJSON 的第一行可為 {"birthdate": ...} 標頭。
+    """
+
+    def __init__(self, max_items: int = MAX_BATCH_SIZE):
+        self.max_items = max_items
+        self.format = None
+        self.birthdate = None
+        self.count = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._line = 0
+        # JSON 陣列: value (等待元素)、separator (等待 , 或 ])、end (陣列已結束)
+        self._state = 'value'
+        self._closed = False
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        加入一段請求內容
+
+        Returns:
+            這段內容中解析完成的元素
+        """
+        return self._parse(data, final=False)
+
+    def close(self) -> List[Any]:
+        """
+        請求內容結束，回傳剩餘的元素並確認格式完整
+
+        Raises:
+            BatchParseError: JSON 陣列不完整或最後一行格式錯誤
+        """
+        items = self._parse(b'', final=True)
+        if self.format == 'json' and self._state != 'end':
+            raise BatchParseError("JSON 陣列不完整")
+        self._closed = True
+        return items
+
+    def _parse(self, data: bytes, final: bool) -> List[Any]:
+        if self._closed:
+            raise BatchParseError("解析器已關閉")
+        try:
+            text = self._decoder.decode(data, final)
+        except UnicodeDecodeError:
+            raise BatchParseError("請求內容不是 UTF-8 編碼")
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+
+        if self.format is None:
+            start = _WHITESPACE.match(self._buffer).end()
+            if start == len(self._buffer):
+                return []
+            if self._buffer[start] == '[':
+                self.format = 'json'
+                self._pos = start + 1
+            else:
+                self.format = 'ndjson'
+
+        items = self._parse_json(final) if self.format == 'json' else self._parse_ndjson(final)
+        if len(self._buffer) - self._pos > MAX_ITEM_CHARS:
+            raise BatchParseError(f"單一元素超過 {MAX_ITEM_CHARS} 個字元")
+        return items
+
+    def _append(self, items: List[Any], item: Any):
+        self.count += 1
+        if self.count > self.max_items:
+            raise BatchParseError(f"號碼數量超過上限 {self.max_items:,} 個")
+        items.append(item)
+
+    def _parse_json(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        pos = self._pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if self._state == 'end':
+                raise BatchParseError("JSON 陣列結束後有多餘的資料")
+            if self._state == 'separator':
+                if buffer[pos] == ',':
+                    self._state = 'value'
+                elif buffer[pos] == ']':
+                    self._state = 'end'
+                else:
+                    raise BatchParseError(f"JSON 陣列第 {self.count} 個元素之後應為 ',' 或 ']'")
+                pos += 1
+                continue
+            if buffer[pos] == ']' and self.count == 0:
+                self._state = 'end'
+                pos += 1
+                continue
+            try:
+                value, end = self._json.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise BatchParseError(f"JSON 陣列第 {self.count + 1} 個元素格式錯誤")
+                break
+            # 數字可能被切在兩段內容之間 (例: "1." 會先解析為 1)，須確認其後為分隔字元
+            if not final and (end == len(buffer) or (
+                    isinstance(value, (int, float)) and buffer[end] not in _DELIMITERS)):
+                break
+            if end - pos > MAX_ITEM_CHARS:
+                raise BatchParseError(f"單一元素超過 {MAX_ITEM_CHARS} 個字元")
+            self._append(items, value)
+            self._state = 'separator'
+            pos = end
+        self._pos = pos
+        return items
+
+    def _parse_ndjson(self, final: bool) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            newline = buffer.find('\n', pos)
+            if newline < 0:
+                if not final:
+                    break
+                newline = len(buffer)
+            line = buffer[pos:newline]
+            pos = newline + 1
+            self._line += 1
+            if len(line) > MAX_ITEM_CHARS:
+                raise BatchParseError(f"單一元素超過 {MAX_ITEM_CHARS} 個字元")
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                raise BatchParseError(f"NDJSON 第 {self._line} 行格式錯誤")
+            if (self.count == 0 and self.birthdate is None and isinstance(value, dict)
+                    and 'birthdate' in value and 'phone_number' not in value):
+                self.birthdate = value['birthdate']
+                continue
+            self._append(items, value)
+        self._pos = min(pos, len(buffer))
+        return items
+
+
+def analyze_items(analyzer: PhoneNumerology, items: List[Any], start: int = 0) -> List[dict]:
+    """
+    以 score_batch 評分一塊元素，格式錯誤的號碼回傳錯誤訊息而不中斷
+
+    Args:
+        analyzer: 分析器
+        items: BatchParser 解析出的元素
+        start: 第一個元素在整個請求中的序號
+
+    Returns:
+        每個元素一筆結果 (順序與 items 相同)
+    """
+    results = [None] * len(items)
+    positions = []
+    numbers = []
+    for i, item in enumerate(items):
+        phone_number = item.get('phone_number') if isinstance(item, dict) else item
+        if not isinstance(phone_number, str):
+            results[i] = {'index': start + i, 'phone_number': phone_number, 'error': '手機號碼必須為字串'}
+            continue
+        clean_number = normalize_phone_number(phone_number)
+        if not _MOBILE.match(clean_number):
+            results[i] = {
+                'index': start + i,
+                'phone_number': phone_number,
+                'error': '手機號碼格式不正確，請輸入 09 開頭的 10 位數字'
+            }
+            continue
+        positions.append(i)
+        numbers.append(clean_number)
+
+    if numbers:
+        batch = analyzer.score_batch(numbers)
+        columns = zip(
+            batch['final_score'].tolist(),
+            batch['recommendation'].tolist(),
+            batch['magnetic_total'].tolist(),
+            batch['lingdong_number'].tolist(),
+            batch['five_elements_score'].tolist(),
+        )
+        lingdong_81 = analyzer.LINGDONG_81
+        for i, clean_number, (final_score, recommendation, magnetic_total, lingdong_number, five_elements_score) \
+                in zip(positions, numbers, columns):
+            results[i] = {
+                'index': start + i,
+                'phone_number': format_phone_number(clean_number),
+                'score': final_score,
+                'recommendation': recommendation,
+                'magnetic_total': magnetic_total,
+                'lingdong_number': lingdong_number,
+                'lingdong_type': lingdong_81[lingdong_number]['type'],
+                'five_elements_score': five_elements_score,
+            }
+    return results
+
+
+def to_ndjson(results: List[dict]) -> str:
+    """將結果轉為 NDJSON 文字"""
+    return ''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results)
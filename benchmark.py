@@ -0,0 +1,319 @@
+"""
+評分引擎微基準測試
+以固定亂數種子產生號碼與出生日期語料，測量各分析函式在單一號碼、1 萬與 100 萬筆批次下的
+每秒運算次數與記憶體配置，結果存為 JSON 並可與先前儲存的基準比較
+"""
+
+from phone_numerology import PhoneNumerology
+from typing import Callable, Dict, List
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+
+DEFAULT_SEED = 20240101
+DEFAULT_SIZES = (1, 10000, 1000000)
+BIRTHDATE = "1990/09/25"
+
+# 出生日期語料範圍
+_FIRST_DATE = datetime.date(1950, 1, 1)
+_DATE_SPAN = (datetime.date(2010, 12, 31) - _FIRST_DATE).days + 1
+
+
+def make_numbers(size: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """產生 size 個 09XX-XXX-XXX 格式的號碼（相同種子與數量結果固定）"""
+    rng = random.Random(f"numbers-{seed}-{size}")
+    return [
+        f"09{rng.randrange(100):02d}-{rng.randrange(1000):03d}-{rng.randrange(1000):03d}"
+        for _ in range(size)
+    ]
+
+
+def make_birthdates(size: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """產生 size 個 1950-2010 年間的出生日期 (YYYY/MM/DD)"""
+    rng = random.Random(f"birthdates-{seed}-{size}")
+    return [
+        (_FIRST_DATE + datetime.timedelta(days=rng.randrange(_DATE_SPAN))).strftime('%Y/%m/%d')
+        for _ in range(size)
+    ]
+
+
+def _per_item(function: Callable) -> Callable:
+    """將單筆函式包成對整個語料逐一呼叫的函式"""
+    def run(corpus):
+        for item in corpus:
+            function(item)
+    return run
+
+
+def _recommend(corpus):
+    for birthdate in corpus:
+        PhoneNumerology(birthdate).recommend_numbers(10)
+
+
+def _warm_recommendations(corpus):
+    # 推薦範本依 recommendation_key 記憶化，先以語料中相異的日期暖機，只測量穩定狀態
+    for birthdate in set(corpus):
+        PhoneNumerology(birthdate).recommend_numbers(1)
+
+
+def benchmarks() -> Dict[str, dict]:
+    """
+    所有基準測試
+
+    Returns:
+        {名稱: {'corpus': 語料產生函式, 'run': 對語料執行一次的函式, 'warmup': 暖機函式或 None}}
+    """
+    analyzer = PhoneNumerology(BIRTHDATE)
+    cases = {
+        name: {'corpus': make_numbers, 'run': _per_item(getattr(analyzer, name)), 'warmup': None}
+        for name in (
+            'analyze_magnetic_fields',
+            'calculate_lingdong_81',
+            'calculate_five_elements_compatibility',
+            'comprehensive_analysis',
+            'generate_report',
+        )
+    }
+    cases['recommend_numbers'] = {'corpus': make_birthdates, 'run': _recommend, 'warmup': _warm_recommendations}
+    cases['score_batch'] = {'corpus': make_numbers, 'run': analyzer.score_batch, 'warmup': None}
+    return cases
+
+
+def measure_time(run: Callable, corpus: list, repeat: int = 3, max_time: float = 10.0) -> dict:
+    """
+    測量每秒運算次數（取多次執行中最快的一次）
+
+    小語料以 timeit 自動決定迴圈次數 (每次至少 0.2 秒)；
+    累計時間超過 max_time 後不再重複，避免 100 萬筆批次執行過久
+    """
+    timer = timeit.Timer(lambda: run(corpus))
+    loops, elapsed = timer.autorange()
+    timings = [elapsed / loops]
+    total = elapsed
+    while len(timings) < repeat and total < max_time:
+        elapsed = timer.timeit(loops)
+        timings.append(elapsed / loops)
+        total += elapsed
+
+    best = min(timings)
+    return {
+        'ops_per_sec': len(corpus) / best,
+        'seconds_per_op': best / len(corpus),
+        'runs': len(timings),
+        'loops': loops,
+    }
+
+
+def measure_allocations(run: Callable, corpus: list) -> dict:
+    """
+    以 tracemalloc 測量執行一次的記憶體配置
+
+    Returns:
+        alloc_peak_bytes: 執行期間的峰值配置量
+        alloc_bytes_per_op: 執行期間峰值配置量平均到每筆
+        alloc_retained_bytes: 執行結束後仍未釋放的配置量 (非 0 表示有物件被保留，例如快取)
+    """
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        run(corpus)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'alloc_peak_bytes': peak - start,
+        'alloc_bytes_per_op': (peak - start) / len(corpus),
+        'alloc_retained_bytes': current - start,
+    }
+
+
+def run_benchmarks(names: List[str], sizes: List[int], seed: int = DEFAULT_SEED, repeat: int = 3,
+                   max_time: float = 10.0, alloc_sample: int = 10000, progress: bool = True) -> dict:
+    """
+    執行基準測試
+
+    Args:
+        names: 要執行的基準測試名稱
+        sizes: 語料大小
+        seed: 亂數種子
+        repeat: 每項最多執行次數
+        max_time: 每項累計執行時間上限 (秒)
+        alloc_sample: 記憶體配置只以語料前 N 筆測量 (tracemalloc 會大幅拖慢執行)
+        progress: 是否顯示進度
+
+    Returns:
+        可直接存為 JSON 的結果
+    """
+    cases = benchmarks()
+    results = []
+    for size in sizes:
+        corpora = {}
+        for name in names:
+            case = cases[name]
+            corpus = corpora.get(case['corpus'])
+            if corpus is None:
+                corpus = corpora[case['corpus']] = case['corpus'](size, seed)
+            if case['warmup'] is not None:
+                case['warmup'](corpus)
+
+            result = {'benchmark': name, 'size': size}
+            result.update(measure_time(case['run'], corpus, repeat, max_time))
+            result.update(measure_allocations(case['run'], corpus[:alloc_sample]))
+            results.append(result)
+            if progress:
+                print(f"  {name:<40} {size:>9,} 筆  {result['ops_per_sec']:>14,.0f} ops/s", file=sys.stderr)
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'numpy': numpy_version,
+            'seed': seed,
+            'repeat': repeat,
+            'alloc_sample': alloc_sample,
+        },
+        'results': results,
+    }
+
+
+def compare(results: dict, baseline: dict) -> List[dict]:
+    """
+    與基準比較每秒運算次數
+
+    Returns:
+        每項結果加上 baseline_ops_per_sec 與 change (正值表示變快，例: 0.1 = 快 10%)
+    """
+    previous = {(item['benchmark'], item['size']): item for item in baseline.get('results', [])}
+    rows = []
+    for item in results['results']:
+        row = dict(item)
+        old = previous.get((item['benchmark'], item['size']))
+        if old is not None:
+            row['baseline_ops_per_sec'] = old['ops_per_sec']
+            row['change'] = item['ops_per_sec'] / old['ops_per_sec'] - 1
+        rows.append(row)
+    return rows
+
+
+def find_regressions(rows: List[dict], max_regression: float) -> List[dict]:
+    """
+    找出比基準慢超過 max_regression 的項目
+
+    Args:
+        rows: compare 的回傳值（基準中沒有的項目不比較）
+        max_regression: 容許變慢的比例 (例: 0.1 = 每秒運算次數最多少 10%)
+
+    Returns:
+        變慢超過容許比例的項目
+    """
+    if max_regression < 0:
+        raise ValueError("容許變慢的比例不可為負數")
+    return [row for row in rows if 'change' in row and row['change'] < -max_regression]
+
+
+def print_results(rows: List[dict]):
+    """以表格顯示結果"""
+    print("=" * 100)
+    print(f"{'基準測試':<38} {'筆數':>9} {'ops/s':>14} {'µs/op':>10} {'峰值配置':>12} {'B/op':>10} {'與基準比較':>10}")
+    print("-" * 100)
+    for row in rows:
+        change = f"{row['change']:+.1%}" if 'change' in row else '-'
+        print(
+            f"{row['benchmark']:<40} {row['size']:>9,} {row['ops_per_sec']:>14,.0f} "
+            f"{row['seconds_per_op'] * 1e6:>10.2f} {row['alloc_peak_bytes'] / 1024:>10,.0f}KB "
+            f"{row['alloc_bytes_per_op']:>10,.0f} {change:>12}"
+        )
+    print("=" * 100)
+
+
+if __name__ == "__main__":
+    available = list(benchmarks())
+
+    parser = argparse.ArgumentParser(
+        description='評分引擎微基準測試',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+可用的基準測試:
+  {', '.join(available)}
+
+使用範例:
+  # 完整執行 (1、10,000、1,000,000 筆) 並儲存為基準
+  python benchmark.py --output benchmark_baseline.json
+
+  # 只跑小語料，並與基準比較 (變慢超過 10% 時回傳錯誤碼 1)
+  python benchmark.py --sizes 1,10000 --baseline benchmark_baseline.json --max-regression 0.1
+
+  # 只測試指定項目
+  python benchmark.py --benchmark comprehensive_analysis --benchmark score_batch
+        '''
+    )
+    parser.add_argument('--benchmark', '-k', action='append', choices=available, metavar='NAME',
+                        help='要執行的基準測試 (可重複指定，預設: 全部)')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help=f"語料大小，以逗號分隔 (預設: {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'亂數種子 (預設: {DEFAULT_SEED})')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='每項最多執行次數，取最快者 (預設: 3)')
+    parser.add_argument('--max-time', type=float, default=10.0, help='每項累計執行時間上限秒數 (預設: 10)')
+    parser.add_argument('--alloc-sample', type=int, default=10000, help='記憶體配置測量的筆數上限 (預設: 10000)')
+    parser.add_argument('--output', '-o', help='將結果存為 JSON 檔')
+    parser.add_argument('--baseline', '-b', help='與先前儲存的 JSON 結果比較')
+    parser.add_argument('--max-regression', type=float,
+                        help='任何一項比基準慢超過此比例時回傳錯誤碼 1 (例: 0.1 = 10%%)')
+
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        parser.error(f"語料大小格式錯誤: {args.sizes}")
+    if not sizes or min(sizes) < 1:
+        parser.error("語料大小必須為正整數")
+    if args.max_regression is not None:
+        if args.baseline is None:
+            parser.error("--max-regression 需要同時指定 --baseline")
+        if args.max_regression < 0:
+            parser.error("--max-regression 不可為負數")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ 無法讀取基準檔案: {e}")
+            sys.exit(1)
+
+    results = run_benchmarks(args.benchmark or available, sizes, seed=args.seed, repeat=args.repeat,
+                             max_time=args.max_time, alloc_sample=args.alloc_sample)
+    rows = compare(results, baseline) if baseline is not None else results['results']
+    print_results(rows)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 結果已儲存到: {args.output}")
+
+    if args.max_regression is not None:
+        regressions = find_regressions(rows, args.max_regression)
+        for row in regressions:
+            print(f"⚠️  {row['benchmark']} ({row['size']:,} 筆) 變慢 {-row['change']:.1%}")
+        if regressions:
+            sys.exit(1)
@@ -1,16 +1,46 @@
 import re
 import time
 import sys
-from playwright.sync_api import sync_playwright
 
-def run():
+SEARCH_URL = "https://bms.cht.com.tw/mbms/NewApply/findAvailableProc.jsp"
+
+# Last six digits to search for ("?" matches any digit)
+DEFAULT_PATTERN = "??4196"
+
+# Form selectors shared by the serial and concurrent crawlers
+PREFIX_SELECTOR = 'select[name="head4G"]'
+TEL_SELECTOR = 'input[name="tel"]'
+SEARCH_MODE_TEXT = '後六碼'
+SUBMIT_SELECTOR = 'input[type="submit"], button[type="submit"], input[alt="Submit"]'
+NO_RESULTS_TEXT = "查無符合"
+
+
+def valid_prefixes(options):
+    """Keep the numeric option values of the head4G dropdown."""
+    return [opt for opt in options if opt and opt.isdigit()]
+
+
+def extract_numbers(text, prefix, pattern=DEFAULT_PATTERN):
+    """Find the numbers in a result page that start with prefix and match the six-digit pattern."""
+    regex = re.compile(r"(?<!\d)" + re.escape(prefix) + pattern.replace("?", r"\d") + r"(?!\d)")
+    return list(dict.fromkeys(regex.findall(text.replace("-", ""))))
+
+
+def save_numbers(numbers, path="found_numbers.txt"):
+    with open(path, "w", encoding="utf-8") as f:
+        for num in numbers:
+            f.write(num + "\n")
+
+
+def run(url=SEARCH_URL, pattern=DEFAULT_PATTERN, output="found_numbers.txt"):
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
         # Launch browser (headless=False to see what's happening if needed)
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
         page = context.new_page()
         
-        url = "https://bms.cht.com.tw/mbms/NewApply/findAvailableProc.jsp"
         print(f"Navigating to {url}...")
         
         try:
@@ -21,10 +51,10 @@ def run():
 
         # Get all options from the "First 4 digits" dropdown (name="head4G")
         try:
-            page.wait_for_selector('select[name="head4G"]', timeout=30000)
-            options = page.eval_on_selector_all('select[name="head4G"] option', 
+            page.wait_for_selector(PREFIX_SELECTOR, timeout=30000)
+            options = page.eval_on_selector_all(f'{PREFIX_SELECTOR} option', 
                                                 'options => options.map(o => o.value)')
-            prefixes = [opt for opt in options if opt and opt.isdigit()]
+            prefixes = valid_prefixes(options)
             print(f"Found {len(prefixes)} prefixes: {prefixes}")
         except Exception as e:
             print(f"Error extracting prefixes: {e}")
@@ -37,33 +67,35 @@ def run():
             
             try:
                 # Ensure we are on the right page or element is present
-                if not page.is_visible('select[name="head4G"]'):
+                if not page.is_visible(PREFIX_SELECTOR):
                     page.goto(url, timeout=60000)
-                    page.wait_for_selector('select[name="head4G"]', timeout=30000)
+                    page.wait_for_selector(PREFIX_SELECTOR, timeout=30000)
 
                 # Select the prefix
-                page.select_option('select[name="head4G"]', prefix)
+                page.select_option(PREFIX_SELECTOR, prefix)
                 
                 # Select "Last 6 digits" (value="2" or by text)
-                page.click('text=後六碼')
+                page.click(f'text={SEARCH_MODE_TEXT}')
                 
-                # Input "??9196" into the text field
-                page.fill('input[name="tel"]', '??4196')
+                # Input the pattern (e.g. "??4196") into the text field
+                page.fill(TEL_SELECTOR, pattern)
                 
                 # Click Search (Submit)
                 with page.expect_navigation(timeout=60000):
-                    page.click('input[type="submit"], button[type="submit"], input[alt="Submit"]')
+                    page.click(SUBMIT_SELECTOR)
                 
                 # Wait for content to load
                 page.wait_for_load_state('networkidle')
                 
                 # Check for results
                 content = page.content()
-                if "查無符合" in content:
+                if NO_RESULTS_TEXT in content:
                     print(f"  No results for {prefix}")
                 else:
                     text = page.inner_text('body')
                     # Look for numbers starting with prefix and ending with 9196
+                    # (the serial crawler's original filter; extract_numbers is used by the
+                    # concurrent and HTTP crawlers)
                     matches = re.findall(rf"{prefix}\d{{6}}", text.replace("-", ""))
                     valid_matches = [m for m in matches if m.endswith("9196")]
                     
@@ -91,10 +123,8 @@ def run():
         print("\nSearch complete.")
         print(f"Total found numbers: {len(found_numbers)}")
         
-        with open("found_numbers.txt", "w", encoding="utf-8") as f:
-            for num in found_numbers:
-                f.write(num + "\n")
-        print("Results saved to found_numbers.txt")
+        save_numbers(found_numbers, output)
+        print(f"Results saved to {output}")
         
         browser.close()
 
@@ -0,0 +1,190 @@
+"""
+Concurrent crawler for the CHT availability search.
+
+N isolated browser contexts (separate cookies and sessions) pull head4G prefixes from a shared
+queue. Instead of a fixed sleep after every prefix, one politeness limiter spaces out page loads
+and form submissions across all workers. Failed prefixes are retried by whichever worker is free.
+"""
+
+from cht_crawler import (SEARCH_URL, DEFAULT_PATTERN, PREFIX_SELECTOR, TEL_SELECTOR, SEARCH_MODE_TEXT,
+                         SUBMIT_SELECTOR, NO_RESULTS_TEXT, valid_prefixes, extract_numbers, save_numbers)
+from functools import partial
+import argparse
+import asyncio
+import sys
+import time
+
+
+class PolitenessLimiter:
+    """Global rate limit: requests from all workers start at least 1/rate seconds apart."""
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate: requests per second across all workers (0 = unlimited)
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        # Reserve the next slot under the lock, then sleep outside it
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def crawl_prefixes(prefixes, searchers, retries=2, log=print):
+    """
+    Run one worker per searcher until the shared prefix queue is empty.
+
+    Args:
+        prefixes: head4G prefixes to search
+        searchers: one async search(prefix) -> numbers callable per worker
+        retries: extra attempts for a prefix whose search raised (unless the error has retryable = False)
+        log: progress output
+
+    Returns:
+        (numbers by prefix in input order, error message by failed prefix)
+    """
+    queue = asyncio.Queue()
+    for prefix in prefixes:
+        queue.put_nowait((prefix, 0))
+    results = {}
+    failures = {}
+
+    async def worker(worker_id, search):
+        while True:
+            try:
+                prefix, attempt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                numbers = await search(prefix)
+            except Exception as e:
+                if attempt < retries and getattr(e, "retryable", True):
+                    log(f"  [{worker_id}] Error processing prefix {prefix}, retrying: {e}")
+                    queue.put_nowait((prefix, attempt + 1))
+                else:
+                    log(f"  [{worker_id}] Giving up on prefix {prefix}: {e}")
+                    failures[prefix] = str(e)
+                continue
+            results[prefix] = numbers
+            if numbers:
+                log(f"  [{worker_id}] {prefix}: found {len(numbers)} numbers: {numbers}")
+            else:
+                log(f"  [{worker_id}] {prefix}: no results")
+
+    await asyncio.gather(*(worker(i, search) for i, search in enumerate(searchers)))
+    return {prefix: results[prefix] for prefix in prefixes if prefix in results}, failures
+
+
+async def fetch_prefixes(page, url, limiter):
+    """Load the search page and read the head4G options."""
+    await limiter.wait()
+    await page.goto(url, timeout=60000)
+    await page.wait_for_selector(PREFIX_SELECTOR, timeout=30000)
+    options = await page.eval_on_selector_all(f'{PREFIX_SELECTOR} option', 'options => options.map(o => o.value)')
+    return valid_prefixes(options)
+
+
+async def search_prefix(page, url, pattern, limiter, prefix):
+    """Submit the search form for one prefix in this worker's page and parse the result."""
+    await limiter.wait()
+    await page.goto(url, timeout=60000)
+    await page.wait_for_selector(PREFIX_SELECTOR, timeout=30000)
+    await page.select_option(PREFIX_SELECTOR, prefix)
+    await page.click(f'text={SEARCH_MODE_TEXT}')
+    await page.fill(TEL_SELECTOR, pattern)
+
+    await limiter.wait()
+    async with page.expect_navigation(timeout=60000):
+        await page.click(SUBMIT_SELECTOR)
+    await page.wait_for_load_state('networkidle')
+
+    if NO_RESULTS_TEXT in await page.content():
+        return []
+    return extract_numbers(await page.inner_text('body'), prefix, pattern)
+
+
+async def browser_crawl(url=SEARCH_URL, pattern=DEFAULT_PATTERN, contexts=4, rate=1.0, retries=2,
+                        headless=True, prefixes=None, log=print):
+    """
+    Crawl every prefix with `contexts` isolated browser contexts sharing one Chromium instance.
+
+    Returns:
+        (prefixes, numbers by prefix, error message by failed prefix)
+    """
+    from playwright.async_api import async_playwright
+
+    limiter = PolitenessLimiter(rate)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            pages = []
+            for _ in range(contexts):
+                context = await browser.new_context()
+                pages.append(await context.new_page())
+
+            if prefixes is None:
+                prefixes = await fetch_prefixes(pages[0], url, limiter)
+                log(f"Found {len(prefixes)} prefixes: {prefixes}")
+
+            searchers = [partial(search_prefix, page, url, pattern, limiter) for page in pages]
+            results, failures = await crawl_prefixes(prefixes, searchers, retries, log)
+            return prefixes, results, failures
+        finally:
+            await browser.close()
+
+
+def report(prefixes, results, failures, elapsed, output):
+    """Print a summary and save the numbers in prefix order."""
+    found_numbers = [number for numbers in results.values() for number in numbers]
+    print("\nSearch complete.")
+    print(f"Searched {len(results)}/{len(prefixes)} prefixes in {elapsed:.1f}s")
+    if failures:
+        print(f"Failed prefixes: {', '.join(failures)}")
+    print(f"Total found numbers: {len(found_numbers)}")
+    save_numbers(found_numbers, output)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search every head4G prefix concurrently with several browser contexts",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Four browser contexts, at most two requests per second overall
+  python concurrent_crawler.py --contexts 4 --rate 2
+
+  # Against the local stand-in server
+  python fake_cht_server.py --port 8000 &
+  python concurrent_crawler.py --rate 0 --url http://127.0.0.1:8000/mbms/NewApply/findAvailableProc.jsp
+        """
+    )
+    parser.add_argument("--url", default=SEARCH_URL, help="search page URL")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"last six digits, ? = any digit (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--prefix", action="append", help="search only these prefixes (repeatable)")
+    parser.add_argument("--contexts", "-c", type=int, default=4, help="concurrent browser contexts (default: 4)")
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second across all contexts (default: 1)")
+    parser.add_argument("--retries", type=int, default=2, help="retries per failed prefix (default: 2)")
+    parser.add_argument("--headful", action="store_true", help="show the browser windows")
+    parser.add_argument("--output", "-o", default="found_numbers.txt", help="output file (default: found_numbers.txt)")
+    args = parser.parse_args()
+
+    if args.contexts < 1:
+        parser.error("--contexts must be at least 1")
+
+    start = time.monotonic()
+    try:
+        prefixes, results, failures = asyncio.run(browser_crawl(
+            args.url, args.pattern, args.contexts, args.rate, args.retries, not args.headful, args.prefix
+        ))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    report(prefixes, results, failures, time.monotonic() - start, args.output)
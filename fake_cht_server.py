@@ -0,0 +1,224 @@
+"""
+Local stand-in for the CHT findAvailableProc.jsp availability search.
+
+Serves the same search form (head4G prefix dropdown, 前六碼/後六碼 radio, tel field) and a result
+page for a deterministic fake inventory, so the crawlers can be run and timed without touching the
+real site. Records request counts, peak concurrency and request times for checking politeness.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import html
+import json
+import random
+import re
+import secrets
+import threading
+import time
+
+SEARCH_PATH = "/mbms/NewApply/findAvailableProc.jsp"
+DEFAULT_PREFIXES = tuple(f"09{n:02d}" for n in range(10, 40))
+NO_RESULTS_TEXT = "查無符合條件的門號"
+
+_PATTERN = re.compile(r"^[0-9?]{6}$")
+
+
+class FakeInventory:
+    """Deterministic available numbers: per_prefix random six-digit suffixes for every prefix."""
+
+    def __init__(self, prefixes=DEFAULT_PREFIXES, per_prefix=2000, seed=0):
+        self.prefixes = tuple(prefixes)
+        self.numbers = {}
+        for prefix in self.prefixes:
+            rng = random.Random(f"{seed}-{prefix}")
+            suffixes = sorted(rng.sample(range(10 ** 6), per_prefix))
+            self.numbers[prefix] = [f"{prefix}{suffix:06d}" for suffix in suffixes]
+
+    def search(self, prefix, pattern):
+        """Numbers under prefix whose last six digits match pattern ("?" = any digit)."""
+        regex = re.compile(pattern.replace("?", r"\d") + "$")
+        return [number for number in self.numbers.get(prefix, ()) if regex.match(number, 4)]
+
+
+def _search_form(prefixes, message=""):
+    options = "".join(f'<option value="{prefix}">{prefix}</option>' for prefix in prefixes)
+    notice = f'<p class="message">{html.escape(message)}</p>' if message else ""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>門號查詢</title></head>
+<body>
+{notice}
+<form name="findForm" method="post" action="findAvailableProc.jsp">
+<input type="hidden" name="action" value="query">
+<select name="head4G"><option value="">請選擇</option>{options}</select>
+<label><input type="radio" name="searchType" value="1" checked>前六碼</label>
+<label><input type="radio" name="searchType" value="2">後六碼</label>
+<input type="text" name="tel" maxlength="6">
+<input type="submit" value="查詢">
+</form>
+</body></html>"""
+
+
+def _result_page(prefix, numbers, require_js=False):
+    if require_js:
+        # Numbers only appear after a script decodes and renders them
+        encoded = json.dumps([n[::-1] for n in numbers])
+        body = (f'<div id="result"></div><script>var n = {encoded};'
+                f'document.getElementById("result").innerHTML = n.length ? n.map(function (s) {{'
+                f' return "<p>" + s.split("").reverse().join("") + "</p>"; }}).join("") : "<p>{NO_RESULTS_TEXT}</p>";'
+                f'</script><noscript>請啟用 JavaScript</noscript>')
+    elif numbers:
+        rows = "".join(f"<tr><td>{n[:4]}-{n[4:7]}-{n[7:]}</td></tr>" for n in numbers)
+        body = f"<p>{prefix} 共 {len(numbers)} 筆</p><table>{rows}</table>"
+    else:
+        body = f"<p>{NO_RESULTS_TEXT}</p>"
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>查詢結果</title></head>
+<body>{body}<a href="findAvailableProc.jsp">重新查詢</a></body></html>"""
+
+
+class FakeChtServer(ThreadingHTTPServer):
+    """Threaded HTTP server serving the fake search page."""
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), inventory=None, delay=0.0, js_prefixes=()):
+        """
+        Args:
+            address: (host, port); port 0 picks a free port
+            inventory: FakeInventory (default: DEFAULT_PREFIXES, 2000 numbers each)
+            delay: seconds to wait before answering each search, to simulate a slow backend
+            js_prefixes: prefixes whose result page is rendered by JavaScript ("*" = all)
+        """
+        super().__init__(address, _Handler)
+        self.inventory = inventory or FakeInventory()
+        self.delay = delay
+        self.js_prefixes = set(js_prefixes)
+        self.sessions = set()
+        self.requests = 0
+        self.searches = 0
+        self.active = 0
+        self.max_active = 0
+        self.request_times = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def start(self):
+        """Serve in a background thread; returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-cht-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _begin(self):
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.request_times.append(time.monotonic())
+
+    def _end(self):
+        with self._lock:
+            self.active -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, session=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if session:
+            self.send_header("Set-Cookie", f"JSESSIONID={session}; Path=/")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "JSESSIONID" and value in self.server.sessions:
+                return value
+        return None
+
+    def do_GET(self):
+        if urlsplit(self.path).path != SEARCH_PATH:
+            self._send(404, "Not Found")
+            return
+        self.server._begin()
+        try:
+            session = None
+            if self._session() is None:
+                session = secrets.token_hex(8)
+                with self.server._lock:
+                    self.server.sessions.add(session)
+            self._send(200, _search_form(self.server.inventory.prefixes), session)
+        finally:
+            self.server._end()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if urlsplit(self.path).path != SEARCH_PATH:
+            self._send(404, "Not Found")
+            return
+        self.server._begin()
+        try:
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            prefixes = self.server.inventory.prefixes
+            field = lambda name: form.get(name, [""])[0]
+            # Like the real site, searches need the session cookie set by the form page
+            if self._session() is None:
+                self._send(200, _search_form(prefixes, "連線逾時，請重新查詢"))
+                return
+            prefix, tel = field("head4G"), field("tel")
+            if field("searchType") != "2" or prefix not in prefixes or not _PATTERN.match(tel):
+                self._send(200, _search_form(prefixes, "查詢條件錯誤"))
+                return
+            with self.server._lock:
+                self.server.searches += 1
+            require_js = prefix in self.server.js_prefixes or "*" in self.server.js_prefixes
+            self._send(200, _result_page(prefix, self.server.inventory.search(prefix, tel), require_js))
+        finally:
+            self.server._end()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the CHT availability search page")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--per-prefix", type=int, default=2000, help="available numbers per prefix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds of latency per search")
+    parser.add_argument("--js-prefix", action="append", default=[],
+                        help="render results for this prefix with JavaScript (repeatable, * = all)")
+    args = parser.parse_args()
+
+    server = FakeChtServer((args.host, args.port), FakeInventory(per_prefix=args.per_prefix, seed=args.seed),
+                           delay=args.delay, js_prefixes=args.js_prefix)
+    print(f"Fake search page at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
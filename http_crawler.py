@@ -0,0 +1,346 @@
+"""
+HTTP crawler for the CHT availability search.
+
+Submits the findAvailableProc.jsp form directly with requests over one pooled keep-alive session and
+parses the result HTML, so no Chromium is started. The form is read from the search page itself
+(hidden fields, head4G options, the 後六碼 radio value), and the JSESSIONID cookie from that page is
+reused for every search. Prefixes whose result page only renders with JavaScript are handed to the
+Playwright crawler.
+"""
+
+from cht_crawler import SEARCH_URL, DEFAULT_PATTERN, SEARCH_MODE_TEXT, NO_RESULTS_TEXT, valid_prefixes, extract_numbers
+from concurrent_crawler import PolitenessLimiter, crawl_prefixes, browser_crawl, report
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PREFIX_FIELD = "head4G"
+TEL_FIELD = "tel"
+# Identify the crawler honestly, as the Playwright crawler's default (HeadlessChrome) user agent does
+USER_AGENT = f"phone-numerology-http-crawler/1.0 ({requests.utils.default_user_agent()})"
+
+
+class NeedsJavaScript(Exception):
+    """The page only shows its form or results after running scripts."""
+
+    retryable = False
+
+
+class SessionExpired(Exception):
+    """A search was answered with the search form again, usually because the session cookie expired."""
+
+
+class _PageParser(HTMLParser):
+    """Collect the forms and the visible text of a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self.text = []
+        self.has_script = False
+        self._form = None
+        self._select = None
+        self._radio = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag in ("script", "noscript", "style"):
+            self.has_script = self.has_script or tag != "style"
+            self._skip += 1
+        elif tag == "form":
+            self._form = {"action": attrs.get("action", ""), "method": attrs.get("method", "get").lower(),
+                          "fields": [], "selects": {}, "radios": {}}
+            self.forms.append(self._form)
+        elif self._form is None:
+            return
+        elif tag == "input":
+            self._radio = None
+            name, kind = attrs.get("name"), attrs.get("type", "text").lower()
+            if not name:
+                return
+            if kind == "radio":
+                self._radio = [attrs.get("value", "on"), "checked" in attrs, ""]
+                self._form["radios"].setdefault(name, []).append(self._radio)
+            elif kind == "checkbox":
+                if "checked" in attrs:
+                    self._form["fields"].append((name, attrs.get("value", "on")))
+            elif kind not in ("submit", "image", "button", "reset", "file"):
+                self._form["fields"].append((name, attrs.get("value", "")))
+        elif tag == "select":
+            self._radio = None
+            self._select = self._form["selects"].setdefault(attrs.get("name", ""), [])
+        elif tag == "option" and self._select is not None:
+            self._select.append([attrs.get("value"), "selected" in attrs])
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "noscript", "style"):
+            self._skip = max(self._skip - 1, 0)
+        elif tag == "select":
+            self._select = None
+        elif tag == "form":
+            self._form = self._select = self._radio = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self.text.append(data)
+        if self._select is not None and self._select and self._select[-1][0] is None:
+            # <option> without a value attribute submits its text
+            self._select[-1][0] = data.strip()
+        if self._radio is not None:
+            # The text right after a radio button is its label
+            self._radio[2] += data.strip()
+
+
+def parse_page(html):
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+class SearchForm:
+    """The search form read from the search page: where to post and what to send."""
+
+    def __init__(self, page_url, form):
+        self.action = urljoin(page_url, form["action"] or page_url)
+        self.method = form["method"]
+        self.fields = list(form["fields"])
+        self.prefixes = valid_prefixes([value for value, _ in form["selects"][PREFIX_FIELD]])
+        for name, options in form["selects"].items():
+            if name != PREFIX_FIELD and options:
+                self.fields.append((name, next((v for v, selected in options if selected), options[0][0])))
+        self.search_type = None
+        for name, radios in form["radios"].items():
+            mode = next((value for value, _, label in radios if SEARCH_MODE_TEXT in label), None)
+            if mode is not None:
+                self.search_type = (name, mode)
+            else:
+                checked = next((value for value, checked, _ in radios if checked), None)
+                if checked is not None:
+                    self.fields.append((name, checked))
+        if self.search_type is None:
+            raise ValueError(f"No '{SEARCH_MODE_TEXT}' option in the search form")
+
+    @classmethod
+    def from_html(cls, page_url, html):
+        """
+        Find the form containing the head4G dropdown.
+
+        Raises:
+            NeedsJavaScript: the page has no such form but has scripts that may build it
+            ValueError: the page has no such form
+        """
+        page = parse_page(html)
+        for form in page.forms:
+            if PREFIX_FIELD in form["selects"]:
+                return cls(page_url, form)
+        if page.has_script:
+            raise NeedsJavaScript("search form is built by JavaScript")
+        raise ValueError("No search form on the page")
+
+    def data(self, prefix, pattern):
+        """Form fields for a 後六碼 search of pattern under prefix."""
+        fields = [(name, value) for name, value in self.fields if name not in (PREFIX_FIELD, TEL_FIELD)]
+        fields.append((PREFIX_FIELD, prefix))
+        fields.append(self.search_type)
+        fields.append((TEL_FIELD, pattern))
+        return fields
+
+
+def parse_results(html, prefix, pattern):
+    """
+    Numbers in a result page.
+
+    Raises:
+        SessionExpired: the page is the search form again (e.g. with a session timeout message)
+        NeedsJavaScript: neither numbers nor the no-results message are in the static HTML,
+            but the page has scripts
+        ValueError: the page is neither a result page nor the search form
+    """
+    page = parse_page(html)
+    text = "\n".join(page.text)
+    if NO_RESULTS_TEXT in text:
+        return []
+    numbers = extract_numbers(text, prefix, pattern)
+    if numbers:
+        return numbers
+    if any(PREFIX_FIELD in form["selects"] for form in page.forms):
+        message = " ".join(text.split())[:80]
+        raise SessionExpired(f"Search form returned instead of results: {message}")
+    if page.has_script:
+        raise NeedsJavaScript("results are rendered by JavaScript")
+    raise ValueError("Unrecognised result page")
+
+
+class HttpSearcher:
+    """
+    Posts searches over one requests.Session.
+
+    The session keeps up to pool_size connections alive, so concurrent searches from worker threads
+    reuse TCP (and TLS) connections instead of reconnecting for every prefix.
+    """
+
+    def __init__(self, url=SEARCH_URL, pattern=DEFAULT_PATTERN, pool_size=4, timeout=30):
+        self.url = url
+        self.pattern = pattern
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.form = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _text(self, response):
+        response.raise_for_status()
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = response.apparent_encoding
+        return response.text
+
+    def load_form(self):
+        """GET the search page (which also sets the session cookie) and read its form; returns the prefixes."""
+        response = self.session.get(self.url, timeout=self.timeout)
+        form = SearchForm.from_html(response.url, self._text(response))
+        with self._lock:
+            self.form = form
+        return form.prefixes
+
+    def search(self, prefix, wait=None):
+        """
+        Numbers under prefix matching the pattern; reloads the form once if the session has expired.
+
+        Args:
+            prefix: head4G prefix
+            wait: blocking callable run before every request this search sends (the rate limit)
+        """
+        wait = wait or (lambda: None)
+        form = self.form
+        if form is None:
+            wait()
+            self.load_form()
+            form = self.form
+        wait()
+        try:
+            return self._submit(form, prefix)
+        except SessionExpired:
+            wait()
+            self.load_form()
+            wait()
+            return self._submit(self.form, prefix)
+
+    def _submit(self, form, prefix):
+        data = form.data(prefix, self.pattern)
+        if form.method == "post":
+            response = self.session.post(form.action, data=data, headers={"Referer": self.url}, timeout=self.timeout)
+        else:
+            response = self.session.get(form.action, params=data, headers={"Referer": self.url}, timeout=self.timeout)
+        return parse_results(self._text(response), prefix, self.pattern)
+
+
+async def http_crawl(url=SEARCH_URL, pattern=DEFAULT_PATTERN, workers=4, rate=1.0, retries=2,
+                     prefixes=None, fallback=True, log=print):
+    """
+    Crawl every prefix over HTTP with `workers` concurrent searches sharing one session.
+
+    Prefixes whose result page needs JavaScript (or every prefix, if the search page itself does)
+    are crawled again with the Playwright crawler when fallback is set.
+
+    Returns:
+        (prefixes, numbers by prefix, error message by failed prefix)
+    """
+    limiter = PolitenessLimiter(rate)
+    searcher = HttpSearcher(url, pattern, pool_size=workers)
+    try:
+        try:
+            await limiter.wait()
+            found = await asyncio.to_thread(searcher.load_form)
+        except NeedsJavaScript:
+            if not fallback:
+                raise
+            log("Search page needs JavaScript, using the browser crawler")
+            return await browser_crawl(url, pattern, workers, rate, retries, prefixes=prefixes, log=log)
+        if prefixes is None:
+            prefixes = found
+            log(f"Found {len(prefixes)} prefixes: {prefixes}")
+
+        needs_js = set()
+        loop = asyncio.get_running_loop()
+
+        def wait():
+            # Searches run in worker threads; every request they send takes a slot from the shared limiter
+            asyncio.run_coroutine_threadsafe(limiter.wait(), loop).result()
+
+        async def search(prefix):
+            try:
+                return await asyncio.to_thread(searcher.search, prefix, wait)
+            except NeedsJavaScript:
+                needs_js.add(prefix)
+                raise
+
+        results, failures = await crawl_prefixes(prefixes, [search] * workers, retries, log)
+    finally:
+        searcher.close()
+
+    if needs_js and fallback:
+        pending = [prefix for prefix in prefixes if prefix in needs_js]
+        log(f"{len(pending)} prefixes need JavaScript, retrying them with the browser crawler")
+        _, browser_results, browser_failures = await browser_crawl(
+            url, pattern, min(workers, len(pending)), rate, retries, prefixes=pending, log=log
+        )
+        for prefix in pending:
+            failures.pop(prefix, None)
+        results.update(browser_results)
+        failures.update(browser_failures)
+        results = {prefix: results[prefix] for prefix in prefixes if prefix in results}
+    return prefixes, results, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search every head4G prefix by posting the search form over HTTP",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Four concurrent searches, at most two requests per second overall
+  python http_crawler.py --workers 4 --rate 2
+
+  # Against the local stand-in server, with one prefix rendered by JavaScript
+  python fake_cht_server.py --port 8000 --js-prefix 0912 &
+  python http_crawler.py --rate 0 --url http://127.0.0.1:8000/mbms/NewApply/findAvailableProc.jsp
+        """
+    )
+    parser.add_argument("--url", default=SEARCH_URL, help="search page URL")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help=f"last six digits, ? = any digit (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--prefix", action="append", help="search only these prefixes (repeatable)")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="concurrent searches (default: 4)")
+    parser.add_argument("--rate", type=float, default=1.0, help="max requests per second across all workers (default: 1)")
+    parser.add_argument("--retries", type=int, default=2, help="retries per failed prefix (default: 2)")
+    parser.add_argument("--no-fallback", action="store_true", help="do not use the browser for pages that need JavaScript")
+    parser.add_argument("--output", "-o", default="found_numbers.txt", help="output file (default: found_numbers.txt)")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    start = time.monotonic()
+    try:
+        prefixes, results, failures = asyncio.run(http_crawl(
+            args.url, args.pattern, args.workers, args.rate, args.retries, args.prefix, not args.no_fallback
+        ))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    report(prefixes, results, failures, time.monotonic() - start, args.output)
@@ -0,0 +1,216 @@
+"""
+輕量效能指標
+提供執行緒安全的計數器與延遲直方圖，並輸出 Prometheus 文字格式 (text/plain; version=0.0.4)，
+不需安裝 prometheus_client
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 預設延遲區間 (秒): 整個 HTTP 請求
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 分析階段延遲區間 (秒): 單一號碼的各項分析只需數微秒
+STAGE_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+                 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Registry:
+    """指標集合，render() 依註冊順序輸出所有指標"""
+
+    def __init__(self):
+        self._metrics = []
+        self._names = set()
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._names:
+                raise ValueError(f"指標名稱重複: {metric.name}")
+            self._names.add(metric.name)
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文字格式"""
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# 預設指標集合
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """取得指定標籤值的子指標（同一組標籤值只建立一次）"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要標籤: {', '.join(self.labelnames)}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        """無標籤計數器加 amount"""
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self._items()
+        ]
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # 最後一格為 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """以 with 區塊計時並記錄秒數"""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """延遲直方圖 (秒)"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """無標籤直方圖記錄一筆"""
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        """無標籤直方圖計時"""
+        return self.labels().time()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in self._items():
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (('le', _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """輸出時才呼叫函式取值的指標，適合既有的統計數字 (例: 快取命中次數)"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float],
+                 metric_type: str = 'gauge', registry: Optional[Registry] = REGISTRY):
+        self.type = metric_type
+        self.callback = callback
+        super().__init__(name, documentation, (), registry)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.callback())}"]
@@ -0,0 +1,323 @@
+"""
+號碼庫存倒排索引
+將一批候選號碼依磁場組合、靈動數、五行數字個數與評分區間建立索引，
+篩選查詢時只需合併相關的索引清單，不必逐一掃描所有號碼
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import iter_normalized_file, format_phone_number, normalize_phone_number
+from result_columns import FIELD_NAMES, ELEMENT_NAMES, RECOMMENDATION_LEVELS, compute_columns
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+import itertools
+
+
+# 號碼的精簡分析結果: (號碼, 綜合評分, 推薦等級, 磁場次數, 五行數字個數, 靈動數, 靈動數吉凶)
+# 磁場次數與五行數字個數為 (名稱, 次數) 的 tuple，只列出次數大於 0 者，順序不影響索引
+Summary = Tuple[str, float, str, Tuple[Tuple[str, int], ...], Tuple[Tuple[str, int], ...], int, str]
+
+# 各行程依出生日期保留的分析器
+_analyzers: Dict[str, PhoneNumerology] = {}
+
+
+def summarize(analysis) -> Summary:
+    """將 comprehensive_analysis 的結果轉為建立索引所需的精簡 tuple（可跨行程傳遞）"""
+    return (
+        analysis.phone_number,
+        analysis.final_score,
+        analysis.recommendation,
+        tuple(analysis.magnetic_fields.field_counts.items()),
+        tuple(analysis.five_elements.element_counts.items()),
+        analysis.lingdong_81.lingdong_number,
+        analysis.lingdong_81.type
+    )
+
+
+def summarize_numbers(birthdate: str, numbers: List[str]) -> Dict[str, object]:
+    """
+    評分一批號碼並回傳欄位式的精簡結果（供行程池呼叫，每個行程只建立一次分析器）
+
+    10 碼號碼以 compute_columns 向量化計算評分與磁場 / 五行次數，不建立完整分析結果；
+    其他長度的號碼才逐一以 comprehensive_analysis 分析
+
+    Returns:
+        phone_number (號碼列表) 與 compute_columns 的 final_score、recommendation、field_counts、
+        element_counts、lingdong_number 欄位，依輸入順序排列，可直接傳給 NumberIndex.add_columns
+    """
+    import numpy as np
+
+    analyzer = _analyzers.get(birthdate)
+    if analyzer is None:
+        analyzer = _analyzers[birthdate] = PhoneNumerology(birthdate)
+
+    clean_numbers = [normalize_phone_number(number) for number in numbers]
+    valid = [i for i, clean_number in enumerate(clean_numbers) if len(clean_number) == 10]
+    if len(valid) == len(numbers):
+        columns = compute_columns(analyzer, clean_numbers)
+    else:
+        columns = {
+            'final_score': np.zeros(len(numbers)),
+            'recommendation': np.zeros(len(numbers), dtype=np.uint8),
+            'field_counts': np.zeros((len(numbers), len(FIELD_NAMES)), dtype=np.int64),
+            'element_counts': np.zeros((len(numbers), len(ELEMENT_NAMES)), dtype=np.int64),
+            'lingdong_number': np.zeros(len(numbers), dtype=np.int64),
+        }
+        if valid:
+            batch = compute_columns(analyzer, [clean_numbers[i] for i in valid])
+            for name in columns:
+                columns[name][valid] = batch[name]
+        for i in sorted(set(range(len(numbers))) - set(valid)):
+            analysis = analyzer.comprehensive_analysis(numbers[i])
+            columns['final_score'][i] = analysis.final_score
+            columns['recommendation'][i] = RECOMMENDATION_LEVELS.index(analysis.recommendation)
+            for field_name, count in analysis.magnetic_fields.field_counts.items():
+                columns['field_counts'][i, FIELD_NAMES.index(field_name)] = count
+            for element, count in analysis.five_elements.element_counts.items():
+                columns['element_counts'][i, ELEMENT_NAMES.index(element)] = count
+            columns['lingdong_number'][i] = analysis.lingdong_81.lingdong_number
+
+    return {
+        'phone_number': list(numbers),
+        'final_score': columns['final_score'],
+        'recommendation': columns['recommendation'],
+        'field_counts': columns['field_counts'],
+        'element_counts': columns['element_counts'],
+        'lingdong_number': columns['lingdong_number'],
+    }
+
+
+class NumberIndex:
+    """號碼庫存的倒排索引"""
+
+    def __init__(self, birthdate: str):
+        """
+        Args:
+            birthdate: 出生日期 (格式: YYYY/MM/DD)，五行與綜合評分依此計算
+        """
+        self.analyzer = PhoneNumerology(birthdate)
+        self.birthdate = birthdate
+
+        # 號碼編號 -> 號碼 / 綜合評分 / 推薦等級（依加入順序）
+        self.numbers: List[str] = []
+        self.scores: List[float] = []
+        self.recommendations: List[str] = []
+
+        # 倒排索引: 條件 -> 號碼編號列表（編號遞增）
+        self._by_field: Dict[str, Dict[int, List[int]]] = {}
+        self._by_element: Dict[str, Dict[int, List[int]]] = {}
+        self._by_lingdong_number: Dict[int, List[int]] = {}
+        self._by_lingdong_type: Dict[str, List[int]] = {}
+        self._by_band: Dict[int, List[int]] = {}
+
+        # 依 (-綜合評分, 編號) 排序的編號，首次查詢評分時建立
+        self._ranked: Optional[List[int]] = None
+        self._ranked_scores: Optional[List[float]] = None
+
+    @classmethod
+    def build(cls, birthdate: str, numbers: Iterable[str], executor=None,
+              chunk_size: int = 2000, max_pending: int = 16) -> 'NumberIndex':
+        """
+        以一批號碼建立索引
+
+        Args:
+            birthdate: 出生日期
+            numbers: 號碼
+            executor: 行程池 (可選)，提供時由各行程評分號碼、本行程只加入索引，號碼編號仍依輸入順序
+            chunk_size: 每批以 summarize_numbers 評分的號碼數量
+            max_pending: 同時提交給行程池的工作數量上限
+        """
+        index = cls(birthdate)
+        if executor is None:
+            numbers = iter(numbers)
+            while True:
+                chunk = list(itertools.islice(numbers, chunk_size))
+                if not chunk:
+                    return index
+                index.add_columns(summarize_numbers(birthdate, chunk))
+
+        # 依提交順序取回結果，記憶體中最多保留 max_pending 個工作
+        numbers = iter(numbers)
+        pending = deque()
+        while True:
+            chunk = list(itertools.islice(numbers, chunk_size))
+            if chunk:
+                pending.append(executor.submit(summarize_numbers, birthdate, chunk))
+            if pending and (not chunk or len(pending) >= max_pending):
+                index.add_columns(pending.popleft().result())
+            if not chunk and not pending:
+                return index
+
+    @classmethod
+    def from_file(cls, birthdate: str, path: str) -> 'NumberIndex':
+        """讀取每行一個號碼的檔案（例: found_numbers.txt）建立索引"""
+        return cls.build(birthdate, (format_phone_number(number) for number in iter_normalized_file(path)))
+
+    def add(self, phone_number: str) -> int:
+        """
+        分析並加入一個號碼（大量號碼請使用 build，以批次評分）
+
+        Returns:
+            號碼編號
+        """
+        return self.add_summary(summarize(self.analyzer.comprehensive_analysis(phone_number)))
+
+    def add_summary(self, summary: Summary) -> int:
+        """
+        加入已分析的號碼（summarize 的回傳值，須以相同出生日期分析）
+
+        Returns:
+            號碼編號
+        """
+        phone_number, final_score, recommendation, field_counts, element_counts, lingdong_number, lingdong_type = summary
+        number_id = len(self.numbers)
+
+        self.numbers.append(phone_number)
+        self.scores.append(final_score)
+        self.recommendations.append(recommendation)
+
+        for field_name, count in field_counts:
+            self._by_field.setdefault(field_name, {}).setdefault(count, []).append(number_id)
+        for element, count in element_counts:
+            self._by_element.setdefault(element, {}).setdefault(count, []).append(number_id)
+        self._by_lingdong_number.setdefault(lingdong_number, []).append(number_id)
+        self._by_lingdong_type.setdefault(lingdong_type, []).append(number_id)
+        self._by_band.setdefault(self.score_band(final_score), []).append(number_id)
+
+        self._ranked = None
+        self._ranked_scores = None
+        return number_id
+
+    def add_columns(self, columns: Dict[str, object]) -> range:
+        """
+        一次加入一批已評分的號碼（summarize_numbers 的回傳值，須以相同出生日期評分）
+
+        各倒排索引以 NumPy 依條件分組後整批附加，不逐一處理號碼
+
+        Returns:
+            新加入號碼的編號範圍
+        """
+        import numpy as np
+
+        start = len(self.numbers)
+        scores = columns['final_score']
+        self.numbers.extend(columns['phone_number'])
+        self.scores.extend(scores.tolist())
+        self.recommendations.extend(RECOMMENDATION_LEVELS[level] for level in columns['recommendation'].tolist())
+
+        def append_groups(postings, keys, values):
+            # 依 values 分組，將各組的編號 (遞增) 附加到 postings[keys[值]]
+            for value in np.unique(values).tolist():
+                key = keys(value)
+                if key is not None:
+                    postings.setdefault(key, []).extend((np.flatnonzero(values == value) + start).tolist())
+
+        for f, field_name in enumerate(FIELD_NAMES):
+            append_groups(self._by_field.setdefault(field_name, {}), lambda count: count or None,
+                          columns['field_counts'][:, f])
+        for e, element in enumerate(ELEMENT_NAMES):
+            append_groups(self._by_element.setdefault(element, {}), lambda count: count or None,
+                          columns['element_counts'][:, e])
+        lingdong_numbers = np.asarray(columns['lingdong_number'])
+        append_groups(self._by_lingdong_number, lambda number: number, lingdong_numbers)
+        lingdong_types = list(dict.fromkeys(info['type'] for info in PhoneNumerology.LINGDONG_81.values()))
+        type_index = np.array([0] + [lingdong_types.index(PhoneNumerology.LINGDONG_81[n]['type'])
+                                     for n in range(1, 82)])
+        append_groups(self._by_lingdong_type, lambda t: lingdong_types[t], type_index[lingdong_numbers])
+        append_groups(self._by_band, lambda band: band, np.clip(scores // 10, 0, 9).astype(np.int64))
+
+        self._ranked = None
+        self._ranked_scores = None
+        return range(start, len(self.numbers))
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    @staticmethod
+    def score_band(final_score: float) -> int:
+        """評分區間（每 10 分一區，100 分併入 90 區）"""
+        return min(9, max(0, int(final_score // 10)))
+
+    def band(self, band: int) -> List[int]:
+        """指定評分區間內的號碼編號"""
+        return list(self._by_band.get(band, []))
+
+    def ranked(self, limit: Optional[int] = None) -> List[int]:
+        """依綜合評分由高到低排列的號碼編號（同分依加入順序）"""
+        self._ensure_ranked()
+        return self._ranked[:limit] if limit is not None else list(self._ranked)
+
+    def query(self,
+              fields: Optional[Dict[str, int]] = None,
+              elements: Optional[Dict[str, int]] = None,
+              lingdong_number: Optional[int] = None,
+              lingdong_type: Optional[str] = None,
+              min_score: Optional[float] = None,
+              max_score: Optional[float] = None,
+              limit: Optional[int] = None) -> List[int]:
+        """
+        篩選號碼
+
+        Args:
+            fields: {磁場名稱: 最少出現次數}，例如 {'天醫': 2}
+            elements: {五行: 最少數字個數}，例如 {'水': 3}
+            lingdong_number: 靈動數 (1-81)
+            lingdong_type: 靈動數吉凶，例如 '大吉'
+            min_score: 綜合評分下限（含）
+            max_score: 綜合評分上限（含）
+            limit: 最多回傳的數量
+
+        Returns:
+            符合所有條件的號碼編號，依綜合評分由高到低排列
+        """
+        candidates = []
+        for field_name, minimum in (fields or {}).items():
+            candidates.append(self._at_least(self._by_field.get(field_name, {}), minimum))
+        for element, minimum in (elements or {}).items():
+            candidates.append(self._at_least(self._by_element.get(element, {}), minimum))
+        if lingdong_number is not None:
+            candidates.append(self._by_lingdong_number.get(lingdong_number, []))
+        if lingdong_type is not None:
+            candidates.append(self._by_lingdong_type.get(lingdong_type, []))
+
+        # 評分區間由排序後的評分以二分搜尋取得連續片段
+        ranked_slice = None
+        if min_score is not None or max_score is not None:
+            self._ensure_ranked()
+            negative_scores = self._ranked_scores
+            start = bisect_left(negative_scores, -max_score) if max_score is not None else 0
+            stop = bisect_right(negative_scores, -min_score) if min_score is not None else len(negative_scores)
+            ranked_slice = self._ranked[start:stop]
+
+        if not candidates:
+            result = ranked_slice if ranked_slice is not None else self.ranked()
+            return result[:limit] if limit is not None else result
+
+        # 由最短的清單開始取交集
+        if ranked_slice is not None:
+            candidates.append(ranked_slice)
+        candidates.sort(key=len)
+        matched = set(candidates[0])
+        for ids in candidates[1:]:
+            if not matched:
+                break
+            matched.intersection_update(ids)
+
+        result = sorted(matched, key=lambda number_id: (-self.scores[number_id], number_id))
+        return result[:limit] if limit is not None else result
+
+    def _ensure_ranked(self):
+        if self._ranked is None:
+            self._ranked = sorted(range(len(self.numbers)), key=lambda number_id: (-self.scores[number_id], number_id))
+            self._ranked_scores = [-self.scores[number_id] for number_id in self._ranked]
+
+    @staticmethod
+    def _at_least(postings: Dict[int, List[int]], minimum: int) -> List[int]:
+        """出現次數至少為 minimum 的號碼編號"""
+        if minimum <= 0:
+            raise ValueError("最少次數必須大於 0")
+        ids = []
+        for count, number_ids in postings.items():
+            if count >= minimum:
+                ids.extend(number_ids)
+        return ids
@@ -0,0 +1,184 @@
+"""
+萬用字元號碼最佳化搜尋
+給定含固定數字與萬用字元的號碼格式（例: 09??-???-196），
+以分支定界直接找出綜合評分最高的前 K 個號碼，不需窮舉所有組合
+"""
+
+from phone_numerology import PhoneNumerology
+import argparse
+import heapq
+import re
+import sys
+
+
+WILDCARD = '?'
+
+
+def parse_pattern(pattern: str) -> list:
+    """
+    解析號碼格式
+
+    Args:
+        pattern: 10 碼號碼格式，數字為固定位置、? 為萬用字元，可包含連字號或空白
+
+    Returns:
+        每個位置可用數字的列表
+    """
+    compact = re.sub(r'[\s-]', '', pattern)
+    if not re.fullmatch(r'[0-9?]{10}', compact):
+        raise ValueError("號碼格式必須為 10 碼，僅可包含數字與 ? (例: 09??-???-196)")
+    return [list(range(10)) if c == WILDCARD else [int(c)] for c in compact]
+
+
+def synthesize_best_numbers(birthdate: str, pattern: str, top_k: int = 10) -> list:
+    """
+    找出符合號碼格式且綜合評分最高的前 K 個號碼
+
+    綜合評分可化為整數目標值 20 × 磁場總分 + 135 × 靈動數得分 + 27 × 五行得分（下限 0），
+    與四捨五入後的 final_score 排序完全一致。末四碼（決定靈動數）先行列舉並依目標值排序，
+    前六碼則以逐位動態規劃求得的上界進行分支定界；同分時號碼較小者優先。
+
+    Args:
+        birthdate: 出生日期 (格式: YYYY/MM/DD)
+        pattern: 號碼格式 (例: 09??-???-196)
+        top_k: 回傳的號碼數量
+
+    Returns:
+        依綜合評分排序的 comprehensive_analysis 結果列表
+    """
+    if top_k < 1:
+        raise ValueError("top_k 必須大於 0")
+
+    choices = parse_pattern(pattern)
+    analyzer = PhoneNumerology(birthdate)
+    pair_scores = analyzer._PAIR_SCORES
+    element_scores = analyzer._element_scores
+
+    # 末四碼: 列舉所有符合格式的組合，計算其內部磁場、五行與靈動數的線性目標值
+    suffixes = []
+    for d6 in choices[6]:
+        for d7 in choices[7]:
+            for d8 in choices[8]:
+                for d9 in choices[9]:
+                    value = d6 * 1000 + d7 * 100 + d8 * 10 + d9
+                    elements = element_scores[d6] + element_scores[d7] + element_scores[d8] + element_scores[d9]
+                    linear = (
+                        20 * (pair_scores[d6 * 10 + d7] + pair_scores[d7 * 10 + d8] + pair_scores[d8 * 10 + d9]) +
+                        135 * analyzer.LINGDONG_81[(value % 80) or 80]['score'] +
+                        27 * elements
+                    )
+                    suffixes.append((value, d6, elements, linear))
+    min_suffix_elements = min(s[2] for s in suffixes)
+
+    # 依第 6 碼分別排序末四碼（含銜接的磁場組合），目標值高者在前、同分時號碼小者在前
+    sorted_suffixes = {}
+    for d5 in choices[5]:
+        ranked = [(linear + 20 * pair_scores[d5 * 10 + d6], value, elements) for value, d6, elements, linear in suffixes]
+        ranked.sort(key=lambda s: (-s[0], s[1]))
+        sorted_suffixes[d5] = ranked
+
+    # 前六碼上界: best[p][d] 為第 p 碼為 d 時，其後各位線性目標值的最大可能值
+    best = [None] * 6
+    best[5] = {d5: sorted_suffixes[d5][0][0] for d5 in choices[5]}
+    for p in range(4, -1, -1):
+        best[p] = {
+            d: max(20 * pair_scores[d * 10 + x] + 27 * element_scores[x] + best[p + 1][x] for x in choices[p + 1])
+            for d in choices[p]
+        }
+
+    # 其後各位五行得分的最小可能值，用於五行得分下限 0 的修正上界
+    min_elements_after = [0] * 6
+    running = min_suffix_elements
+    for p in range(5, -1, -1):
+        min_elements_after[p] = running
+        running += min(element_scores[x] for x in choices[p])
+
+    heap = []  # (目標值, -號碼) 的最小堆積
+
+    def beaten(bound: int, smallest_number: int) -> bool:
+        """此分支的最佳可能結果是否無法進入前 K 名"""
+        if len(heap) < top_k:
+            return False
+        worst_value, worst_negative = heap[0]
+        return bound < worst_value or (bound == worst_value and smallest_number >= -worst_negative)
+
+    def search(p: int, head: int, linear: int, elements: int):
+        """head 為已決定的前 p + 1 碼，linear / elements 為其線性目標值與五行得分"""
+        d = head % 10
+        correction = 27 * max(0, -(elements + min_elements_after[p]))
+
+        if p == 5:
+            base = head * 10000
+            for suffix_linear, value, suffix_elements in sorted_suffixes[d]:
+                # 末四碼依目標值遞減、同分依號碼遞增排列，之後的組合皆不可能勝出
+                if beaten(linear + suffix_linear + correction, base + value):
+                    break
+                total_elements = elements + suffix_elements
+                objective = linear + suffix_linear + 27 * max(0, -total_elements)
+                item = (objective, -(base + value))
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            return
+
+        children = []
+        for x in choices[p + 1]:
+            child_linear = linear + 20 * pair_scores[d * 10 + x] + 27 * element_scores[x]
+            children.append((child_linear + best[p + 1][x], x, child_linear))
+        children.sort(key=lambda c: (-c[0], c[1]))
+
+        for bound, x, child_linear in children:
+            child_head = head * 10 + x
+            child_elements = elements + element_scores[x]
+            smallest = child_head
+            for q in range(p + 2, 10):
+                smallest = smallest * 10 + choices[q][0]
+            child_bound = bound + 27 * max(0, -(child_elements + min_elements_after[p + 1]))
+            if beaten(child_bound, smallest):
+                continue
+            search(p + 1, child_head, child_linear, child_elements)
+
+    for d0 in choices[0]:
+        search(0, d0, 27 * element_scores[d0], element_scores[d0])
+
+    results = []
+    for _, negative_number in sorted(heap, reverse=True):
+        clean = str(-negative_number).zfill(10)
+        results.append(analyzer.comprehensive_analysis(f"{clean[:4]}-{clean[4:7]}-{clean[7:]}"))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='依號碼格式找出綜合評分最高的號碼',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 找出末三碼為 196 的最佳 10 個號碼
+  python pattern_search.py --birthdate 1990/09/25 --pattern "09??-???-196"
+
+  # 與 cht_crawler.py 相同的 ??4196 搜尋格式
+  python pattern_search.py --birthdate 1990/09/25 --pattern "0978-??4-196" --top 5
+        '''
+    )
+
+    parser.add_argument('--birthdate', '-b', type=str, required=True, help='出生日期 (格式: YYYY/MM/DD)')
+    parser.add_argument('--pattern', '-p', type=str, required=True, help='號碼格式,? 為萬用字元 (例: 09??-???-196)')
+    parser.add_argument('--top', '-k', type=int, default=10, help='顯示的號碼數量 (預設: 10)')
+
+    args = parser.parse_args()
+
+    try:
+        results = synthesize_best_numbers(args.birthdate, args.pattern, top_k=args.top)
+    except ValueError as e:
+        print(f"❌ 錯誤: {e}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"格式 {args.pattern} 綜合評分前 {len(results)} 名")
+    print("=" * 70)
+    print(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}")
+    print("-" * 70)
+    for i, result in enumerate(results, 1):
+        print(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}")
@@ -0,0 +1,114 @@
+"""
+電話號碼正規化
+將各種輸入格式（連字號、空白、括號、+886 國際格式）轉為純數字的標準號碼，
+並提供以 bytes.translate 一次處理整個檔案的批次模式
+
+全形數字等 Unicode 十進位數字 (例: ０９７８) 一律轉為對應的 ASCII 數字，
+其餘字元（含換行 \r\n）皆視為分隔符號移除；單一號碼與批次模式的結果相同
+"""
+
+from typing import Iterator, List
+import re
+import unicodedata
+
+
+# 非數字字元（\d 包含所有 Unicode 十進位數字）
+_NON_DIGIT = re.compile(r'\D')
+
+# 批次模式: 刪除 ASCII 數字與換行以外的所有位元組
+_DELETE_BYTES = bytes(b for b in range(256) if not (0x30 <= b <= 0x39 or b == 0x0A))
+
+# 台灣國碼
+COUNTRY_CODE = '886'
+
+
+def _from_international(clean_number: str) -> str:
+    """
+    將 886 開頭的國際格式轉為國內格式
+
+    886 後接 8-9 碼的國內號碼（可含多餘的開頭 0，例: +886-0978...）時，
+    轉為 0 開頭的國內號碼；其餘號碼維持不變
+    """
+    if clean_number.startswith(COUNTRY_CODE) and 11 <= len(clean_number) <= 13:
+        national = clean_number[3:]
+        if national[0] == '0':
+            national = national[1:]
+        if 8 <= len(national) <= 9:
+            return '0' + national
+    return clean_number
+
+
+def normalize_phone_number(phone_number: str) -> str:
+    """
+    電話號碼正規化
+
+    Args:
+        phone_number: 任意格式的電話號碼 (例: 0978-759-196、+886 978 759 196)
+
+    Returns:
+        只包含 ASCII 數字的國內格式號碼 (例: 0978759196；０９７８７５９１９６ 亦同)
+    """
+    clean_number = phone_number if phone_number.isdecimal() else _NON_DIGIT.sub('', phone_number)
+    if not clean_number.isascii():
+        clean_number = ''.join(str(unicodedata.decimal(digit)) for digit in clean_number)
+    return _from_international(clean_number)
+
+
+def format_phone_number(clean_number: str) -> str:
+    """
+    將 10 碼號碼格式化為 XXXX-XXX-XXX，其他長度維持原樣
+
+    Args:
+        clean_number: normalize_phone_number 的回傳值
+    """
+    if len(clean_number) == 10:
+        return f"{clean_number[:4]}-{clean_number[4:7]}-{clean_number[7:]}"
+    return clean_number
+
+
+def normalize_lines(data: bytes) -> List[str]:
+    """
+    批次正規化每行一個號碼的資料（空行與不含數字的行略過）
+
+    純 ASCII 的資料以 bytes.translate 一次處理；含其他字元時以 UTF-8 解碼後
+    逐行使用 normalize_phone_number，全形數字的結果與單一號碼模式相同
+
+    Args:
+        data: 檔案內容 (UTF-8)
+
+    Returns:
+        正規化後的號碼列表
+    """
+    if not data.isascii():
+        lines = (normalize_phone_number(line) for line in data.decode('utf-8', errors='replace').split('\n'))
+        return [line for line in lines if line]
+    lines = data.translate(None, _DELETE_BYTES).decode('ascii').split('\n')
+    return [_from_international(line) for line in lines if line]
+
+
+def iter_normalized_file(path: str, chunk_size: int = 1 << 20) -> Iterator[str]:
+    """
+    逐塊讀取檔案並批次正規化，記憶體用量與檔案大小無關
+
+    Args:
+        path: 每行一個號碼的檔案 (例: found_numbers.txt)
+        chunk_size: 每次讀取的位元組數
+
+    Yields:
+        正規化後的號碼
+    """
+    remainder = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # 最後一個換行之後的部分留到下一塊一起處理
+            cut = chunk.rfind(b'\n')
+            if cut < 0:
+                remainder += chunk
+                continue
+            yield from normalize_lines(remainder + chunk[:cut])
+            remainder = chunk[cut + 1:]
+    if remainder:
+        yield from normalize_lines(remainder)
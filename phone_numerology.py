@@ -3,9 +3,231 @@
 使用八大數字磁場和八十一靈動數來分析電話號碼的吉凶
 """
 
+from collections import OrderedDict
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import io
+import itertools
 import re
+import threading
+import time
+
+from phone_normalizer import normalize_phone_number, format_phone_number
+
+
+def _timed_stage(on_stage: Callable[[str, float], None], stage: str, method: Callable) -> Callable:
+    """包裝分析方法，每次呼叫結束後 (含拋出例外) 以 on_stage(stage, 秒數) 回報耗時"""
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            on_stage(stage, time.perf_counter() - start)
+    return timed
+
+
+def _build_pair_table(magnetic_fields: Dict) -> List:
+    """
+    將磁場定義編譯為 100 格的數字組合索引
+
+    索引值為兩位數組合的整數值（例如 '09' -> 9），
+    每格為 (磁場名稱, 磁場資訊) 或 None（不屬於任何磁場）
+    """
+    table = [None] * 100
+    for field_name, field_info in magnetic_fields.items():
+        for pair in field_info['pairs']:
+            table[int(pair)] = (field_name, field_info)
+    return table
+
+
+class _AnalysisResult(Mapping):
+    """
+    分析結果基底類別
+    
+    以 __slots__ 保存計算所需的最少資料，明細欄位於首次存取時才由靜態對照表產生並保存於 slot，
+    之後的存取（例如在迴圈中重複取用 result['field_counts']）直接回傳同一份資料；
+    同時提供唯讀字典介面（result['key']）與 to_dict()，與原本的字典結果相容。
+    """
+    
+    __slots__ = ()
+    _KEYS: Tuple[str, ...] = ()
+    
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def to_dict(self) -> Dict:
+        """轉換為巢狀的一般字典"""
+        return {
+            key: value.to_dict() if isinstance(value, _AnalysisResult) else value
+            for key, value in ((key, getattr(self, key)) for key in self._KEYS)
+        }
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class MagneticFieldAnalysis(_AnalysisResult):
+    """八大數字磁場分析結果"""
+    
+    __slots__ = ('clean_number', 'total_score', '_pairs', '_field_counts', '_field_details')
+    _KEYS = ('pairs', 'field_counts', 'field_details', 'total_score', 'average_score')
+    
+    def __init__(self, clean_number: str, total_score: int):
+        self.clean_number = clean_number
+        self.total_score = total_score
+        self._pairs = None
+        self._field_counts = None
+        self._field_details = None
+    
+    @property
+    def pairs(self) -> List[str]:
+        if self._pairs is None:
+            number = self.clean_number
+            self._pairs = [number[i:i+2] for i in range(len(number)-1)]
+        return self._pairs
+    
+    @property
+    def field_counts(self) -> Dict[str, int]:
+        """各磁場出現次數（依首次出現順序）"""
+        if self._field_counts is None:
+            field_counts = {}
+            for _, field_name, _ in self._fields():
+                field_counts[field_name] = field_counts.get(field_name, 0) + 1
+            self._field_counts = field_counts
+        return self._field_counts
+    
+    @property
+    def field_details(self) -> List[Dict]:
+        if self._field_details is None:
+            self._field_details = [
+                {
+                    'pair': pair,
+                    'field': field_name,
+                    'meaning': field_info['meaning'],
+                    'type': field_info['type'],
+                    'score': field_info['score']
+                }
+                for pair, field_name, field_info in self._fields()
+            ]
+        return self._field_details
+    
+    @property
+    def average_score(self) -> float:
+        pair_count = len(self.clean_number) - 1
+        return self.total_score / pair_count if pair_count > 0 else 0
+    
+    def _fields(self):
+        """依序產生屬於磁場的 (組合, 磁場名稱, 磁場資訊)"""
+        pair_table = PhoneNumerology._PAIR_TABLE
+        for pair in self.pairs:
+            entry = pair_table[int(pair)]
+            if entry is not None:
+                yield pair, entry[0], entry[1]
+
+
+class LingdongAnalysis(_AnalysisResult):
+    """八十一靈動數分析結果，吉凶資訊直接引用 LINGDONG_81 對照表"""
+    
+    __slots__ = ('last_digits', 'number_value', 'lingdong_number', '_info')
+    _KEYS = ('last_digits', 'number_value', 'lingdong_number', 'type', 'meaning', 'score')
+    
+    def __init__(self, last_digits: str, number_value: int, lingdong_number: int, info: Dict):
+        self.last_digits = last_digits
+        self.number_value = number_value
+        self.lingdong_number = lingdong_number
+        self._info = info
+    
+    @property
+    def type(self) -> str:
+        return self._info['type']
+    
+    @property
+    def meaning(self) -> str:
+        return self._info['meaning']
+    
+    @property
+    def score(self) -> int:
+        return self._info['score']
+
+
+class FiveElementsAnalysis(_AnalysisResult):
+    """五行相容性分析結果"""
+    
+    __slots__ = ('clean_number', 'birth_year', 'birth_element', 'compatibility_score',
+                 '_element_counts', '_element_analysis')
+    _KEYS = ('birth_year', 'birth_element', 'element_counts', 'element_analysis', 'compatibility_score')
+    
+    def __init__(self, clean_number: str, birth_year: int, birth_element: str, compatibility_score: int):
+        self.clean_number = clean_number
+        self.birth_year = birth_year
+        self.birth_element = birth_element
+        self.compatibility_score = compatibility_score
+        self._element_counts = None
+        self._element_analysis = None
+    
+    @property
+    def element_counts(self) -> Dict[str, int]:
+        """號碼中各五行的數字個數（依首次出現順序）"""
+        if self._element_counts is None:
+            digit_elements = PhoneNumerology.DIGIT_ELEMENTS
+            element_counts = {}
+            for digit in self.clean_number:
+                element = digit_elements[digit]
+                element_counts[element] = element_counts.get(element, 0) + 1
+            self._element_counts = element_counts
+        return self._element_counts
+    
+    @property
+    def element_analysis(self) -> List[Dict]:
+        if self._element_analysis is None:
+            element_analysis = []
+            for element, count in self.element_counts.items():
+                relation = PhoneNumerology._relation(self.birth_element, element)
+                element_analysis.append({
+                    'element': element,
+                    'count': count,
+                    'relation': relation,
+                    'score': PhoneNumerology.ELEMENT_RELATION_SCORES[relation] * count
+                })
+            self._element_analysis = element_analysis
+        return self._element_analysis
+    
+    def with_birth_year(self, birth_year: int) -> 'FiveElementsAnalysis':
+        """回傳出生年份不同、其餘相同的結果（本命五行相同時分數與明細不變）"""
+        if birth_year == self.birth_year:
+            return self
+        result = FiveElementsAnalysis(self.clean_number, birth_year, self.birth_element, self.compatibility_score)
+        result._element_counts = self._element_counts
+        result._element_analysis = self._element_analysis
+        return result
+
+
+class ComprehensiveAnalysis(_AnalysisResult):
+    """綜合分析結果"""
+    
+    __slots__ = ('phone_number', 'birthdate', 'magnetic_fields', 'lingdong_81', 'five_elements',
+                 'final_score', 'recommendation')
+    _KEYS = __slots__
+    
+    def __init__(self, phone_number: str, birthdate: str, magnetic_fields: MagneticFieldAnalysis,
+                 lingdong_81: LingdongAnalysis, five_elements: FiveElementsAnalysis,
+                 final_score: float, recommendation: str):
+        self.phone_number = phone_number
+        self.birthdate = birthdate
+        self.magnetic_fields = magnetic_fields
+        self.lingdong_81 = lingdong_81
+        self.five_elements = five_elements
+        self.final_score = final_score
+        self.recommendation = recommendation
 
 
 class PhoneNumerology:
@@ -63,6 +285,10 @@ class PhoneNumerology:
         }
     }
     
+    # 數字組合 -> 磁場索引（類別載入時編譯一次）
+    _PAIR_TABLE = _build_pair_table(MAGNETIC_FIELDS)
+    _PAIR_SCORES = [entry[1]['score'] if entry else 0 for entry in _PAIR_TABLE]
+    
     # 八十一靈動數吉凶對照表
     LINGDONG_81 = {
         1: {'type': '大吉', 'meaning': '宇宙起源,天地開泰', 'score': 10},
@@ -148,12 +374,125 @@ class PhoneNumerology:
         81: {'type': '大吉', 'meaning': '萬物回春,還原復始', 'score': 10}
     }
     
-    def __init__(self, birthdate: str):
+    # 天干（依 (出生年 - 4) % 10 排列）與天干五行
+    HEAVENLY_STEMS = ['庚', '辛', '壬', '癸', '甲', '乙', '丙', '丁', '戊', '己']
+    STEM_ELEMENTS = {
+        '庚': '金', '辛': '金',
+        '壬': '水', '癸': '水',
+        '甲': '木', '乙': '木',
+        '丙': '火', '丁': '火',
+        '戊': '土', '己': '土'
+    }
+    
+    # 數字對應五行（簡化版）
+    DIGIT_ELEMENTS = {
+        '1': '木', '2': '木',
+        '3': '火', '4': '火',
+        '5': '土', '6': '土',
+        '7': '金', '8': '金',
+        '9': '水', '0': '水'
+    }
+    
+    # 五行相生相剋
+    ELEMENT_RELATIONS = {
+        '木': {'生': '火', '剋': '土', '被生': '水', '被剋': '金'},
+        '火': {'生': '土', '剋': '金', '被生': '木', '被剋': '水'},
+        '土': {'生': '金', '剋': '水', '被生': '火', '被剋': '木'},
+        '金': {'生': '水', '剋': '木', '被生': '土', '被剋': '火'},
+        '水': {'生': '木', '剋': '火', '被生': '金', '被剋': '土'}
+    }
+    
+    # 報告範本（類別載入時建立一次，分隔線已展開）
+    _REPORT_HEADER = f"""
+{'='*60}
+電話號碼命理分析報告
+{'='*60}
+
+📱 號碼: {{phone_number}}
+🎂 出生日期: {{birthdate}}
+
+{'─'*60}
+【八大數字磁場分析】
+{'─'*60}
+"""
+    _REPORT_FIELD = "  • {field_name} ({type}): 出現 {count} 次\n    意義: {meaning}\n"
+    _REPORT_NO_FIELD = "  無特殊磁場組合\n"
+    _REPORT_LINGDONG = f"""
+  磁場評分: {{total_score:.1f}}
+
+{'─'*60}
+【八十一靈動數分析】
+{'─'*60}
+  末四碼: {{last_digits}}
+  靈動數: {{lingdong_number}}
+  吉凶: {{type}}
+  意義: {{meaning}}
+  評分: {{score}}
+"""
+    _REPORT_FIVE_ELEMENTS = f"""
+{'─'*60}
+【五行相容性分析】
+{'─'*60}
+  出生年份: {{birth_year}} 年
+  本命五行: {{birth_element}}
+  
+  號碼五行分布:
+"""
+    _REPORT_ELEMENT = "    {element}: {count} 個 ({relation}) - 得分: {score}\n"
+    _REPORT_SUMMARY = f"""
+  五行相容評分: {{compatibility_score}}
+
+{'='*60}
+【綜合評分】
+{'='*60}
+  總分: {{final_score}}/100
+  推薦度: {{recommendation}}
+{'='*60}
+"""
+    
+    # 靈動數不在對照表時的預設資訊
+    _UNKNOWN_LINGDONG = {'type': '未知', 'meaning': '無資料', 'score': 0}
+    
+    # 單一數字字元（與 re.sub(r'\D', '', ...) 保留的字元一致）
+    _DIGIT_PATTERN = re.compile(r'\d')
+    
+    # 數字字元 -> 數值
+    _DIGIT_VALUES = {str(digit): digit for digit in range(10)}
+    
+    # 號碼五行與本命五行關係的每個數字得分
+    ELEMENT_RELATION_SCORES = {
+        '同': 5,     # 同元素：中性
+        '我生': 3,   # 我生：消耗能量
+        '生我': 8,   # 生我：增強能量
+        '我剋': 2,   # 我剋：需要付出
+        '剋我': -3   # 剋我：壓力
+    }
+    
+    # recommendation_key -> recommendation_templates 的結果（所有分析器共用）
+    _RECOMMENDATION_TEMPLATES: Dict[tuple, tuple] = {}
+    
+    # 可由 on_stage 計時的分析階段 -> 方法名稱
+    # （快取命中時不重新計算磁場、靈動數與五行，這三個階段只回報實際計算的次數）
+    STAGES = {
+        'magnetic': '_magnetic_fields',
+        'lingdong': '_lingdong_81',
+        'five_elements': '_five_elements',
+        'aggregation': '_final_score',
+        'comprehensive_analysis': 'comprehensive_analysis',
+        'report': 'render_report',
+        'generate_report': 'generate_report',
+    }
+    
+    def __init__(self, birthdate: str, cache: Optional['AnalysisCache'] = None,
+                 on_stage: Optional[Callable[[str, float], None]] = None):
         """
         初始化分析器
         
         Args:
             birthdate: 出生日期，格式為 YYYY/MM/DD
+            cache: 跨分析器共用的分析快取（可選）
+            on_stage: 各分析階段完成時呼叫 on_stage(階段名稱, 秒數)（可選，階段見 STAGES）；
+                未提供時不計時，分析速度不受影響
         """
         if not birthdate:
             raise ValueError("必須提供出生日期")
@@ -163,8 +502,17 @@ class PhoneNumerology:
             self.birth_year, self.birth_month, self.birth_day = map(int, birthdate.split('/'))
         except ValueError:
             raise ValueError("出生日期格式錯誤，應為 YYYY/MM/DD")
+        
+        # 出生年的天干五行
+        self.birth_element = self.STEM_ELEMENTS[self.HEAVENLY_STEMS[(self.birth_year - 4) % 10]]
+        self._element_scores = self._digit_element_scores()
+        self.cache = cache
+        self.on_stage = on_stage
+        if on_stage is not None:
+            for stage, name in self.STAGES.items():
+                setattr(self, name, _timed_stage(on_stage, stage, getattr(self, name)))
     
-    def analyze_magnetic_fields(self, phone_number: str) -> Dict:
+    def analyze_magnetic_fields(self, phone_number: str) -> MagneticFieldAnalysis:
         """
         分析電話號碼的八大數字磁場
         
@@ -172,44 +520,21 @@ class PhoneNumerology:
             phone_number: 電話號碼（只包含數字）
             
         Returns:
-            包含磁場分析結果的字典
+            磁場分析結果（可如字典取用 pairs、field_counts 等欄位）
         """
-        # 移除所有非數字字符
-        clean_number = re.sub(r'\D', '', phone_number)
-        
-        # 提取所有連續的兩位數組合
-        pairs = [clean_number[i:i+2] for i in range(len(clean_number)-1)]
-        
-        # 分析每個組合
-        field_counts = {}
-        field_details = []
+        return self._magnetic_fields(normalize_phone_number(phone_number))
+    
+    def _magnetic_fields(self, clean_number: str) -> MagneticFieldAnalysis:
+        """分析已正規化號碼的磁場"""
+        # 累加所有連續兩位數組合的磁場分數
+        pair_scores = self._PAIR_SCORES
         total_score = 0
+        for i in range(len(clean_number)-1):
+            total_score += pair_scores[int(clean_number[i:i+2])]
         
-        for pair in pairs:
-            for field_name, field_info in self.MAGNETIC_FIELDS.items():
-                if pair in field_info['pairs']:
-                    if field_name not in field_counts:
-                        field_counts[field_name] = 0
-                    field_counts[field_name] += 1
-                    field_details.append({
-                        'pair': pair,
-                        'field': field_name,
-                        'meaning': field_info['meaning'],
-                        'type': field_info['type'],
-                        'score': field_info['score']
-                    })
-                    total_score += field_info['score']
-                    break
-        
-        return {
-            'pairs': pairs,
-            'field_counts': field_counts,
-            'field_details': field_details,
-            'total_score': total_score,
-            'average_score': total_score / len(pairs) if pairs else 0
-        }
+        return MagneticFieldAnalysis(clean_number, total_score)
     
-    def calculate_lingdong_81(self, phone_number: str, use_last_n: int = 4) -> Dict:
+    def calculate_lingdong_81(self, phone_number: str, use_last_n: int = 4) -> LingdongAnalysis:
         """
         計算八十一靈動數
         
@@ -218,11 +543,12 @@ class PhoneNumerology:
             use_last_n: 使用末幾位數字（4或8）
             
         Returns:
-            包含靈動數分析結果的字典
+            靈動數分析結果（可如字典取用 lingdong_number、type 等欄位）
         """
-        # 移除所有非數字字符
-        clean_number = re.sub(r'\D', '', phone_number)
-        
+        return self._lingdong_81(normalize_phone_number(phone_number), use_last_n)
+    
+    def _lingdong_81(self, clean_number: str, use_last_n: int = 4) -> LingdongAnalysis:
+        """計算已正規化號碼的靈動數"""
         # 取末N位
         last_digits = clean_number[-use_last_n:]
         number_value = int(last_digits)
@@ -231,22 +557,11 @@ class PhoneNumerology:
         lingdong_num = (number_value % 80) or 80
         
         # 獲取對應的吉凶資訊
-        lingdong_info = self.LINGDONG_81.get(lingdong_num, {
-            'type': '未知',
-            'meaning': '無資料',
-            'score': 0
-        })
+        lingdong_info = self.LINGDONG_81.get(lingdong_num, self._UNKNOWN_LINGDONG)
         
-        return {
-            'last_digits': last_digits,
-            'number_value': number_value,
-            'lingdong_number': lingdong_num,
-            'type': lingdong_info['type'],
-            'meaning': lingdong_info['meaning'],
-            'score': lingdong_info['score']
-        }
+        return LingdongAnalysis(last_digits, number_value, lingdong_num, lingdong_info)
     
-    def calculate_five_elements_compatibility(self, phone_number: str) -> Dict:
+    def calculate_five_elements_compatibility(self, phone_number: str) -> FiveElementsAnalysis:
         """
         計算五行相容性（簡化版）
         基於出生年份的天干地支和號碼數字的五行屬性
@@ -255,137 +570,245 @@ class PhoneNumerology:
             phone_number: 電話號碼
             
         Returns:
-            包含五行相容性分析的字典
-        """
-        # 天干地支對應五行
-        heavenly_stems = ['庚', '辛', '壬', '癸', '甲', '乙', '丙', '丁', '戊', '己']
-        elements_map = {
-            '庚': '金', '辛': '金',
-            '壬': '水', '癸': '水',
-            '甲': '木', '乙': '木',
-            '丙': '火', '丁': '火',
-            '戊': '土', '己': '土'
-        }
+            五行相容性分析結果（可如字典取用 element_counts、compatibility_score 等欄位）
+        """
+        return self._five_elements(normalize_phone_number(phone_number))
+    
+    def _five_elements(self, clean_number: str) -> FiveElementsAnalysis:
+        """計算已正規化號碼的五行相容性"""
+        # 分析號碼中的數字，每個數字依與本命五行的關係計分
+        digit_values = self._DIGIT_VALUES
+        element_scores = self._element_scores
+        compatibility_score = 0
+        for digit in clean_number:
+            compatibility_score += element_scores[digit_values[digit]]
         
-        # 計算出生年的天干
-        year_index = (self.birth_year - 4) % 10
-        birth_stem = heavenly_stems[year_index]
-        birth_element = elements_map[birth_stem]
-        
-        # 數字對應五行（簡化版）
-        digit_elements = {
-            '1': '木', '2': '木',
-            '3': '火', '4': '火',
-            '5': '土', '6': '土',
-            '7': '金', '8': '金',
-            '9': '水', '0': '水'
-        }
+        return FiveElementsAnalysis(clean_number, self.birth_year, self.birth_element, compatibility_score)
+    
+    def comprehensive_analysis(self, phone_number: str) -> ComprehensiveAnalysis:
+        """
+        綜合分析電話號碼
         
-        # 五行相生相剋
-        element_relations = {
-            '木': {'生': '火', '剋': '土', '被生': '水', '被剋': '金'},
-            '火': {'生': '土', '剋': '金', '被生': '木', '被剋': '水'},
-            '土': {'生': '金', '剋': '水', '被生': '火', '被剋': '木'},
-            '金': {'生': '水', '剋': '木', '被生': '土', '被剋': '火'},
-            '水': {'生': '木', '剋': '火', '被生': '金', '被剋': '土'}
-        }
+        Args:
+            phone_number: 電話號碼
+            
+        Returns:
+            完整的分析報告
+        """
+        # 號碼只正規化一次，各項分析共用（有快取時由快取組合）
+        clean_number = normalize_phone_number(phone_number)
+        if self.cache is not None:
+            magnetic_analysis, lingdong_analysis, five_elements_analysis = self.cache.components(self, clean_number)
+        else:
+            magnetic_analysis = self._magnetic_fields(clean_number)
+            lingdong_analysis = self._lingdong_81(clean_number)
+            five_elements_analysis = self._five_elements(clean_number)
+        
+        # 計算綜合評分（加權平均）
+        final_score = self._final_score(
+            magnetic_analysis['average_score'],
+            lingdong_analysis['score'],
+            five_elements_analysis['compatibility_score']
+        )
         
-        # 分析號碼中的數字
-        clean_number = re.sub(r'\D', '', phone_number)
-        element_counts = {}
+        # 生成推薦等級
+        recommendation = self._recommendation_level(final_score)
         
-        for digit in clean_number:
-            element = digit_elements[digit]
-            element_counts[element] = element_counts.get(element, 0) + 1
+        return ComprehensiveAnalysis(
+            phone_number,
+            self.birthdate,
+            magnetic_analysis,
+            lingdong_analysis,
+            five_elements_analysis,
+            round(final_score, 2),
+            recommendation
+        )
+    
+    def rescore_digit(self, analysis: ComprehensiveAnalysis, position: int, new_digit: int) -> ComprehensiveAnalysis:
+        """
+        將既有分析結果中的一個數字換掉後重新評分
+        只更新受影響的兩個數字組合、靈動數與五行得分，不重新掃描整個號碼
         
-        # 計算相容性分數
-        compatibility_score = 0
-        element_analysis = []
-        
-        for element, count in element_counts.items():
-            if element == birth_element:
-                # 同元素：中性
-                score = 5 * count
-                relation = '同'
-            elif element == element_relations[birth_element]['生']:
-                # 我生：消耗能量
-                score = 3 * count
-                relation = '我生'
-            elif element == element_relations[birth_element]['被生']:
-                # 生我：增強能量
-                score = 8 * count
-                relation = '生我'
-            elif element == element_relations[birth_element]['剋']:
-                # 我剋：需要付出
-                score = 2 * count
-                relation = '我剋'
-            else:  # 被剋
-                # 剋我：壓力
-                score = -3 * count
-                relation = '剋我'
+        Args:
+            analysis: 本分析器 comprehensive_analysis 的回傳結果
+            position: 要替換的數字位置（以純數字計，從 0 開始）
+            new_digit: 新的數字 (0-9)
             
-            compatibility_score += score
-            element_analysis.append({
-                'element': element,
-                'count': count,
-                'relation': relation,
-                'score': score
-            })
+        Returns:
+            替換後號碼的綜合分析結果，與直接分析新號碼相同
+        """
+        if analysis.birthdate != self.birthdate:
+            raise ValueError("分析結果的出生日期與分析器不同")
+        if not 0 <= new_digit <= 9:
+            raise ValueError("新的數字必須介於 0 到 9")
         
-        return {
-            'birth_year': self.birth_year,
-            'birth_element': birth_element,
-            'element_counts': element_counts,
-            'element_analysis': element_analysis,
-            'compatibility_score': compatibility_score
-        }
+        magnetic = analysis.magnetic_fields
+        lingdong = analysis.lingdong_81
+        clean_number = magnetic.clean_number
+        if not 0 <= position < len(clean_number):
+            raise ValueError(f"位置必須介於 0 到 {len(clean_number) - 1}")
+        
+        old_digit = self._DIGIT_VALUES[clean_number[position]]
+        new_char = str(new_digit)
+        new_number = clean_number[:position] + new_char + clean_number[position + 1:]
+        
+        # 磁場: 只有與該位置相鄰的兩個組合會改變
+        pair_scores = self._PAIR_SCORES
+        total_score = magnetic.total_score
+        if position > 0:
+            previous = self._DIGIT_VALUES[clean_number[position - 1]]
+            total_score += pair_scores[previous * 10 + new_digit] - pair_scores[previous * 10 + old_digit]
+        if position < len(clean_number) - 1:
+            following = self._DIGIT_VALUES[clean_number[position + 1]]
+            total_score += pair_scores[new_digit * 10 + following] - pair_scores[old_digit * 10 + following]
+        
+        # 靈動數: 位於末 N 碼時依位值調整
+        offset = position - (len(clean_number) - len(lingdong.last_digits))
+        if offset >= 0:
+            last_digits = lingdong.last_digits[:offset] + new_char + lingdong.last_digits[offset + 1:]
+            number_value = lingdong.number_value + (new_digit - old_digit) * 10 ** (len(last_digits) - 1 - offset)
+            lingdong_num = (number_value % 80) or 80
+            lingdong = LingdongAnalysis(last_digits, number_value, lingdong_num,
+                                        self.LINGDONG_81.get(lingdong_num, self._UNKNOWN_LINGDONG))
+        
+        # 五行: 相容性分數為各數字得分的總和
+        five_elements = analysis.five_elements
+        compatibility_score = (
+            five_elements.compatibility_score +
+            self._element_scores[new_digit] - self._element_scores[old_digit]
+        )
+        
+        # 以數字位置對應回原始格式（保留連字號等字元）；國際格式則改用國內格式
+        if len(self._DIGIT_PATTERN.findall(analysis.phone_number)) == len(clean_number):
+            match = next(itertools.islice(self._DIGIT_PATTERN.finditer(analysis.phone_number), position, None))
+            phone_number = analysis.phone_number[:match.start()] + new_char + analysis.phone_number[match.end():]
+        else:
+            phone_number = format_phone_number(new_number)
+        
+        magnetic = MagneticFieldAnalysis(new_number, total_score)
+        final_score = self._final_score(magnetic.average_score, lingdong.score, compatibility_score)
+        
+        return ComprehensiveAnalysis(
+            phone_number,
+            self.birthdate,
+            magnetic,
+            lingdong,
+            FiveElementsAnalysis(new_number, self.birth_year, self.birth_element, compatibility_score),
+            round(final_score, 2),
+            self._recommendation_level(final_score)
+        )
     
-    def comprehensive_analysis(self, phone_number: str) -> Dict:
+    def score(self, phone_number: str) -> float:
         """
-        綜合分析電話號碼
+        只計算綜合評分，不建立任何分析明細
+        結果與 comprehensive_analysis 的 final_score 相同，適合大量排序
         
         Args:
             phone_number: 電話號碼
             
         Returns:
-            完整的分析報告
+            綜合評分 (0-100，四捨五入至小數第二位)
+        """
+        return round(self._raw_score(phone_number), 2)
+    
+    def score_with_recommendation(self, phone_number: str) -> Tuple[float, str]:
         """
-        # 執行各項分析
-        magnetic_analysis = self.analyze_magnetic_fields(phone_number)
-        lingdong_analysis = self.calculate_lingdong_81(phone_number)
-        five_elements_analysis = self.calculate_five_elements_compatibility(phone_number)
+        只計算綜合評分與推薦等級，不建立任何分析明細
         
-        # 計算綜合評分（加權平均）
-        # 40% 磁場分析, 30% 靈動數, 30% 五行相容性
-        magnetic_normalized = (magnetic_analysis['average_score'] + 10) / 20 * 100  # 正規化到0-100
-        lingdong_normalized = (lingdong_analysis['score'] + 10) / 20 * 100
-        elements_normalized = min(100, max(0, five_elements_analysis['compatibility_score']))
+        Args:
+            phone_number: 電話號碼
+            
+        Returns:
+            (綜合評分, 推薦等級)
+        """
+        final_score = self._raw_score(phone_number)
+        return round(final_score, 2), self._recommendation_level(final_score)
+    
+    def _raw_score(self, phone_number: str) -> float:
+        """逐位累加磁場、五行與靈動數得分，計算未四捨五入的綜合評分"""
+        clean_number = normalize_phone_number(phone_number)
+        
+        digit_values = self._DIGIT_VALUES
+        pair_scores = self._PAIR_SCORES
+        element_scores = self._element_scores
+        
+        magnetic_total = 0
+        compatibility_score = 0
+        previous = None
+        for char in clean_number:
+            digit = digit_values[char]
+            compatibility_score += element_scores[digit]
+            if previous is not None:
+                magnetic_total += pair_scores[previous * 10 + digit]
+            previous = digit
+        
+        pair_count = len(clean_number) - 1
+        magnetic_average = magnetic_total / pair_count if pair_count > 0 else 0
+        lingdong_score = self.LINGDONG_81[(int(clean_number[-4:]) % 80) or 80]['score']
+        
+        return self._final_score(magnetic_average, lingdong_score, compatibility_score)
+    
+    def score_batch(self, numbers) -> Dict:
+        """
+        以 NumPy 向量化批次評分多個 10 位數電話號碼
+        各欄位數值與逐一呼叫 comprehensive_analysis 的結果完全一致
+        
+        Args:
+            numbers: 電話號碼序列（字串或整數）、一維整數陣列，或 N x 10 的數字矩陣
+            
+        Returns:
+            欄位式結果字典，每個值皆為長度 N 的陣列:
+            magnetic_total, magnetic_average, lingdong_number, lingdong_score,
+            five_elements_score, final_score, recommendation
+        """
+        import numpy as np
         
-        final_score = (
+        digits = self._digit_matrix(numbers)
+        
+        # 磁場: 以 100 格索引查每個相鄰數字組合的分數
+        pair_scores = np.array(self._PAIR_SCORES)
+        magnetic_total = pair_scores[digits[:, :-1] * 10 + digits[:, 1:]].sum(axis=1)
+        magnetic_average = magnetic_total / (digits.shape[1] - 1)
+        
+        # 靈動數: 末四碼 % 80，餘 0 視為 80
+        last_four = digits[:, -4:] @ np.array([1000, 100, 10, 1])
+        lingdong_number = last_four % 80
+        lingdong_number[lingdong_number == 0] = 80
+        lingdong_scores = np.zeros(82, dtype=np.int64)
+        for number, info in self.LINGDONG_81.items():
+            lingdong_scores[number] = info['score']
+        lingdong_score = lingdong_scores[lingdong_number]
+        
+        # 五行: 每個數字依與本命五行的關係計分後加總
+        element_scores = np.array(self._element_scores)
+        five_elements_score = element_scores[digits].sum(axis=1)
+        
+        # 與 comprehensive_analysis 相同的運算順序，確保浮點數結果一致
+        magnetic_normalized = (magnetic_average + 10) / 20 * 100
+        lingdong_normalized = (lingdong_score + 10) / 20 * 100
+        elements_normalized = np.clip(five_elements_score, 0, 100)
+        raw_score = (
             magnetic_normalized * 0.4 +
             lingdong_normalized * 0.3 +
             elements_normalized * 0.3
         )
         
-        # 生成推薦等級
-        if final_score >= 80:
-            recommendation = '★★★★★ 極力推薦'
-        elif final_score >= 70:
-            recommendation = '★★★★☆ 非常適合'
-        elif final_score >= 60:
-            recommendation = '★★★☆☆ 適合'
-        elif final_score >= 50:
-            recommendation = '★★☆☆☆ 普通'
-        else:
-            recommendation = '★☆☆☆☆ 不推薦'
+        # np.round 與內建 round 的進位方式不同，改對相異分數逐一以 round 處理
+        # 推薦等級同樣依未四捨五入的分數決定
+        unique_scores, inverse = np.unique(raw_score, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        rounded = np.array([round(score, 2) for score in unique_scores.tolist()])
+        levels = np.array([self._recommendation_level(score) for score in unique_scores.tolist()], dtype=object)
+        final_score = rounded[inverse]
+        recommendation = levels[inverse]
         
         return {
-            'phone_number': phone_number,
-            'birthdate': self.birthdate,
-            'magnetic_fields': magnetic_analysis,
-            'lingdong_81': lingdong_analysis,
-            'five_elements': five_elements_analysis,
-            'final_score': round(final_score, 2),
+            'magnetic_total': magnetic_total,
+            'magnetic_average': magnetic_average,
+            'lingdong_number': lingdong_number,
+            'lingdong_score': lingdong_score,
+            'five_elements_score': five_elements_score,
+            'final_score': final_score,
             'recommendation': recommendation
         }
     
@@ -399,97 +822,147 @@ class PhoneNumerology:
         Returns:
             格式化的報告文字
         """
-        analysis = self.comprehensive_analysis(phone_number)
+        return self.render_report(self.comprehensive_analysis(phone_number))
+    
+    def render_report(self, analysis: Mapping) -> str:
+        """
+        將已完成的綜合分析結果轉為報告文字，不重新分析
         
-        report = f"""
-{'='*60}
-電話號碼命理分析報告
-{'='*60}
-
-📱 號碼: {analysis['phone_number']}
-🎂 出生日期: {analysis['birthdate']}
-
-{'─'*60}
-【八大數字磁場分析】
-{'─'*60}
-"""
+        Args:
+            analysis: comprehensive_analysis 的回傳結果
+            
+        Returns:
+            格式化的報告文字
+        """
+        buffer = io.StringIO()
+        self.write_report(analysis, buffer)
+        return buffer.getvalue()
+    
+    def write_report(self, analysis: Mapping, stream) -> None:
+        """
+        將已完成的綜合分析結果以報告範本寫入串流
+        
+        Args:
+            analysis: comprehensive_analysis 的回傳結果
+            stream: 具有 write 方法的文字串流（檔案、StringIO 等）
+        """
+        write = stream.write
+        magnetic = analysis['magnetic_fields']
+        lingdong = analysis['lingdong_81']
+        five_elements = analysis['five_elements']
+        
+        write(self._REPORT_HEADER.format(
+            phone_number=analysis['phone_number'],
+            birthdate=analysis['birthdate']
+        ))
         
         # 磁場分析
-        field_counts = analysis['magnetic_fields']['field_counts']
+        field_counts = magnetic['field_counts']
         if field_counts:
             for field_name, count in sorted(field_counts.items(), key=lambda x: -x[1]):
                 field_info = self.MAGNETIC_FIELDS[field_name]
-                report += f"  • {field_name} ({field_info['type']}): 出現 {count} 次\n"
-                report += f"    意義: {field_info['meaning']}\n"
+                write(self._REPORT_FIELD.format(
+                    field_name=field_name,
+                    type=field_info['type'],
+                    count=count,
+                    meaning=field_info['meaning']
+                ))
         else:
-            report += "  無特殊磁場組合\n"
-        
-        report += f"\n  磁場評分: {analysis['magnetic_fields']['total_score']:.1f}\n"
+            write(self._REPORT_NO_FIELD)
         
         # 靈動數分析
-        report += f"""
-{'─'*60}
-【八十一靈動數分析】
-{'─'*60}
-  末四碼: {analysis['lingdong_81']['last_digits']}
-  靈動數: {analysis['lingdong_81']['lingdong_number']}
-  吉凶: {analysis['lingdong_81']['type']}
-  意義: {analysis['lingdong_81']['meaning']}
-  評分: {analysis['lingdong_81']['score']}
-"""
+        write(self._REPORT_LINGDONG.format(
+            total_score=magnetic['total_score'],
+            last_digits=lingdong['last_digits'],
+            lingdong_number=lingdong['lingdong_number'],
+            type=lingdong['type'],
+            meaning=lingdong['meaning'],
+            score=lingdong['score']
+        ))
         
         # 五行分析
-        report += f"""
-{'─'*60}
-【五行相容性分析】
-{'─'*60}
-  出生年份: {analysis['five_elements']['birth_year']} 年
-  本命五行: {analysis['five_elements']['birth_element']}
-  
-  號碼五行分布:
-"""
-        for elem_info in analysis['five_elements']['element_analysis']:
-            report += f"    {elem_info['element']}: {elem_info['count']} 個 ({elem_info['relation']}) - 得分: {elem_info['score']}\n"
-        
-        report += f"\n  五行相容評分: {analysis['five_elements']['compatibility_score']}\n"
+        write(self._REPORT_FIVE_ELEMENTS.format(
+            birth_year=five_elements['birth_year'],
+            birth_element=five_elements['birth_element']
+        ))
+        for elem_info in five_elements['element_analysis']:
+            write(self._REPORT_ELEMENT.format(
+                element=elem_info['element'],
+                count=elem_info['count'],
+                relation=elem_info['relation'],
+                score=elem_info['score']
+            ))
         
         # 綜合評分
-        report += f"""
-{'='*60}
-【綜合評分】
-{'='*60}
-  總分: {analysis['final_score']}/100
-  推薦度: {analysis['recommendation']}
-{'='*60}
-"""
-        
-        return report
+        write(self._REPORT_SUMMARY.format(
+            compatibility_score=five_elements['compatibility_score'],
+            final_score=analysis['final_score'],
+            recommendation=analysis['recommendation']
+        ))
     
     def recommend_numbers(self, count=10):
         """
         根據出生日期推薦適合的電話號碼組合
         真正基於個人出生日期產生個性化推薦
         
+        推薦結果只取決於 recommendation_key，相同鍵值的出生日期共用同一份快取
+        
         Args:
             count: 推薦的組合數量
             
         Returns:
             推薦的數字組合列表
         """
-        # 計算五行
-        heavenly_stems = ['庚', '辛', '壬', '癸', '甲', '乙', '丙', '丁', '戊', '己']
-        elements_map = {
-            '庚': '金', '辛': '金',
-            '壬': '水', '癸': '水',
-            '甲': '木', '乙': '木',
-            '丙': '火', '丁': '火',
-            '戊': '土', '己': '土'
-        }
+        key = self.recommendation_key()
+        templates = self._RECOMMENDATION_TEMPLATES.get(key)
+        if templates is None:
+            templates = self.recommendation_templates(key)
+            self._RECOMMENDATION_TEMPLATES[key] = templates
         
-        year_index = (self.birth_year - 4) % 10
-        birth_stem = heavenly_stems[year_index]
-        birth_element = elements_map[birth_stem]
+        return [
+            {
+                'pattern': pattern,
+                'type': kind,
+                'reason': reason.format(year=self.birth_year, month=self.birth_month, day=self.birth_day),
+                'score': score
+            }
+            for pattern, kind, reason, score in templates[:count]
+        ]
+    
+    def recommendation_key(self) -> tuple:
+        """
+        推薦結果的快取鍵值
+        
+        Returns:
+            (本命五行, 出生年數字和, (月 + 日) % 10, 月日前兩個非零數字)
+        """
+        birth_digits = [str(self.birth_month // 10), str(self.birth_month % 10),
+                       str(self.birth_day // 10), str(self.birth_day % 10)]
+        birth_digits = [d for d in birth_digits if d != '0']  # 移除0
         
+        return (
+            self.birth_element,
+            sum(int(d) for d in str(self.birth_year)),
+            (self.birth_month + self.birth_day) % 10,
+            ''.join(birth_digits[:2])
+        )
+    
+    @classmethod
+    def recommendation_templates(cls, key: tuple) -> tuple:
+        """
+        依快取鍵值產生完整的推薦列表（不限數量）
+        
+        推薦原因中的出生年月日以 {year}、{month}、{day} 保留，
+        由 recommend_numbers 代入
+        
+        Args:
+            key: recommendation_key 的回傳值
+            
+        Returns:
+            (組合, 類型, 推薦原因樣板, 分數) 的 tuple，依推薦順序排列
+        """
+        birth_element, year_sum, personal_digit, birth_digits = key
+        birth_digits = list(birth_digits)
         # 五行對應的吉利數字 (優先順序排序)
         element_lucky_digits = {
             '金': ['7', '8', '9', '0', '4', '5'],  # 金生水,土生金,本命金
@@ -502,15 +975,15 @@ class PhoneNumerology:
         lucky_digits = element_lucky_digits.get(birth_element, ['1', '3', '5', '7', '9'])
         
         # 根據出生月日計算個人幸運數字
-        personal_lucky_digit = str((self.birth_month + self.birth_day) % 10)
+        personal_lucky_digit = str(personal_digit)
         
         # 根據出生年計算次要幸運數字
-        secondary_lucky_digit = str(sum(int(d) for d in str(self.birth_year)) % 10)
+        secondary_lucky_digit = str(year_sum % 10)
         
         # 吉星磁場組合 (按五行相容性排序)
         lucky_pairs = []
         for field_name in ['天醫', '生氣', '延年']:  # 只使用吉星
-            field_info = self.MAGNETIC_FIELDS[field_name]
+            field_info = cls.MAGNETIC_FIELDS[field_name]
             lucky_pairs.extend(field_info['pairs'])
         
         # 根據五行篩選最適合的磁場組合
@@ -537,12 +1010,12 @@ class PhoneNumerology:
             if combo not in seen and len(combo) == 2:
                 seen.add(combo)
                 # 檢查是否為吉星磁場
-                field_name = self._get_field_name(combo)
+                field_name = cls._get_field_name(combo)
                 if field_name in ['天醫', '生氣', '延年']:
                     reason = f'個人專屬組合 + {field_name}磁場'
                     score = 95
                 else:
-                    reason = f'個人專屬組合 (基於{self.birth_month}月{self.birth_day}日)'
+                    reason = f'個人專屬組合 (基於{{month}}月{{day}}日)'
                     score = 88
                 
                 recommendations.append({
@@ -556,7 +1029,7 @@ class PhoneNumerology:
         for pair in element_compatible_pairs[:8]:
             if pair not in seen:
                 seen.add(pair)
-                field_name = self._get_field_name(pair)
+                field_name = cls._get_field_name(pair)
                 recommendations.append({
                     'pattern': pair,
                     'type': '吉星磁場',
@@ -570,7 +1043,7 @@ class PhoneNumerology:
                 combo = lucky_digits[i] + lucky_digits[j]
                 if combo not in seen:
                     seen.add(combo)
-                    field_name = self._get_field_name(combo)
+                    field_name = cls._get_field_name(combo)
                     if field_name in ['天醫', '生氣', '延年']:
                         reason = f'五行相生 + {field_name}磁場'
                         score = 90
@@ -587,7 +1060,6 @@ class PhoneNumerology:
         
         # 策略4: 基於出生年的靈動數組合
         # 使用出生年的數字來計算對應的靈動數
-        year_sum = sum(int(d) for d in str(self.birth_year))
         target_lingdong = year_sum % 81
         if target_lingdong == 0:
             target_lingdong = 81
@@ -607,15 +1079,11 @@ class PhoneNumerology:
                 recommendations.append({
                     'pattern': pattern[:2],
                     'type': '靈動大吉',
-                    'reason': f'對應靈動數{closest_lingdong} (基於{self.birth_year}年)',
+                    'reason': f'對應靈動數{closest_lingdong} (基於{{year}}年)',
                     'score': 87
                 })
         
         # 策略5: 生日數字組合
-        birth_digits = [str(self.birth_month // 10), str(self.birth_month % 10),
-                       str(self.birth_day // 10), str(self.birth_day % 10)]
-        birth_digits = [d for d in birth_digits if d != '0']  # 移除0
-        
         if len(birth_digits) >= 2:
             for i in range(min(2, len(birth_digits))):
                 for j in range(min(2, len(birth_digits))):
@@ -623,12 +1091,12 @@ class PhoneNumerology:
                         combo = birth_digits[i] + birth_digits[j]
                         if combo not in seen:
                             seen.add(combo)
-                            field_name = self._get_field_name(combo)
+                            field_name = cls._get_field_name(combo)
                             if field_name in ['天醫', '生氣', '延年']:
                                 reason = f'生日數字 + {field_name}磁場'
                                 score = 89
                             else:
-                                reason = f'生日數字組合 ({self.birth_month}/{self.birth_day})'
+                                reason = f'生日數字組合 ({{month}}/{{day}})'
                                 score = 82
                             
                             recommendations.append({
@@ -641,27 +1109,193 @@ class PhoneNumerology:
         # 按分數排序並返回指定數量
         recommendations.sort(key=lambda x: x['score'], reverse=True)
         
-        # 確保返回的數量足夠,如果不夠則補充其他吉星組合
-        if len(recommendations) < count:
-            for pair in lucky_pairs:
-                if pair not in seen and len(recommendations) < count:
-                    seen.add(pair)
-                    field_name = self._get_field_name(pair)
-                    recommendations.append({
-                        'pattern': pair,
-                        'type': '吉星磁場',
-                        'reason': f'{field_name}磁場',
-                        'score': 85
-                    })
+        # 補充其他吉星組合（取前 count 個即等同原本依數量補足的結果）
+        for pair in lucky_pairs:
+            if pair not in seen:
+                seen.add(pair)
+                field_name = cls._get_field_name(pair)
+                recommendations.append({
+                    'pattern': pair,
+                    'type': '吉星磁場',
+                    'reason': f'{field_name}磁場',
+                    'score': 85
+                })
         
-        return recommendations[:count]
+        return tuple(
+            (r['pattern'], r['type'], r['reason'], r['score'])
+            for r in recommendations
+        )
     
-    def _get_field_name(self, pair):
+    @staticmethod
+    def _final_score(magnetic_average: float, lingdong_score: int, compatibility_score: int) -> float:
+        """
+        計算綜合評分（未四捨五入）
+        40% 磁場分析, 30% 靈動數, 30% 五行相容性
+        """
+        magnetic_normalized = (magnetic_average + 10) / 20 * 100  # 正規化到0-100
+        lingdong_normalized = (lingdong_score + 10) / 20 * 100
+        elements_normalized = min(100, max(0, compatibility_score))
+        
+        return (
+            magnetic_normalized * 0.4 +
+            lingdong_normalized * 0.3 +
+            elements_normalized * 0.3
+        )
+    
+    @staticmethod
+    def _recommendation_level(final_score: float) -> str:
+        """依綜合評分（未四捨五入）決定推薦等級"""
+        if final_score >= 80:
+            return '★★★★★ 極力推薦'
+        elif final_score >= 70:
+            return '★★★★☆ 非常適合'
+        elif final_score >= 60:
+            return '★★★☆☆ 適合'
+        elif final_score >= 50:
+            return '★★☆☆☆ 普通'
+        else:
+            return '★☆☆☆☆ 不推薦'
+    
+    @staticmethod
+    def _digit_matrix(numbers):
+        """將批次輸入轉換為 N x 10 的數字矩陣"""
+        import numpy as np
+        
+        if isinstance(numbers, np.ndarray) and numbers.ndim == 2:
+            if numbers.shape[1] != 10:
+                raise ValueError("數字矩陣必須為 N x 10")
+            digits = numbers.astype(np.int64)
+            if digits.size and (digits.min() < 0 or digits.max() > 9):
+                raise ValueError("數字矩陣的值必須介於 0 到 9")
+            return digits
+        
+        if isinstance(numbers, np.ndarray) and numbers.dtype.kind in 'iu':
+            values = numbers.astype(np.int64).reshape(-1)
+            if values.size and (values.min() < 0 or values.max() >= 10 ** 10):
+                raise ValueError("電話號碼必須為 10 位數字")
+            powers = 10 ** np.arange(9, -1, -1, dtype=np.int64)
+            return values[:, None] // powers % 10
+        
+        cleaned = []
+        for number in numbers:
+            if isinstance(number, (int, np.integer)):
+                if not 0 <= number < 10 ** 10:
+                    raise ValueError(f"電話號碼必須為 10 位數字: {number}")
+                clean_number = str(int(number)).zfill(10)
+            else:
+                clean_number = normalize_phone_number(str(number))
+            if len(clean_number) != 10 or not clean_number.isascii():
+                raise ValueError(f"電話號碼必須為 10 位數字: {number}")
+            cleaned.append(clean_number)
+        
+        buffer = ''.join(cleaned).encode('ascii')
+        return (np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 10) - ord('0')).astype(np.int64)
+    
+    def _element_relation(self, element: str) -> str:
+        """判斷號碼數字五行與本命五行的關係"""
+        return self._relation(self.birth_element, element)
+    
+    @classmethod
+    def _relation(cls, birth_element: str, element: str) -> str:
+        """判斷五行 element 與本命五行 birth_element 的關係"""
+        relations = cls.ELEMENT_RELATIONS[birth_element]
+        if element == birth_element:
+            return '同'
+        if element == relations['生']:
+            return '我生'
+        if element == relations['被生']:
+            return '生我'
+        if element == relations['剋']:
+            return '我剋'
+        return '剋我'
+    
+    def _digit_element_scores(self) -> List[int]:
+        """數字 0-9 各自對本命五行的相容性得分"""
+        return [
+            self.ELEMENT_RELATION_SCORES[self._element_relation(self.DIGIT_ELEMENTS[str(digit)])]
+            for digit in range(10)
+        ]
+    
+    @classmethod
+    def _get_field_name(cls, pair):
         """獲取數字對應的磁場名稱"""
-        for field_name, field_info in self.MAGNETIC_FIELDS.items():
-            if pair in field_info['pairs']:
-                return field_name
-        return '未知'
+        if len(pair) != 2 or not pair.isdecimal():
+            return '未知'
+        entry = cls._PAIR_TABLE[int(pair)]
+        return entry[0] if entry is not None else '未知'
+
+
+class AnalysisCache:
+    """
+    跨使用者共用的號碼分析快取
+    
+    磁場與靈動數分析與出生日期無關，每個號碼只計算一次；
+    五行相容性只取決於本命五行，每個號碼對每種本命五行（共 5 類）只計算一次。
+    分析結果物件為唯讀，可安全地由所有使用者共用。
+    """
+    
+    def __init__(self, max_numbers: int = 100000):
+        """
+        Args:
+            max_numbers: 最多快取的號碼數量，超過時淘汰最久未使用者
+        """
+        if max_numbers < 1:
+            raise ValueError("max_numbers 必須大於 0")
+        
+        self.max_numbers = max_numbers
+        self.hits = 0
+        self.misses = 0
+        # 號碼 -> (磁場分析, 靈動數分析, {本命五行: 五行分析})
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def components(self, analyzer: PhoneNumerology, clean_number: str) -> Tuple[
+            MagneticFieldAnalysis, LingdongAnalysis, FiveElementsAnalysis]:
+        """
+        取得號碼的各項分析結果，未快取的部分以 analyzer 計算後存入
+        
+        Args:
+            analyzer: 提供出生日期的分析器
+            clean_number: 已正規化的電話號碼 (normalize_phone_number 的回傳值)
+            
+        Returns:
+            (磁場分析, 靈動數分析, 五行相容性分析)
+        """
+        with self._lock:
+            entry = self._entries.get(clean_number)
+            if entry is not None:
+                self._entries.move_to_end(clean_number)
+                five_elements = entry[2].get(analyzer.birth_element)
+                if five_elements is not None:
+                    self.hits += 1
+                    return entry[0], entry[1], five_elements.with_birth_year(analyzer.birth_year)
+            self.misses += 1
+        
+        # 鎖外計算，並行的重複計算結果相同
+        if entry is None:
+            entry = (
+                analyzer._magnetic_fields(clean_number),
+                analyzer._lingdong_81(clean_number),
+                {}
+            )
+        five_elements = analyzer._five_elements(clean_number)
+        
+        with self._lock:
+            entry = self._entries.setdefault(clean_number, entry)
+            self._entries.move_to_end(clean_number)
+            five_elements = entry[2].setdefault(analyzer.birth_element, five_elements)
+            while len(self._entries) > self.max_numbers:
+                self._entries.popitem(last=False)
+        
+        return entry[0], entry[1], five_elements.with_birth_year(analyzer.birth_year)
+    
+    def clear(self):
+        """清除所有快取（hits、misses 為累計次數，作為 Prometheus 計數器輸出，不歸零）"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 def main():
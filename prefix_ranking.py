@@ -0,0 +1,162 @@
+"""
+號碼區段窮舉排名
+針對指定的 4 碼前綴，窮舉其後 6 碼的全部 1,000,000 個號碼，
+依綜合評分保留前 K 名，並將工作分散到多個行程執行
+"""
+
+from phone_numerology import PhoneNumerology
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import heapq
+import re
+import sys
+
+
+def _rank_shard(birthdate: str, prefix: str, fifth_digit: int, top_k: int) -> list:
+    """
+    窮舉單一分片（前綴 + 第 5 碼固定，共 100,000 個號碼）
+
+    評分規則與 comprehensive_analysis 相同：磁場總分、靈動數與五行得分
+    皆由逐位累加取得，再以 PhoneNumerology._final_score 合成綜合評分。
+
+    Returns:
+        分片內前 K 名的 (綜合評分, -號碼整數) 列表
+    """
+    analyzer = PhoneNumerology(birthdate)
+    pair_scores = analyzer._PAIR_SCORES
+    element_scores = analyzer._element_scores
+
+    # 末四碼（第 7-10 碼）各自的磁場、五行與靈動數得分
+    suffix_magnetic = []
+    suffix_elements = []
+    suffix_lingdong = []
+    for value in range(10000):
+        d6, d7, d8, d9 = value // 1000, value // 100 % 10, value // 10 % 10, value % 10
+        suffix_magnetic.append(pair_scores[d6 * 10 + d7] + pair_scores[d7 * 10 + d8] + pair_scores[d8 * 10 + d9])
+        suffix_elements.append(element_scores[d6] + element_scores[d7] + element_scores[d8] + element_scores[d9])
+        suffix_lingdong.append(analyzer.LINGDONG_81[(value % 80) or 80]['score'])
+
+    # 前綴 + 第 5 碼的累計得分
+    digits = [int(d) for d in prefix] + [fifth_digit]
+    head_magnetic = sum(pair_scores[a * 10 + b] for a, b in zip(digits, digits[1:]))
+    head_elements = sum(element_scores[d] for d in digits)
+
+    # 相同 (磁場總分, 靈動數得分, 五行得分) 的綜合評分只計算一次
+    score_cache = {}
+    heap = []
+    threshold = float('-inf')
+    base = int(prefix + str(fifth_digit)) * 100000
+
+    for d5 in range(10):
+        magnetic_d5 = head_magnetic + pair_scores[fifth_digit * 10 + d5]
+        elements_d5 = head_elements + element_scores[d5]
+        link_row = pair_scores[d5 * 10:d5 * 10 + 10]
+        number = base + d5 * 10000
+
+        for value in range(10000):
+            magnetic_total = magnetic_d5 + link_row[value // 1000] + suffix_magnetic[value]
+            key = (magnetic_total, suffix_lingdong[value], elements_d5 + suffix_elements[value])
+            score = score_cache.get(key)
+            if score is None:
+                score = round(PhoneNumerology._final_score(magnetic_total / 9, key[1], key[2]), 2)
+                score_cache[key] = score
+
+            # 號碼遞增窮舉，同分時先出現（較小）的號碼優先，故同分不替換
+            if score <= threshold:
+                continue
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, -(number + value)))
+                if len(heap) == top_k:
+                    threshold = heap[0][0]
+            else:
+                heapq.heapreplace(heap, (score, -(number + value)))
+                threshold = heap[0][0]
+
+    return heap
+
+
+def rank_prefix_blocks(birthdate: str, prefixes: list, top_k: int = 20, workers: int = None) -> dict:
+    """
+    窮舉每個 4 碼前綴的全部號碼並依綜合評分排名
+
+    Args:
+        birthdate: 出生日期 (格式: YYYY/MM/DD)
+        prefixes: 4 碼前綴列表 (例: ['0978', '0912'])
+        top_k: 每個前綴保留的名次數量
+        workers: 行程數量 (預設為 CPU 核心數)
+
+    Returns:
+        {前綴: 依綜合評分排序的 comprehensive_analysis 結果列表}
+    """
+    for prefix in prefixes:
+        if not re.fullmatch(r'\d{4}', prefix):
+            raise ValueError(f"前綴必須為 4 位數字: {prefix}")
+    if top_k < 1:
+        raise ValueError("top_k 必須大於 0")
+
+    analyzer = PhoneNumerology(birthdate)
+
+    # 每個前綴依第 5 碼切成 10 個分片
+    shards = [(prefix, fifth_digit) for prefix in prefixes for fifth_digit in range(10)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_rank_shard, birthdate, prefix, fifth_digit, top_k)
+            for prefix, fifth_digit in shards
+        ]
+        shard_results = [future.result() for future in futures]
+
+    rankings = {}
+    for prefix in prefixes:
+        merged = [
+            item
+            for (shard_prefix, _), heap in zip(shards, shard_results) if shard_prefix == prefix
+            for item in heap
+        ]
+        best = heapq.nlargest(top_k, merged)
+
+        # 只對最終名次產生完整分析
+        ranked = []
+        for _, negative_number in best:
+            clean = str(-negative_number).zfill(10)
+            ranked.append(analyzer.comprehensive_analysis(f"{clean[:4]}-{clean[4:7]}-{clean[7:]}"))
+        rankings[prefix] = ranked
+
+    return rankings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='窮舉指定前綴的全部號碼並依綜合評分排名',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 找出 0978 開頭號碼中最適合的前 20 名
+  python prefix_ranking.py --birthdate 1990/09/25 --prefix 0978
+
+  # 同時排名多個前綴,使用 8 個行程
+  python prefix_ranking.py --birthdate 1990/09/25 --prefix 0978 --prefix 0912 --workers 8
+        '''
+    )
+
+    parser.add_argument('--birthdate', '-b', type=str, required=True, help='出生日期 (格式: YYYY/MM/DD)')
+    parser.add_argument('--prefix', '-p', action='append', required=True, help='4 碼前綴,可重複指定')
+    parser.add_argument('--top', '-k', type=int, default=20, help='每個前綴顯示的名次數量 (預設: 20)')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='行程數量 (預設: CPU 核心數)')
+
+    args = parser.parse_args()
+
+    try:
+        rankings = rank_prefix_blocks(args.birthdate, args.prefix, top_k=args.top, workers=args.workers)
+    except ValueError as e:
+        print(f"❌ 錯誤: {e}")
+        sys.exit(1)
+
+    for prefix, results in rankings.items():
+        print("=" * 70)
+        print(f"前綴 {prefix} 綜合評分前 {len(results)} 名 (共窮舉 1,000,000 個號碼)")
+        print("=" * 70)
+        print(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}")
+        print("-" * 70)
+        for i, result in enumerate(results, 1):
+            print(f"{i:<6} {result['phone_number']:<15} {result['final_score']:<12.2f} {result['recommendation']}")
+        print()
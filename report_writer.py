@@ -0,0 +1,180 @@
+"""
+批次報告輸出
+以背景執行緒將大量分析報告寫入目錄（可分片）、單一 zip 壓縮檔或 JSONL 檔，
+分析與寫檔同時進行，避免逐一開關檔案拖慢主流程
+"""
+
+from typing import Optional
+import json
+import logging
+import os
+import queue
+import threading
+import zipfile
+
+
+FORMATS = ('files', 'zip', 'jsonl')
+
+logger = logging.getLogger(__name__)
+
+
+class DirectorySink:
+    """每份報告一個檔案，可依數量分到子目錄"""
+
+    def __init__(self, path: str, shard_size: Optional[int] = None):
+        """
+        Args:
+            path: 輸出目錄
+            shard_size: 每個子目錄的檔案數量 (None 表示全部放在同一目錄)
+        """
+        self.path = path
+        self.shard_size = shard_size
+        self._count = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name: str, content: str, fields: dict):
+        directory = self.path
+        if self.shard_size:
+            directory = os.path.join(self.path, f"{self._count // self.shard_size:04d}")
+            if self._count % self.shard_size == 0:
+                os.makedirs(directory, exist_ok=True)
+        self._count += 1
+
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def close(self):
+        pass
+
+
+class ZipSink:
+    """所有報告寫入單一 zip 壓縮檔"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name: str, content: str, fields: dict):
+        self._zip.writestr(name, content)
+
+    def close(self):
+        self._zip.close()
+
+
+class JsonlSink:
+    """所有報告寫入單一 JSONL 檔，每行一份報告與其欄位"""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', buffering=buffer_size)
+
+    def write(self, name: str, content: str, fields: dict):
+        record = {'name': name, **fields, 'report': content}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(output_format: str, path: str, shard_size: Optional[int] = None):
+    """
+    依輸出格式建立寫入目標
+
+    Args:
+        output_format: files (目錄)、zip 或 jsonl
+        path: 目錄路徑 (files) 或檔案路徑 (zip / jsonl)
+        shard_size: files 格式每個子目錄的檔案數量
+    """
+    if output_format == 'files':
+        return DirectorySink(path, shard_size)
+    if output_format == 'zip':
+        return ZipSink(path)
+    if output_format == 'jsonl':
+        return JsonlSink(path)
+    raise ValueError(f"未知的輸出格式: {output_format} (可用: {', '.join(FORMATS)})")
+
+
+class ReportWriter:
+    """
+    背景執行緒報告寫入器
+
+    write() 只將報告放入有上限的佇列，由背景執行緒依序寫入；
+    同名報告只寫入第一份（各種輸出格式相同），written 為實際寫入的數量；
+    寫入發生錯誤時，於下一次 write() 或 close() 拋出
+    """
+
+    _DONE = object()
+
+    def __init__(self, sink, max_queue: int = 1024):
+        """
+        Args:
+            sink: DirectorySink、ZipSink 或 JsonlSink
+            max_queue: 佇列中最多等待寫入的報告數量
+        """
+        self.sink = sink
+        self.count = 0
+        self.written = 0
+        self._names = set()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='report-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                break
+            if self._error is None and item[0] not in self._names:
+                try:
+                    self.sink.write(*item)
+                except Exception as e:
+                    self._error = e
+                else:
+                    self._names.add(item[0])
+                    self.written += 1
+
+    def write(self, name: str, content: str, **fields):
+        """
+        排入一份報告
+
+        Args:
+            name: 檔案名稱
+            content: 報告內容
+            **fields: 額外欄位 (僅 JSONL 格式寫入，例如 rank、final_score)
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((name, content, fields))
+        self.count += 1
+
+    def close(self) -> int:
+        """
+        等待所有報告寫入完成並關閉寫入目標
+
+        Returns:
+            實際寫入的報告數量（不含略過的同名報告）
+        """
+        if self._thread.is_alive():
+            self._queue.put(self._DONE)
+            self._thread.join()
+        self.sink.close()
+        if self._error is not None:
+            raise self._error
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        # 區塊內已有例外時仍關閉寫入目標，原本的例外繼續拋出；
+        # 寫入或關閉的錯誤記錄到日誌並附註在原本的例外上，不直接丟棄
+        try:
+            self.close()
+        except Exception as e:
+            logger.error("報告寫入失敗 (已寫入 %d 份): %r", self.written, e, exc_info=e)
+            if exc_value is not None and hasattr(exc_value, 'add_note'):
+                exc_value.add_note(f"報告寫入也發生錯誤: {e!r}")
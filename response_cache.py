@@ -0,0 +1,97 @@
+"""
+API 回應快取
+以正規化後的輸入為鍵，保存已序列化的回應內容與 ETag，
+相同請求不需重新分析、產生報告與序列化 JSON
+"""
+
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+import hashlib
+import threading
+import time
+
+
+class CachedResponse(NamedTuple):
+    """已序列化的回應"""
+    body: bytes
+    etag: str          # 強 ETag 的值（不含引號）
+    expires: float     # time.monotonic() 到期時間
+
+
+def make_etag(body: bytes) -> str:
+    """以回應內容的雜湊值作為強 ETag（內容相同則 ETag 相同）"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class ResponseCache:
+    """
+    有容量上限與存活時間的 LRU 回應快取（執行緒安全）
+
+    超過容量時淘汰最久未使用者；超過存活時間的項目在下次讀取時移除
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600):
+        """
+        Args:
+            max_entries: 最多快取的回應數量
+            ttl: 每個回應的存活秒數
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries 必須大於 0")
+        if ttl <= 0:
+            raise ValueError("ttl 必須大於 0")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """取得未過期的回應，沒有時回傳 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, body: bytes) -> CachedResponse:
+        """存入回應內容並回傳含 ETag 的快取項目"""
+        entry = CachedResponse(body, make_etag(body), time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> dict:
+        """快取統計"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def clear(self):
+        """清除所有快取（統計次數為累計值，作為 Prometheus 計數器輸出，不歸零）"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,296 @@
+"""
+批次分析結果的欄位式二進位格式
+每個號碼一列，各欄位（分項評分、靈動數、八大磁場次數、五行數字個數、綜合評分）
+以固定寬度連續存放，可直接以 NumPy memmap 零複製載入，不需重新分析或解析文字報告
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import iter_normalized_file, format_phone_number
+from typing import Dict, Iterable, List, Optional
+import argparse
+import itertools
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+
+# 檔案格式: 8 bytes 魔術字串 + 4 bytes 標頭長度 + JSON 標頭，之後每個欄位依 64 bytes 對齊連續存放
+MAGIC = b'PNCOLS01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+FIELD_NAMES = tuple(PhoneNumerology.MAGNETIC_FIELDS)
+ELEMENT_NAMES = tuple(dict.fromkeys(PhoneNumerology.DIGIT_ELEMENTS.values()))
+RECOMMENDATION_LEVELS = tuple(PhoneNumerology._recommendation_level(score) for score in (80, 70, 60, 50, 0))
+
+# (欄位名稱, NumPy 型別, 每列形狀)
+COLUMNS = (
+    ('phone_number', 'S10', ()),                          # 10 碼 ASCII 數字
+    ('magnetic_total', '<i2', ()),
+    ('magnetic_average', '<f8', ()),
+    ('lingdong_number', 'u1', ()),
+    ('lingdong_score', 'i1', ()),
+    ('five_elements_score', '<i2', ()),
+    ('field_counts', 'u1', (len(FIELD_NAMES),)),          # 依 FIELD_NAMES 順序
+    ('element_counts', 'u1', (len(ELEMENT_NAMES),)),      # 依 ELEMENT_NAMES 順序
+    ('final_score', '<f8', ()),
+    ('recommendation', 'u1', ()),                         # RECOMMENDATION_LEVELS 的索引
+)
+
+# 兩位數 -> 磁場索引、數字 -> 五行索引
+_PAIR_FIELDS = np.array([
+    FIELD_NAMES.index(entry[0]) if entry is not None else len(FIELD_NAMES)
+    for entry in PhoneNumerology._PAIR_TABLE
+])
+_DIGIT_ELEMENTS = np.array([ELEMENT_NAMES.index(PhoneNumerology.DIGIT_ELEMENTS[str(d)]) for d in range(10)])
+
+
+def compute_columns(analyzer: PhoneNumerology, numbers) -> Dict[str, np.ndarray]:
+    """
+    以 score_batch 批次計算一批 10 碼號碼的所有欄位
+
+    Args:
+        analyzer: 分析器
+        numbers: score_batch 接受的任何輸入
+
+    Returns:
+        {欄位名稱: 陣列}，數值與 comprehensive_analysis 的結果一致
+    """
+    digits = PhoneNumerology._digit_matrix(numbers)
+    batch = analyzer.score_batch(digits)
+    rows = len(digits)
+
+    # 每列的磁場 / 五行索引加上列偏移後一次 bincount 計數
+    pair_fields = _PAIR_FIELDS[digits[:, :-1] * 10 + digits[:, 1:]]
+    field_slots = len(FIELD_NAMES) + 1
+    field_counts = np.bincount(
+        (pair_fields + np.arange(rows)[:, None] * field_slots).ravel(), minlength=rows * field_slots
+    ).reshape(rows, field_slots)[:, :len(FIELD_NAMES)]
+
+    element_slots = len(ELEMENT_NAMES)
+    element_counts = np.bincount(
+        (_DIGIT_ELEMENTS[digits] + np.arange(rows)[:, None] * element_slots).ravel(), minlength=rows * element_slots
+    ).reshape(rows, element_slots)
+
+    level_index = {level: i for i, level in enumerate(RECOMMENDATION_LEVELS)}
+    return {
+        'phone_number': np.ascontiguousarray((digits + ord('0')).astype(np.uint8)).view('S10').reshape(rows),
+        'magnetic_total': batch['magnetic_total'],
+        'magnetic_average': batch['magnetic_average'],
+        'lingdong_number': batch['lingdong_number'],
+        'lingdong_score': batch['lingdong_score'],
+        'five_elements_score': batch['five_elements_score'],
+        'field_counts': field_counts,
+        'element_counts': element_counts,
+        'final_score': batch['final_score'],
+        'recommendation': np.array([level_index[level] for level in batch['recommendation']], dtype=np.uint8),
+    }
+
+
+def _data_start(header_size: int) -> int:
+    """欄位資料的起始位置（標頭之後對齊）"""
+    return -(-(len(MAGIC) + 4 + header_size) // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(rows: int) -> List[dict]:
+    """各欄位在檔案中的型別、形狀與相對位置"""
+    layout = []
+    offset = 0
+    for name, dtype, shape in COLUMNS:
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout.append({'name': name, 'dtype': dtype, 'shape': list(shape), 'offset': offset})
+        offset += rows * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+    return layout
+
+
+def export_results(path: str, birthdate: str, numbers: Iterable[str], rows: Optional[int] = None,
+                   chunk_size: int = 100000) -> int:
+    """
+    批次分析號碼並寫入欄位式檔案，記憶體用量只與 chunk_size 有關
+
+    Args:
+        path: 輸出檔案路徑
+        birthdate: 出生日期 (格式: YYYY/MM/DD)
+        numbers: 10 碼號碼
+        rows: 號碼數量 (可選，未提供時先將 numbers 讀入列表)
+        chunk_size: 每批計算的號碼數量
+
+    Returns:
+        寫入的列數
+    """
+    if rows is None:
+        numbers = list(numbers)
+        rows = len(numbers)
+    analyzer = PhoneNumerology(birthdate)
+
+    layout = _layout(rows)
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'birthdate': birthdate,
+        'rows': rows,
+        'field_names': FIELD_NAMES,
+        'element_names': ELEMENT_NAMES,
+        'recommendation_levels': RECOMMENDATION_LEVELS,
+        'columns': layout,
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _data_start(len(header))
+    data_end = data_start + layout[-1]['offset'] + rows * np.dtype(COLUMNS[-1][1]).itemsize
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        f.truncate(max(data_end, data_start))
+
+    if rows:
+        targets = {
+            column['name']: np.memmap(path + '.tmp', dtype=column['dtype'], mode='r+',
+                                      offset=data_start + column['offset'], shape=(rows, *column['shape']))
+            for column in layout
+        }
+        numbers = iter(numbers)
+        written = 0
+        while written < rows:
+            chunk = list(itertools.islice(numbers, min(chunk_size, rows - written)))
+            if not chunk:
+                raise ValueError(f"號碼數量不足: 預期 {rows} 個,實際 {written} 個")
+            for name, values in compute_columns(analyzer, chunk).items():
+                targets[name][written:written + len(chunk)] = values
+            written += len(chunk)
+        for target in targets.values():
+            target.flush()
+        del targets
+
+    os.replace(path + '.tmp', path)
+    return rows
+
+
+def export_file(path: str, birthdate: str, numbers_file: str, chunk_size: int = 100000) -> int:
+    """
+    將每行一個號碼的檔案分析後寫入欄位式檔案（非 10 碼的號碼略過）
+
+    先掃描一次計算號碼數量，再逐批寫入，不需將整個檔案讀入記憶體
+    """
+    rows = sum(1 for number in iter_normalized_file(numbers_file) if len(number) == 10)
+    numbers = (number for number in iter_normalized_file(numbers_file) if len(number) == 10)
+    return export_results(path, birthdate, numbers, rows=rows, chunk_size=chunk_size)
+
+
+class ResultColumns:
+    """載入的欄位式分析結果，欄位可如字典取用"""
+
+    def __init__(self, header: dict, columns: Dict[str, np.ndarray]):
+        self.birthdate = header['birthdate']
+        self.rows = header['rows']
+        self.field_names = tuple(header['field_names'])
+        self.element_names = tuple(header['element_names'])
+        self.recommendation_levels = tuple(header['recommendation_levels'])
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def ranked(self, limit: Optional[int] = None) -> np.ndarray:
+        """依綜合評分由高到低排列的列索引（同分依列順序）"""
+        order = np.lexsort((np.arange(self.rows), -self.columns['final_score']))
+        return order[:limit] if limit is not None else order
+
+    def row(self, index: int) -> dict:
+        """單一號碼的結果（欄位名稱與 comprehensive_analysis 相同）"""
+        columns = self.columns
+        return {
+            'phone_number': columns['phone_number'][index].decode('ascii'),
+            'magnetic_total': int(columns['magnetic_total'][index]),
+            'magnetic_average': float(columns['magnetic_average'][index]),
+            'lingdong_number': int(columns['lingdong_number'][index]),
+            'lingdong_score': int(columns['lingdong_score'][index]),
+            'five_elements_score': int(columns['five_elements_score'][index]),
+            'field_counts': {name: int(count) for name, count in zip(self.field_names, columns['field_counts'][index]) if count},
+            'element_counts': {name: int(count) for name, count in zip(self.element_names, columns['element_counts'][index]) if count},
+            'final_score': float(columns['final_score'][index]),
+            'recommendation': self.recommendation_levels[columns['recommendation'][index]],
+        }
+
+
+def load_results(path: str, mmap: bool = True) -> ResultColumns:
+    """
+    載入欄位式檔案
+
+    Args:
+        path: export_results 產生的檔案
+        mmap: 是否以 memmap 零複製載入 (False 則讀入記憶體)
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"不是欄位式分析結果檔案: {path}")
+        header_size = struct.unpack('<I', prefix[len(MAGIC):])[0]
+        header = json.loads(f.read(header_size).decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"欄位式分析結果版本不符: {path}")
+
+    data_start = _data_start(header_size)
+    columns = {}
+    for column in header['columns']:
+        shape = (header['rows'], *column['shape'])
+        offset = data_start + column['offset']
+        if mmap and header['rows']:
+            columns[column['name']] = np.memmap(path, dtype=column['dtype'], mode='r', offset=offset, shape=shape)
+        else:
+            count = int(np.prod(shape, dtype=np.int64))
+            columns[column['name']] = np.fromfile(path, dtype=column['dtype'], count=count, offset=offset).reshape(shape)
+    return ResultColumns(header, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='匯出或檢視欄位式批次分析結果',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 分析 found_numbers.txt 並匯出
+  python result_columns.py export --birthdate 1990/09/25 --input found_numbers.txt results.pncols
+
+  # 顯示綜合評分前 10 名
+  python result_columns.py show results.pncols --top 10
+
+  # 以 NumPy 載入 (零複製)
+  from result_columns import load_results
+  results = load_results('results.pncols')
+  results['final_score'].mean()
+        '''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='分析號碼檔案並匯出')
+    export_parser.add_argument('path', help='輸出檔案路徑')
+    export_parser.add_argument('--birthdate', '-b', required=True, help='出生日期 (格式: YYYY/MM/DD)')
+    export_parser.add_argument('--input', '-i', default='found_numbers.txt', help='號碼檔案 (預設: found_numbers.txt)')
+
+    show_parser = subparsers.add_parser('show', help='顯示綜合評分排名')
+    show_parser.add_argument('path', help='欄位式檔案路徑')
+    show_parser.add_argument('--top', '-k', type=int, default=10, help='顯示的名次數量 (預設: 10)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            rows = export_file(args.path, args.birthdate, args.input)
+            print(f"✅ 已匯出 {rows:,} 個號碼至 {args.path} ({os.path.getsize(args.path) / 1024:.0f} KB)")
+        else:
+            results = load_results(args.path)
+            print("=" * 70)
+            print(f"出生日期 {results.birthdate} 綜合評分前 {min(args.top, len(results))} 名 (共 {len(results):,} 個號碼)")
+            print("=" * 70)
+            print(f"{'排名':<6} {'號碼':<15} {'綜合評分':<12} {'推薦度':<20}")
+            print("-" * 70)
+            for rank, index in enumerate(results.ranked(args.top), 1):
+                row = results.row(index)
+                print(f"{rank:<6} {format_phone_number(row['phone_number']):<15} {row['final_score']:<12.2f} {row['recommendation']}")
+    except (OSError, ValueError) as e:
+        print(f"❌ 錯誤: {e}")
+        sys.exit(1)
@@ -0,0 +1,234 @@
+"""
+綜合評分分佈與百分位數
+以磁場組合的 10x10 評分轉移矩陣逐位動態規劃（卷積），精確計算指定前綴/後綴下
+所有號碼的磁場、靈動數、五行與綜合評分分佈，不需逐一窮舉即可回答「72 分算高嗎？」
+"""
+
+from phone_numerology import PhoneNumerology
+from pattern_search import WILDCARD, parse_pattern
+from bisect import bisect_left
+from typing import Dict, Optional
+import argparse
+import re
+import sys
+
+import numpy as np
+
+
+class ScoreDistribution:
+    """所有補全號碼的評分分佈（各評分 -> 號碼數量）"""
+
+    def __init__(self, birthdate: str, pattern: str,
+                 magnetic: Dict[int, int],
+                 lingdong: Dict[int, int],
+                 five_elements: Dict[int, int],
+                 final: Dict[float, int]):
+        self.birthdate = birthdate
+        self.pattern = pattern
+        self.magnetic = magnetic            # 磁場總分 -> 數量
+        self.lingdong = lingdong            # 靈動數得分 -> 數量
+        self.five_elements = five_elements  # 五行相容評分 -> 數量
+        self.final = final                  # 綜合評分 -> 數量
+        self.total = sum(final.values())
+
+        # 依綜合評分遞增的累計數量，供百分位數查詢
+        self._scores = sorted(final)
+        self._below = []
+        running = 0
+        for score in self._scores:
+            self._below.append(running)
+            running += final[score]
+
+    @property
+    def mean(self) -> float:
+        """綜合評分平均值"""
+        return sum(score * count for score, count in self.final.items()) / self.total
+
+    def percentile(self, final_score: float) -> float:
+        """
+        綜合評分勝過的號碼比例
+
+        Returns:
+            綜合評分低於 final_score 的號碼所佔百分比 (0-100)
+        """
+        i = bisect_left(self._scores, final_score)
+        below = self._below[i] if i < len(self._scores) else self.total
+        return below / self.total * 100
+
+    def score_at(self, percentile: float) -> float:
+        """
+        百分位數對應的綜合評分
+
+        Returns:
+            最低的綜合評分，使得不高於此分數的號碼至少佔 percentile%
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError("百分位數必須介於 0 到 100")
+        target = percentile / 100 * self.total
+        for score, below in zip(self._scores, self._below):
+            if below + self.final[score] >= target:
+                return score
+        return self._scores[-1]
+
+
+def _shift_add(target: np.ndarray, source: np.ndarray, dt: int, de: int):
+    """target[t + dt, e + de] += source[t, e]（超出範圍的部分捨棄）"""
+    rows, cols = source.shape
+    target[max(dt, 0):rows + min(dt, 0), max(de, 0):cols + min(de, 0)] += \
+        source[max(-dt, 0):rows - max(dt, 0), max(-de, 0):cols - max(de, 0)]
+
+
+def score_distribution(birthdate: str, prefix: str = '09', suffix: str = '') -> ScoreDistribution:
+    """
+    計算固定前綴與後綴的所有 10 碼號碼的評分分佈
+
+    前 6 碼以 (末位數字, 磁場總分, 五行得分) 為狀態，依磁場評分轉移矩陣逐位卷積；
+    末 4 碼（決定靈動數）依 (首位數字, 靈動數得分, 磁場總分, 五行得分) 分組後
+    再與前段分佈卷積，得到 (磁場總分, 靈動數得分, 五行得分) 的聯合分佈。
+
+    Args:
+        birthdate: 出生日期 (格式: YYYY/MM/DD)
+        prefix: 固定的開頭數字 (預設: 09)
+        suffix: 固定的結尾數字 (例: 196)
+
+    Returns:
+        ScoreDistribution
+    """
+    prefix = re.sub(r'[\s-]', '', prefix)
+    suffix = re.sub(r'[\s-]', '', suffix)
+    free = 10 - len(prefix) - len(suffix)
+    if free < 0:
+        raise ValueError("前綴與後綴合計不可超過 10 碼")
+    pattern = prefix + WILDCARD * free + suffix
+    choices = parse_pattern(pattern)
+
+    analyzer = PhoneNumerology(birthdate)
+    pair_scores = analyzer._PAIR_SCORES
+    element_scores = analyzer._element_scores
+
+    # 磁場總分 (9 組) 與五行得分 (10 碼) 的索引範圍
+    t_offset = 9 * min(0, min(pair_scores))
+    t_span = 9 * max(0, max(pair_scores)) - t_offset + 1
+    e_offset = 10 * min(0, min(element_scores))
+    e_span = 10 * max(0, max(element_scores)) - e_offset + 1
+
+    # 前 6 碼: state[d] 為末位數字為 d 時 (磁場總分, 五行得分) 的號碼數量
+    state = {}
+    for d in choices[0]:
+        state[d] = np.zeros((t_span, e_span), dtype=np.int64)
+        state[d][-t_offset, element_scores[d] - e_offset] = 1
+    for p in range(1, 6):
+        next_state = {}
+        for x in choices[p]:
+            counts = np.zeros((t_span, e_span), dtype=np.int64)
+            for d, source in state.items():
+                _shift_add(counts, source, pair_scores[d * 10 + x], element_scores[x])
+            next_state[x] = counts
+        state = next_state
+
+    # 末 4 碼: 依 (首位數字, 靈動數得分) 分組的 (磁場總分, 五行得分) 數量
+    kernels = {}
+    for d6 in choices[6]:
+        for d7 in choices[7]:
+            for d8 in choices[8]:
+                for d9 in choices[9]:
+                    value = d6 * 1000 + d7 * 100 + d8 * 10 + d9
+                    lingdong_score = analyzer.LINGDONG_81[(value % 80) or 80]['score']
+                    magnetic = pair_scores[d6 * 10 + d7] + pair_scores[d7 * 10 + d8] + pair_scores[d8 * 10 + d9]
+                    elements = element_scores[d6] + element_scores[d7] + element_scores[d8] + element_scores[d9]
+                    group = kernels.setdefault((d6, lingdong_score), {})
+                    group[(magnetic, elements)] = group.get((magnetic, elements), 0) + 1
+
+    # 前後段卷積（含第 6、7 碼銜接的磁場組合）
+    joint = {}
+    for d6 in choices[6]:
+        linked = np.zeros((t_span, e_span), dtype=np.int64)
+        for d5, source in state.items():
+            _shift_add(linked, source, pair_scores[d5 * 10 + d6], 0)
+        for (kernel_d6, lingdong_score), group in kernels.items():
+            if kernel_d6 != d6:
+                continue
+            counts = joint.setdefault(lingdong_score, np.zeros((t_span, e_span), dtype=np.int64))
+            for (magnetic, elements), count in group.items():
+                _shift_add(counts, linked * count, magnetic, elements)
+
+    # 邊際分佈與綜合評分分佈
+    magnetic_counts = {}
+    lingdong_counts = {}
+    element_counts = {}
+    final_counts = {}
+    for lingdong_score, counts in sorted(joint.items()):
+        lingdong_counts[lingdong_score] = int(counts.sum())
+        for t_index, e_index in zip(*np.nonzero(counts)):
+            count = int(counts[t_index, e_index])
+            magnetic_total = int(t_index) + t_offset
+            compatibility = int(e_index) + e_offset
+            magnetic_counts[magnetic_total] = magnetic_counts.get(magnetic_total, 0) + count
+            element_counts[compatibility] = element_counts.get(compatibility, 0) + count
+            score = round(PhoneNumerology._final_score(magnetic_total / 9, lingdong_score, compatibility), 2)
+            final_counts[score] = final_counts.get(score, 0) + count
+
+    return ScoreDistribution(
+        birthdate, pattern,
+        dict(sorted(magnetic_counts.items())),
+        lingdong_counts,
+        dict(sorted(element_counts.items())),
+        dict(sorted(final_counts.items()))
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='計算所有號碼的綜合評分分佈與百分位數',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 所有 09 號碼的評分分佈
+  python score_distribution.py --birthdate 1990/09/25
+
+  # 0978 開頭、196 結尾的號碼中,指定號碼的百分位數
+  python score_distribution.py --birthdate 1990/09/25 --prefix 0978 --suffix 196 --phone 0978-759-196
+        '''
+    )
+
+    parser.add_argument('--birthdate', '-b', type=str, required=True, help='出生日期 (格式: YYYY/MM/DD)')
+    parser.add_argument('--prefix', type=str, default='09', help='固定的開頭數字 (預設: 09)')
+    parser.add_argument('--suffix', type=str, default='', help='固定的結尾數字')
+    parser.add_argument('--phone', '-p', type=str, default=None, help='查詢此號碼的百分位數')
+    parser.add_argument('--score', '-s', type=float, default=None, help='查詢此綜合評分的百分位數')
+
+    args = parser.parse_args()
+
+    try:
+        distribution = score_distribution(args.birthdate, prefix=args.prefix, suffix=args.suffix)
+    except ValueError as e:
+        print(f"❌ 錯誤: {e}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"號碼格式 {distribution.pattern} 評分分佈 (共 {distribution.total:,} 個號碼)")
+    print("=" * 70)
+    print(f"平均綜合評分: {distribution.mean:.2f}")
+    for percentile in (50, 90, 99, 99.9):
+        print(f"前 {100 - percentile:g}% 門檻: {distribution.score_at(percentile):.2f} 分")
+    print()
+
+    print(f"{'綜合評分':<12} {'號碼數量':>14} {'比例':>8}")
+    print("-" * 40)
+    bands = {}
+    for score, count in distribution.final.items():
+        band = min(90, int(score // 10) * 10)
+        bands[band] = bands.get(band, 0) + count
+    for band, count in sorted(bands.items(), reverse=True):
+        print(f"{band:>3}-{band + 10:<8} {count:>14,} {count / distribution.total * 100:>7.2f}%")
+
+    queries = []
+    if args.phone:
+        analysis = PhoneNumerology(args.birthdate).comprehensive_analysis(args.phone)
+        queries.append((analysis['phone_number'], analysis['final_score']))
+    if args.score is not None:
+        queries.append(('綜合評分', args.score))
+    if queries:
+        print()
+    for label, score in queries:
+        print(f"🎯 {label} {score:.2f} 分,勝過 {distribution.percentile(score):.2f}% 的號碼")
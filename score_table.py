@@ -0,0 +1,229 @@
+"""
+09 手機號碼全空間評分表
+預先計算所有 09xxxxxxxx 號碼對五種本命五行的綜合評分，量化為 1 byte 寫入二進位檔；
+查詢時以 mmap 直接讀取，多個行程共用同一份頁面快取，不需暖機也不需複製
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import normalize_phone_number
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+
+# 檔案格式: 16 bytes 標頭 + 5 個本命五行區塊，每區塊 10^8 bytes（依 09 後 8 碼索引）
+MAGIC = b'PNSCORE1'
+HEADER = struct.Struct('<8sHH4x')  # 魔術字串, 量化倍率, 區塊數
+SCALE = 2                          # 儲存值 = round(綜合評分 * 2)，解析度 0.5 分
+ELEMENTS = ('木', '火', '土', '金', '水')
+BLOCK_SIZE = 10 ** 8
+
+
+def _element_analyzer(birth_element: str) -> PhoneNumerology:
+    """取得本命五行為 birth_element 的分析器（天干每十年循環一次）"""
+    for year in range(2000, 2010):
+        analyzer = PhoneNumerology(f"{year}/01/01")
+        if analyzer.birth_element == birth_element:
+            return analyzer
+    raise ValueError(f"未知的本命五行: {birth_element}")
+
+
+def quantize(final_score: float) -> int:
+    """將綜合評分量化為 0-200 的整數"""
+    return round(final_score * SCALE)
+
+
+def build_score_table(path: str, rows_per_chunk: int = 100, progress: bool = True, heads=None):
+    """
+    建立全空間評分表（需要 NumPy，輸出約 500 MB）
+
+    評分規則與 comprehensive_analysis 相同：先以 Python 對所有可能的
+    (磁場總分, 靈動數得分, 五行得分) 組合計算量化評分表，再以 NumPy 依號碼的
+    前後兩段組合查表。
+
+    Args:
+        path: 輸出檔案路徑
+        rows_per_chunk: 每次處理的前段數量（每個前段對應 10,000 個號碼）
+        progress: 是否顯示進度
+        heads: 只計算這些前段（第 3-6 碼的數值 0-9999，例: range(7875, 7880)），
+            其餘號碼的位置保留為 0，檔案大小不變但只寫入這些區段（稀疏檔）；預設為全部前段
+    """
+    import numpy as np
+
+    heads = range(10000) if heads is None else sorted(set(heads))
+    if heads and not 0 <= heads[0] <= heads[-1] <= 9999:
+        raise ValueError("前段必須介於 0 到 9999")
+
+    pair_scores = np.array(PhoneNumerology._PAIR_SCORES, dtype=np.int64)
+    lingdong = np.zeros(80, dtype=np.int64)
+    for remainder in range(80):
+        lingdong[remainder] = PhoneNumerology.LINGDONG_81[remainder or 80]['score']
+
+    # 四位數 0000-9999 的各位數字
+    values = np.arange(10000)
+    quad = np.stack([values // 1000, values // 100 % 10, values // 10 % 10, values % 10], axis=1)
+    quad_pairs = (pair_scores[quad[:, 0] * 10 + quad[:, 1]] +
+                  pair_scores[quad[:, 1] * 10 + quad[:, 2]] +
+                  pair_scores[quad[:, 2] * 10 + quad[:, 3]])
+
+    # 前段 = 第 3-6 碼（含開頭 09 的磁場組合），後段 = 第 7-10 碼
+    head_magnetic = pair_scores[9] + pair_scores[90 + quad[:, 0]] + quad_pairs
+    tail_magnetic = quad_pairs
+    tail_lingdong = lingdong[values % 80]
+    link = pair_scores[quad[:, 3][:, None] * 10 + quad[:, 0][None, :]]  # 前段末碼 x 後段首碼
+
+    magnetic_min, magnetic_max = -8 * 9, 10 * 9
+    lingdong_values = sorted({info['score'] for info in PhoneNumerology.LINGDONG_81.values()})
+    lingdong_offset = -lingdong_values[0]
+    lingdong_span = lingdong_values[-1] + lingdong_offset + 1
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SCALE, len(ELEMENTS)))
+
+        for element_index, element in enumerate(ELEMENTS):
+            analyzer = _element_analyzer(element)
+            element_scores = np.array(analyzer._element_scores, dtype=np.int64)
+            quad_elements = element_scores[quad].sum(axis=1)
+            head_elements = element_scores[0] + element_scores[9] + quad_elements
+            tail_elements = quad_elements
+
+            # 量化評分表: [磁場總分, 靈動數得分, 五行得分 (0-100)]
+            lookup = np.zeros((magnetic_max - magnetic_min + 1, lingdong_span, 101), dtype=np.uint8)
+            for magnetic_total in range(magnetic_min, magnetic_max + 1):
+                for lingdong_score in lingdong_values:
+                    for compatibility in range(101):
+                        final_score = round(PhoneNumerology._final_score(
+                            magnetic_total / 9, lingdong_score, compatibility), 2)
+                        lookup[magnetic_total - magnetic_min, lingdong_score + lingdong_offset, compatibility] = \
+                            quantize(final_score)
+
+            for start in range(0, len(heads), rows_per_chunk):
+                rows = np.asarray(heads[start:start + rows_per_chunk])
+                magnetic_total = (head_magnetic[rows][:, None] + link[rows] + tail_magnetic[None, :])
+                compatibility = np.clip(head_elements[rows][:, None] + tail_elements[None, :], 0, 100)
+                block = lookup[magnetic_total - magnetic_min,
+                               (tail_lingdong + lingdong_offset)[None, :],
+                               compatibility]
+
+                # 連續的前段一次寫入，否則逐一寫到各前段的位置
+                block_start = HEADER.size + element_index * BLOCK_SIZE
+                if rows[-1] - rows[0] == len(rows) - 1:
+                    f.seek(block_start + int(rows[0]) * 10000)
+                    f.write(block.tobytes())
+                else:
+                    for head, row in zip(rows.tolist(), block):
+                        f.seek(block_start + head * 10000)
+                        f.write(row.tobytes())
+
+                if progress:
+                    done = min(start + rows_per_chunk, len(heads))
+                    total = element_index * len(heads) + done
+                    print(f"\r  {element}命 {done * 100 // len(heads):3d}% "
+                          f"(總進度 {total * 100 // (len(heads) * len(ELEMENTS))}%)", end='', flush=True)
+
+        f.truncate(HEADER.size + BLOCK_SIZE * len(ELEMENTS))
+
+    os.replace(path + '.tmp', path)
+    if progress:
+        print()
+
+
+class ScoreTable:
+    """以 mmap 讀取的全空間評分表"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: build_score_table 產生的檔案
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"評分表檔案無效: {path}")
+
+        if len(self._map) != HEADER.size + BLOCK_SIZE * len(ELEMENTS):
+            self.close()
+            raise ValueError(f"評分表檔案大小不正確: {path}")
+        magic, scale, blocks = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or blocks != len(ELEMENTS):
+            self.close()
+            raise ValueError(f"評分表檔案格式不正確: {path}")
+        self.scale = scale
+
+    def lookup(self, phone_number: str, birth_element: str) -> float:
+        """
+        查詢號碼對指定本命五行的綜合評分（量化至 1 / scale 分）
+
+        Args:
+            phone_number: 09 開頭的 10 位數手機號碼
+            birth_element: 本命五行 (金、水、木、火、土)
+        """
+        clean_number = normalize_phone_number(phone_number)
+        if not re.fullmatch(r'09\d{8}', clean_number):
+            raise ValueError("手機號碼格式不正確，請輸入 09 開頭的 10 位數字")
+        if birth_element not in ELEMENTS:
+            raise ValueError(f"未知的本命五行: {birth_element}")
+
+        offset = HEADER.size + ELEMENTS.index(birth_element) * BLOCK_SIZE + int(clean_number[2:])
+        return self._map[offset] / self.scale
+
+    def score(self, phone_number: str, birthdate: str) -> float:
+        """依出生日期查詢號碼的綜合評分（量化至 1 / scale 分）"""
+        return self.lookup(phone_number, PhoneNumerology(birthdate).birth_element)
+
+    def close(self):
+        """關閉評分表"""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='建立或查詢 09 手機號碼全空間評分表',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+使用範例:
+  # 建立評分表 (約 500 MB,需要 NumPy)
+  python score_table.py build scores.bin
+
+  # 查詢號碼
+  python score_table.py lookup scores.bin --birthdate 1990/09/25 0978-759-196 0912-345-196
+        '''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='建立評分表')
+    build_parser.add_argument('path', help='輸出檔案路徑')
+
+    lookup_parser = subparsers.add_parser('lookup', help='查詢號碼的綜合評分')
+    lookup_parser.add_argument('path', help='評分表檔案路徑')
+    lookup_parser.add_argument('--birthdate', '-b', required=True, help='出生日期 (格式: YYYY/MM/DD)')
+    lookup_parser.add_argument('numbers', nargs='+', help='要查詢的電話號碼')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.time()
+        print(f"建立評分表: {args.path}")
+        build_score_table(args.path)
+        print(f"✅ 完成,耗時 {time.time() - started:.1f} 秒")
+    else:
+        try:
+            with ScoreTable(args.path) as table:
+                for number in args.numbers:
+                    print(f"{number}: {table.score(number, args.birthdate)}")
+        except (OSError, ValueError) as e:
+            print(f"❌ 錯誤: {e}")
+            sys.exit(1)
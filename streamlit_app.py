@@ -1,5 +1,6 @@
 import streamlit as st
-from phone_numerology import PhoneNumerology
+from phone_numerology import PhoneNumerology, AnalysisCache
+from phone_normalizer import normalize_phone_number, format_phone_number
 import re
 
 # 頁面配置
@@ -49,6 +50,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_analysis_cache():
+    """所有使用者工作階段共用的號碼分析快取"""
+    return AnalysisCache()
+
 # 標題
 st.markdown("# 📱 電話號碼命理分析")
 st.markdown('<p class="subtitle">使用八大數字磁場 × 八十一靈動數 × 五行相容性</p>', unsafe_allow_html=True)
@@ -85,7 +91,7 @@ with tab1:
 
     if st.button("🔮 開始分析", use_container_width=True, key="analyze_btn"):
         error_msg = None
-        clean_phone = re.sub(r'\D', '', phone_number)
+        clean_phone = normalize_phone_number(phone_number)
         
         if not phone_number:
             error_msg = "請輸入手機號碼"
@@ -108,13 +114,13 @@ with tab1:
         if error_msg:
             st.error(f"❌ {error_msg}")
         else:
-            formatted_phone = f"{clean_phone[:4]}-{clean_phone[4:7]}-{clean_phone[7:]}"
+            formatted_phone = format_phone_number(clean_phone)
             
             try:
                 with st.spinner('🔮 分析中...'):
-                    analyzer = PhoneNumerology(birthdate_analyze)
-                    report = analyzer.generate_report(formatted_phone)
+                    analyzer = PhoneNumerology(birthdate_analyze, cache=get_analysis_cache())
                     analysis = analyzer.comprehensive_analysis(formatted_phone)
+                    report = analyzer.render_report(analysis)
                 
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
                 
@@ -202,8 +208,7 @@ with tab2:
                     st.error("❌ 出生日期數值不正確")
                 else:
                     with st.spinner('✨ 正在為您推薦最適合的號碼組合...'):
-                        analyzer = PhoneNumerology(birthdate_recommend)
-                        recommendations = analyzer.recommend_numbers(count=recommend_count)
+                        recommendations = PhoneNumerology(birthdate_recommend).recommend_numbers(count=recommend_count)
                         
                         # 計算五行
                         year_index = (year - 4) % 10
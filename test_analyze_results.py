@@ -0,0 +1,103 @@
+"""
+號碼檔案分析測試
+驗證每個號碼只完整分析一次，以及串流模式 (含行程池) 的前 N 名與統計和預設模式相同
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import format_phone_number, iter_normalized_file
+from analyze_results import analyze_found_numbers, stream_found_numbers
+import json
+import random
+import pytest
+
+
+BIRTHDATE = '1990/09/25'
+
+
+@pytest.fixture(scope='module')
+def numbers_file(tmp_path_factory):
+    rng = random.Random(9)
+    numbers = [f"09{rng.randrange(10 ** 8):08d}" for _ in range(2000)]
+    # 格式不一的寫法、重複號碼與非 10 碼的號碼
+    lines = numbers[:1000] + ['0978-759-196', '+886 912 345 678', numbers[5], '097875919'] + numbers[1000:]
+    path = tmp_path_factory.mktemp('numbers') / 'found_numbers.txt'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def read_reports(output_dir):
+    with open(output_dir / '分析報告.jsonl', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def count_analyses(monkeypatch):
+    """計算本行程呼叫 comprehensive_analysis 的次數"""
+    calls = []
+    original = PhoneNumerology.comprehensive_analysis
+
+    def counted(self, phone_number):
+        calls.append(phone_number)
+        return original(self, phone_number)
+
+    monkeypatch.setattr(PhoneNumerology, 'comprehensive_analysis', counted)
+    return calls
+
+
+def test_each_number_analysed_once(numbers_file, tmp_path, count_analyses, capsys):
+    """排名以批次評分建立索引，完整分析只在產生報告時對每個號碼進行一次"""
+    analyze_found_numbers(BIRTHDATE, numbers_file=numbers_file, output_dir=str(tmp_path), output_format='jsonl')
+    capsys.readouterr()
+
+    numbers = [format_phone_number(number) for number in iter_normalized_file(numbers_file)]
+    # 每個號碼為報告分析一次；只有非 10 碼的號碼在建立索引時另外完整分析
+    assert sorted(count_analyses) == sorted(numbers + ['097875919'])
+    assert len(read_reports(tmp_path)) == len(set(numbers))
+
+
+def test_worker_processes_do_the_analysis(numbers_file, tmp_path, count_analyses, capsys):
+    """使用行程池時本行程不分析任何號碼，報告與單一行程相同"""
+    single = tmp_path / 'single'
+    parallel = tmp_path / 'parallel'
+    analyze_found_numbers(BIRTHDATE, numbers_file=numbers_file, output_dir=str(single), output_format='jsonl')
+    del count_analyses[:]
+    analyze_found_numbers(BIRTHDATE, numbers_file=numbers_file, workers=2, output_dir=str(parallel),
+                          output_format='jsonl')
+    capsys.readouterr()
+
+    assert count_analyses == []
+    assert read_reports(parallel) == read_reports(single)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'fields': {'天醫': 1}, 'min_score': 55},
+    {'lingdong_type': '大吉', 'max_score': 70},
+    {'min_score': 99},
+])
+def test_stream_matches_default_mode(numbers_file, tmp_path, filters, capsys):
+    """串流模式 (單一行程與行程池、多批) 的前 N 名與統計和預設模式相同；非 10 碼的號碼略過"""
+    default = analyze_found_numbers(BIRTHDATE, filters=filters, numbers_file=numbers_file,
+                                    output_dir=str(tmp_path / 'default'), output_format='jsonl')
+    expected = [result for result in default if len(result['phone_number']) == 12]
+    scores = [result['final_score'] for result in expected]
+
+    for workers in (1, 2):
+        for top_n in (25, 5000):
+            results, stats = stream_found_numbers(BIRTHDATE, numbers_file=numbers_file, filters=filters,
+                                                  top_n=top_n, chunk_size=300, workers=workers,
+                                                  output_dir=str(tmp_path / f'stream-{workers}-{top_n}'),
+                                                  output_format='jsonl')
+            assert results == expected[:top_n]
+
+            assert stats['processed'] == len(list(iter_normalized_file(numbers_file)))
+            assert stats['skipped'] == 1
+            assert stats['matched'] == len(expected)
+            if expected:
+                assert stats['mean'] == pytest.approx(sum(scores) / len(scores))
+                assert (stats['max'], stats['min']) == (max(scores), min(scores))
+            else:
+                assert (stats['mean'], stats['max'], stats['min']) == (None, None, None)
+            assert stats['bands'] == [sum(1 for score in scores if min(int(score // 10), 9) == band)
+                                      for band in range(10)]
+    capsys.readouterr()
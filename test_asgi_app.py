@@ -0,0 +1,115 @@
+"""
+ASGI API 服務測試
+以 Starlette TestClient 啟動 (含行程池)，驗證各端點的回應與 Flask 版本 (app.py) 相同
+"""
+
+from starlette.testclient import TestClient
+import json
+import random
+import pytest
+
+
+@pytest.fixture(scope='module')
+def asgi_client():
+    import asgi_app
+    workers = asgi_app.POOL_WORKERS
+    asgi_app.POOL_WORKERS = 1
+    try:
+        with TestClient(asgi_app.app) as client:
+            yield client
+    finally:
+        asgi_app.POOL_WORKERS = workers
+
+
+@pytest.fixture(scope='module')
+def flask_client():
+    from app import app
+    return app.test_client()
+
+
+ANALYZE_REQUEST = {'phone_number': '0978-759-196', 'birthdate': '1990/09/25'}
+
+
+def test_analyze_matches_flask_bytes_and_etag(asgi_client, flask_client):
+    """/analyze 的回應內容與 ETag 與 Flask 版本逐位元組相同，可在兩者間以 If-None-Match 取得 304"""
+    flask_response = flask_client.post('/analyze', json=ANALYZE_REQUEST)
+    asgi_response = asgi_client.post('/analyze', json=ANALYZE_REQUEST)
+
+    assert asgi_response.status_code == flask_response.status_code == 200
+    assert asgi_response.content == flask_response.get_data()
+    assert asgi_response.headers['etag'] == flask_response.headers['ETag']
+
+    not_modified = asgi_client.post('/analyze', json=ANALYZE_REQUEST,
+                                    headers={'If-None-Match': flask_response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/analyze', {'phone_number': 912345678, 'birthdate': '1990/09/25'}),
+    ('/analyze', {'phone_number': '0978-759-196'}),
+    ('/analyze', {'phone_number': '12', 'birthdate': '1990/09/25'}),
+    ('/analyze', ['0978-759-196']),
+    ('/score', {'phone_number': '0978-759-196', 'birthdate': '1990/13/25'}),
+    ('/recommend', {'birthdate': '1990/09/25', 'count': True}),
+    ('/recommend', {'birthdate': '1990/09/25', 'count': 51}),
+    ('/recommend', {'birthdate': 19900925}),
+])
+def test_invalid_input_matches_flask(asgi_client, flask_client, path, body):
+    """格式錯誤的輸入在兩種服務都回傳相同的 400 錯誤"""
+    flask_response = flask_client.post(path, json=body)
+    asgi_response = asgi_client.post(path, json=body)
+    assert asgi_response.status_code == flask_response.status_code == 400
+    assert asgi_response.json() == flask_response.get_json()
+
+
+def test_non_json_body(asgi_client):
+    response = asgi_client.post('/analyze', content=b'not json', headers={'Content-Type': 'text/plain'})
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_score_and_recommend_match_flask(asgi_client, flask_client):
+    for path, body in [('/score', ANALYZE_REQUEST), ('/recommend', {'birthdate': '1984/02/29', 'count': 5})]:
+        flask_response = flask_client.post(path, json=body)
+        asgi_response = asgi_client.post(path, json=body)
+        assert asgi_response.status_code == flask_response.status_code == 200
+        assert asgi_response.json() == flask_response.get_json()
+
+
+def test_batch_matches_flask(asgi_client, flask_client):
+    """/analyze/batch 跨多個行程池工作的串流結果與 Flask 版本逐行相同"""
+    rng = random.Random(11)
+    numbers = [f"09{rng.randrange(10 ** 8):08d}" for _ in range(5000)] + ['12', 5]
+    body = '{"birthdate": "1990/09/25"}\n' + '\n'.join(json.dumps(number) for number in numbers) + '\n'
+
+    flask_lines = flask_client.post('/analyze/batch', data=body).get_data(as_text=True).splitlines()
+    asgi_lines = asgi_client.post('/analyze/batch', content=body.encode()).text.splitlines()
+
+    assert asgi_lines == flask_lines
+    assert json.loads(asgi_lines[-1]) == {'done': True, 'count': len(numbers), 'invalid': 2}
+
+
+def test_batch_rejects_missing_birthdate(asgi_client):
+    response = asgi_client.post('/analyze/batch', content=b'["0978759196"]')
+    assert response.status_code == 400
+
+
+def test_batch_reports_late_errors(asgi_client):
+    """ASGI 版邊讀取邊評分，回應開始串流後的格式錯誤以最後一行回報 (Flask 版則回傳 400)"""
+    body = '["0978759196", "0912345678", oops]'
+    lines = asgi_client.post('/analyze/batch?birthdate=1990/09/25', content=body.encode()).text.splitlines()
+    last = json.loads(lines[-1])
+    assert last['done'] is False
+    assert last['count'] == 2
+    assert 'error' in last
+
+
+def test_info_health_and_metrics(asgi_client, flask_client):
+    assert asgi_client.get('/').json() == flask_client.get('/').get_json()
+    assert asgi_client.get('/health').json() == {'status': 'healthy'}
+
+    metrics = asgi_client.get('/metrics')
+    assert metrics.status_code == 200
+    assert 'phone_api_requests_total' in metrics.text
+    assert 'phone_worker_pool_size 1' in metrics.text
@@ -0,0 +1,189 @@
+"""
+批次分析請求測試
+驗證增量解析在任意切段下與一次解析相同、格式錯誤與超過上限時回報錯誤，
+以及 /analyze/batch 串流回應的評分與 comprehensive_analysis 相同
+"""
+
+from phone_numerology import PhoneNumerology
+from batch_request import MAX_ITEM_CHARS, BatchParseError, BatchParser, analyze_items
+import json
+import random
+import pytest
+
+
+def parse_in_chunks(data: bytes, sizes, max_items=100000):
+    """依序以 sizes 的長度切段送入解析器 (sizes 用完後重複最後一個長度)"""
+    parser = BatchParser(max_items)
+    items = []
+    pos = 0
+    sizes = list(sizes)
+    while pos < len(data):
+        size = sizes.pop(0) if len(sizes) > 1 else sizes[0]
+        items += parser.feed(data[pos:pos + size])
+        pos += size
+    items += parser.close()
+    return parser, items
+
+
+VALUES = ["0978-759-196", {"phone_number": "0912345678"}, 12, -1.5e3, None, True, "中文", {"a": [1, {"b": "]"}]}, "\"]"]
+
+
+@pytest.mark.parametrize('sizes', [[1], [2], [3], [7], [64], [1 << 20]])
+def test_json_array_any_split(sizes):
+    """JSON 陣列 (含 BOM 與多位元組字元) 不論如何切段都解析出相同元素"""
+    data = b'\xef\xbb\xbf  [ ' + ', '.join(json.dumps(v, ensure_ascii=False) for v in VALUES).encode('utf-8') + b' ]\n'
+    parser, items = parse_in_chunks(data, sizes)
+    assert parser.format == 'json'
+    assert items == VALUES
+    assert parser.count == len(VALUES)
+
+
+def test_json_array_random_splits():
+    rng = random.Random(3)
+    data = json.dumps([f"09{rng.randrange(10 ** 8):08d}" for _ in range(500)] + [1234567, 0.5]).encode()
+    for _ in range(20):
+        _, items = parse_in_chunks(data, [rng.randint(1, 40) for _ in range(2000)])
+        assert items == json.loads(data)
+
+
+def test_empty_json_array():
+    _, items = parse_in_chunks(b' [ ] ', [1])
+    assert items == []
+
+
+@pytest.mark.parametrize('sizes', [[1], [5], [1 << 20]])
+def test_ndjson_with_birthdate_header(sizes):
+    """NDJSON 第一行可為出生日期標頭，空白行略過，最後一行可不含換行"""
+    lines = ['{"birthdate": "1990/09/25"}', '"0978-759-196"', '', '{"phone_number": "0912345678"}', '"0911111111"']
+    parser, items = parse_in_chunks('\r\n'.join(lines).encode(), sizes)
+    assert parser.format == 'ndjson'
+    assert parser.birthdate == '1990/09/25'
+    assert items == ['0978-759-196', {'phone_number': '0912345678'}, '0911111111']
+
+
+def test_ndjson_header_only_first_line():
+    """標頭之後的 {"birthdate": ...} 視為一般元素"""
+    parser, items = parse_in_chunks(b'"0978759196"\n{"birthdate": "1990/09/25"}\n', [1 << 20])
+    assert parser.birthdate is None
+    assert items == ['0978759196', {'birthdate': '1990/09/25'}]
+
+
+@pytest.mark.parametrize('data', [
+    b'["0978759196" "0912345678"]',        # 缺少逗號
+    b'["0978759196",]',                    # 多餘的逗號
+    b'["0978759196"',                      # 未結束
+    b'["0978759196"] []',                  # 結束後有多餘資料
+    b'[0978]',                             # 不合法的數字
+    b'"0978759196"\n{"phone_number": \n',  # NDJSON 行不完整
+    b'\xff\xfe[]',                         # 非 UTF-8
+])
+def test_malformed_input(data):
+    with pytest.raises(BatchParseError):
+        parse_in_chunks(data, [1 << 20])
+
+
+@pytest.mark.parametrize('data', [
+    b'["' + b'9' * (MAX_ITEM_CHARS + 10) + b'"]',
+    b'"' + b'9' * (MAX_ITEM_CHARS + 10) + b'"\n',
+])
+@pytest.mark.parametrize('sizes', [[1], [256], [1 << 20]])
+def test_oversized_item(data, sizes):
+    """單一元素超過字元上限時回報錯誤 (不論是否在同一段內容中完整送達)"""
+    with pytest.raises(BatchParseError):
+        parse_in_chunks(data, sizes)
+
+
+@pytest.mark.parametrize('encode', [
+    lambda numbers: json.dumps(numbers).encode(),
+    lambda numbers: '\n'.join(json.dumps(number) for number in numbers).encode(),
+])
+def test_too_many_items(encode):
+    """號碼數量可達上限，超過時回報錯誤"""
+    _, items = parse_in_chunks(encode(['0978759196'] * 10), [3], max_items=10)
+    assert len(items) == 10
+    with pytest.raises(BatchParseError):
+        parse_in_chunks(encode(['0978759196'] * 11), [3], max_items=10)
+
+
+def test_feed_after_close():
+    parser = BatchParser()
+    parser.feed(b'[]')
+    parser.close()
+    with pytest.raises(BatchParseError):
+        parser.feed(b'[]')
+
+
+def test_analyze_items_matches_analysis():
+    """批次評分與 comprehensive_analysis 相同，格式錯誤的元素回傳錯誤且不影響其他元素"""
+    analyzer = PhoneNumerology('1990/09/25')
+    items = ['0978-759-196', 12, {'phone_number': '+886 912 345 678'}, '12345', {'phone': 'x'}, '0900000000']
+    results = analyze_items(analyzer, items, start=100)
+
+    assert [result['index'] for result in results] == list(range(100, 106))
+    assert [i for i, result in enumerate(results) if 'error' in result] == [1, 3, 4]
+    for i in (0, 2, 5):
+        analysis = analyzer.comprehensive_analysis(results[i]['phone_number'])
+        assert results[i]['score'] == analysis['final_score']
+        assert results[i]['recommendation'] == analysis['recommendation']
+        assert results[i]['magnetic_total'] == analysis['magnetic_fields']['total_score']
+        assert results[i]['lingdong_number'] == analysis['lingdong_81']['lingdong_number']
+        assert results[i]['lingdong_type'] == analysis['lingdong_81']['type']
+        assert results[i]['five_elements_score'] == analysis['five_elements']['compatibility_score']
+    assert results[2]['phone_number'] == '0912-345-678'
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_endpoint_streams_results(client):
+    rng = random.Random(7)
+    numbers = [f"09{rng.randrange(10 ** 8):08d}" for _ in range(3000)] + ['bad']
+    response = client.post('/analyze/batch?birthdate=1990/09/25', data=json.dumps(numbers),
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = read_ndjson(response)
+    assert lines[-1] == {'done': True, 'count': len(numbers), 'invalid': 1}
+    assert [line['index'] for line in lines[:-1]] == list(range(len(numbers)))
+    analyzer = PhoneNumerology('1990/09/25')
+    for line in lines[:-1:97]:
+        assert line['score'] == analyzer.comprehensive_analysis(line['phone_number'])['final_score']
+
+
+def test_endpoint_reads_birthdate_header(client):
+    body = '{"birthdate": "1990/09/25"}\n"0978-759-196"\n'
+    lines = read_ndjson(client.post('/analyze/batch', data=body, content_type='application/x-ndjson'))
+    assert lines[0]['phone_number'] == '0978-759-196'
+    assert lines[-1] == {'done': True, 'count': 1, 'invalid': 0}
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/analyze/batch', '["0978759196"]'),                        # 缺少出生日期
+    ('/analyze/batch?birthdate=1990-09-25', '["0978759196"]'),   # 出生日期格式錯誤
+    ('/analyze/batch?birthdate=1990/09/25', ''),                 # 沒有內容
+    ('/analyze/batch?birthdate=1990/09/25', '{"phone_number": '),  # 第一個元素格式錯誤
+])
+def test_endpoint_rejects_bad_requests(client, path, body):
+    response = client.post(path, data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('body', [
+    '["0978759196", "0912345678", oops]',
+    '["0978759196", "0912345678"',
+    json.dumps(['0978759196'] * 2001)[:-1] + ', 12}',
+])
+def test_endpoint_rejects_late_errors(client, body):
+    """Flask 版先完整讀取並驗證請求內容，後段 (含第一批評分之後) 的格式錯誤也回傳 400"""
+    response = client.post('/analyze/batch?birthdate=1990/09/25', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,78 @@
+"""
+微基準測試工具測試
+驗證與基準比較及 --max-regression 的判斷，以及命令列的錯誤碼
+"""
+
+from benchmark import compare, find_regressions
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+
+def result(benchmark, size, ops_per_sec):
+    return {'benchmark': benchmark, 'size': size, 'ops_per_sec': ops_per_sec}
+
+
+def test_compare_adds_change():
+    results = {'results': [result('score_batch', 1, 150.0), result('score_batch', 10000, 80.0),
+                           result('generate_report', 1, 10.0)]}
+    baseline = {'results': [result('score_batch', 1, 100.0), result('score_batch', 10000, 100.0),
+                            result('comprehensive_analysis', 1, 50.0)]}
+    rows = compare(results, baseline)
+
+    assert [(row['baseline_ops_per_sec'], row['change']) for row in rows[:2]] == \
+        [(100.0, pytest.approx(0.5)), (100.0, pytest.approx(-0.2))]
+    # 基準中沒有的項目不加比較欄位
+    assert rows[2] == result('generate_report', 1, 10.0)
+    assert results['results'][0] == result('score_batch', 1, 150.0)
+
+
+@pytest.mark.parametrize('max_regression, expected', [
+    (0.0, ['slower-5%', 'slower-20%']),
+    (0.05, ['slower-20%']),
+    (0.1, ['slower-20%']),
+    (0.2, []),
+    (1.0, []),
+])
+def test_find_regressions(max_regression, expected):
+    """只有比基準慢超過容許比例的項目算退步；剛好等於、變快與基準中沒有的項目都不算"""
+    rows = [
+        {'benchmark': 'faster', 'change': 0.3},
+        {'benchmark': 'same', 'change': 0.0},
+        {'benchmark': 'slower-5%', 'change': -0.05},
+        {'benchmark': 'slower-20%', 'change': -0.2},
+        {'benchmark': 'new'},
+    ]
+    assert [row['benchmark'] for row in find_regressions(rows, max_regression)] == expected
+
+
+def test_find_regressions_rejects_negative_tolerance():
+    with pytest.raises(ValueError):
+        find_regressions([], -0.1)
+
+
+def run_cli(*args):
+    return subprocess.run(
+        [sys.executable, 'benchmark.py', '--benchmark', 'score_batch', '--sizes', '1', '--repeat', '1',
+         '--max-time', '0.1', '--alloc-sample', '1', *args],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=120
+    )
+
+
+@pytest.mark.parametrize('baseline_ops, returncode', [(1e12, 1), (1e-3, 0)])
+def test_cli_exit_code(tmp_path, baseline_ops, returncode):
+    """比基準慢超過 --max-regression 時回傳錯誤碼 1，並儲存本次結果"""
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'results': [result('score_batch', 1, baseline_ops)]}), encoding='utf-8')
+    output = tmp_path / 'results.json'
+
+    completed = run_cli('--baseline', str(baseline), '--max-regression', '0.1', '--output', str(output))
+    assert completed.returncode == returncode, completed.stderr
+    assert [row['benchmark'] for row in json.loads(output.read_text(encoding='utf-8'))['results']] == ['score_batch']
+
+
+@pytest.mark.parametrize('args', [['--max-regression', '0.1'], ['--baseline', 'x.json', '--max-regression', '-1']])
+def test_cli_rejects_invalid_regression_options(args):
+    assert run_cli(*args).returncode == 2
@@ -0,0 +1,95 @@
+"""
+平行爬蟲測試
+驗證全域速率限制的請求間隔，以及共用前綴佇列的排程、重試與失敗處理
+(瀏覽器部分需要 Playwright，不在此測試)
+"""
+
+from concurrent_crawler import PolitenessLimiter, crawl_prefixes
+import asyncio
+import time
+
+
+def run_limited(rate, workers, requests_per_worker):
+    """多個工作同時經過速率限制器，回傳 (開始時間, 每次通過的時間)"""
+    limiter = PolitenessLimiter(rate)
+    times = []
+    start = time.monotonic()
+
+    async def worker():
+        for _ in range(requests_per_worker):
+            await limiter.wait()
+            times.append(time.monotonic())
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    asyncio.run(main())
+    return start, sorted(times)
+
+
+def test_limiter_spaces_requests_across_workers():
+    """所有工作的請求合計不超過每秒 rate 次: 第 i 個請求最早在開始後 i / rate 秒通過"""
+    start, times = run_limited(rate=50, workers=4, requests_per_worker=5)
+    assert len(times) == 20
+    for i, passed in enumerate(times):
+        assert passed - start >= i / 50 - 0.001
+
+
+def test_limiter_unlimited():
+    start, times = run_limited(rate=0, workers=4, requests_per_worker=50)
+    assert len(times) == 200
+    assert times[-1] - start < 0.5
+
+
+def test_results_in_input_order():
+    """每個前綴只搜尋一次，結果依輸入順序排列"""
+    prefixes = [f"09{n:02d}" for n in range(10, 40)]
+    searched = []
+
+    async def search(prefix):
+        searched.append(prefix)
+        await asyncio.sleep(0.001 * (int(prefix) % 7))
+        return [prefix + '124196'] if int(prefix) % 3 else []
+
+    results, failures = asyncio.run(crawl_prefixes(prefixes, [search] * 4, log=[].append))
+    assert sorted(searched) == prefixes
+    assert list(results) == prefixes
+    assert results['0912'] == [] and results['0911'] == ['0911124196']
+    assert failures == {}
+
+
+def test_retries_then_gives_up():
+    """失敗的前綴重新排入佇列，超過重試次數後記錄為失敗"""
+    attempts = {}
+
+    async def search(prefix):
+        attempts[prefix] = attempts.get(prefix, 0) + 1
+        if prefix == '0911' and attempts[prefix] < 3:
+            raise ConnectionError('timeout')
+        if prefix == '0912':
+            raise ConnectionError('always fails')
+        return [prefix]
+
+    lines = []
+    results, failures = asyncio.run(crawl_prefixes(['0910', '0911', '0912'], [search] * 2, retries=2,
+                                                   log=lines.append))
+    assert results == {'0910': ['0910'], '0911': ['0911']}
+    assert failures == {'0912': 'always fails'}
+    assert attempts == {'0910': 1, '0911': 3, '0912': 3}
+    assert any('Giving up on prefix 0912' in line for line in lines)
+
+
+def test_non_retryable_errors_fail_immediately():
+    class PageNeedsScripts(Exception):
+        retryable = False
+
+    attempts = []
+
+    async def search(prefix):
+        attempts.append(prefix)
+        raise PageNeedsScripts('needs JavaScript')
+
+    results, failures = asyncio.run(crawl_prefixes(['0910'], [search], retries=5, log=[].append))
+    assert results == {}
+    assert failures == {'0910': 'needs JavaScript'}
+    assert attempts == ['0910']
@@ -0,0 +1,151 @@
+"""
+HTTP 爬蟲測試
+對本地模擬伺服器 (fake_cht_server.py) 執行，驗證表單解析、搜尋結果、
+連線逾時後重新載入、速率限制，以及需要 JavaScript 時改用瀏覽器爬蟲
+"""
+
+from fake_cht_server import FakeChtServer, FakeInventory, _result_page, _search_form
+import http_crawler
+from http_crawler import HttpSearcher, NeedsJavaScript, SessionExpired, SearchForm, http_crawl, parse_results
+import asyncio
+import requests
+import time
+import pytest
+
+
+PATTERN = '??4196'
+PREFIXES = ('0910', '0911', '0912', '0913', '0914', '0915')
+
+
+@pytest.fixture
+def inventory():
+    return FakeInventory(PREFIXES, per_prefix=20000, seed=1)
+
+
+@pytest.fixture
+def server(inventory):
+    with FakeChtServer(inventory=inventory) as server:
+        yield server
+
+
+def test_search_form_from_page():
+    """由查詢頁面讀取表單: 送出位址、隱藏欄位、前綴選項與「後六碼」選項的值"""
+    form = SearchForm.from_html('http://example.com/mbms/NewApply/page.jsp', _search_form(PREFIXES))
+    assert form.action == 'http://example.com/mbms/NewApply/findAvailableProc.jsp'
+    assert form.method == 'post'
+    assert form.prefixes == list(PREFIXES)
+    assert form.search_type == ('searchType', '2')
+    assert form.data('0912', PATTERN) == [('action', 'query'), ('head4G', '0912'),
+                                          ('searchType', '2'), ('tel', PATTERN)]
+
+
+def test_search_page_without_form():
+    with pytest.raises(NeedsJavaScript):
+        SearchForm.from_html('http://example.com/', '<html><body><script>render()</script></body></html>')
+    with pytest.raises(ValueError):
+        SearchForm.from_html('http://example.com/', '<html><body>維護中</body></html>')
+
+
+def test_parse_results():
+    numbers = ['0912124196', '0912994196']
+    assert parse_results(_result_page('0912', numbers), '0912', PATTERN) == numbers
+    assert parse_results(_result_page('0912', []), '0912', PATTERN) == []
+    with pytest.raises(NeedsJavaScript):
+        parse_results(_result_page('0912', numbers, require_js=True), '0912', PATTERN)
+    with pytest.raises(SessionExpired):
+        parse_results(_search_form(PREFIXES, '連線逾時'), '0912', PATTERN)
+    with pytest.raises(ValueError):
+        parse_results('<html><body>維護中</body></html>', '0912', PATTERN)
+
+
+def test_crawl_matches_inventory(server, inventory):
+    """每個前綴只送出一次查詢，共用同一個 session，結果與模擬庫存相同"""
+    prefixes, results, failures = asyncio.run(http_crawl(server.url, PATTERN, workers=3, rate=0, log=[].append))
+    assert prefixes == list(PREFIXES)
+    assert failures == {}
+    assert results == {prefix: inventory.search(prefix, PATTERN) for prefix in PREFIXES}
+    assert server.requests == len(PREFIXES) + 1
+    assert server.searches == len(PREFIXES)
+    assert len(server.sessions) == 1
+    assert server.max_active <= 3
+
+
+def test_crawl_respects_rate_limit(server):
+    rate = 20
+    start = time.monotonic()
+    asyncio.run(http_crawl(server.url, PATTERN, workers=4, rate=rate, log=[].append))
+    for i, requested in enumerate(sorted(server.request_times)):
+        assert requested - start >= i / rate - 0.001
+
+
+def test_expired_session_reloads_form(server, inventory):
+    """session 逾時時重新載入表單再查詢一次，每個請求之前都經過速率限制"""
+    searcher = HttpSearcher(server.url, PATTERN)
+    try:
+        searcher.load_form()
+        server.sessions.clear()
+        waits = []
+        before = server.requests
+
+        assert searcher.search('0912', wait=lambda: waits.append(server.requests)) == inventory.search('0912', PATTERN)
+        # 查詢 (逾時) -> 重新載入表單 -> 再次查詢，三個請求各等待一次
+        assert server.requests - before == 3
+        assert waits == [before, before + 1, before + 2]
+    finally:
+        searcher.close()
+
+
+def test_other_errors_do_not_reload_form(server, monkeypatch):
+    """只有 session 逾時才重新載入表單，其他錯誤 (例: requests 的 InvalidURL) 直接拋出"""
+    searcher = HttpSearcher(server.url, PATTERN)
+    try:
+        searcher.load_form()
+        before = server.requests
+
+        def invalid_url(form, prefix):
+            raise requests.exceptions.InvalidURL('bad form action')
+
+        monkeypatch.setattr(searcher, '_submit', invalid_url)
+        with pytest.raises(requests.exceptions.InvalidURL):
+            searcher.search('0912')
+        assert server.requests == before
+    finally:
+        searcher.close()
+
+
+def test_user_agent_identifies_crawler():
+    searcher = HttpSearcher()
+    try:
+        assert searcher.session.headers['User-Agent'].startswith('phone-numerology-http-crawler/')
+        assert 'Mozilla' not in searcher.session.headers['User-Agent']
+    finally:
+        searcher.close()
+
+
+def test_js_prefixes_fall_back_to_browser(inventory, monkeypatch):
+    """只有結果需要 JavaScript 的前綴改用瀏覽器爬蟲，結果依前綴順序合併"""
+    calls = []
+
+    async def fake_browser_crawl(url, pattern, contexts, rate, retries, headless=True, prefixes=None, log=print):
+        calls.append(prefixes)
+        return prefixes, {prefix: ['browser'] for prefix in prefixes}, {}
+
+    monkeypatch.setattr(http_crawler, 'browser_crawl', fake_browser_crawl)
+    with FakeChtServer(inventory=inventory, js_prefixes=['0911', '0914']) as server:
+        prefixes, results, failures = asyncio.run(http_crawl(server.url, PATTERN, rate=0, log=[].append))
+
+    assert calls == [['0911', '0914']]
+    assert failures == {}
+    assert list(results) == list(PREFIXES)
+    assert results['0911'] == results['0914'] == ['browser']
+    assert results['0912'] == inventory.search('0912', PATTERN)
+
+
+def test_js_prefixes_without_fallback(inventory):
+    """不使用瀏覽器時，需要 JavaScript 的前綴直接記錄為失敗 (不重試)"""
+    with FakeChtServer(inventory=inventory, js_prefixes=['0911']) as server:
+        _, results, failures = asyncio.run(http_crawl(server.url, PATTERN, rate=0, retries=3, fallback=False,
+                                                      log=[].append))
+        assert server.searches == len(PREFIXES)
+    assert list(failures) == ['0911']
+    assert '0911' not in results
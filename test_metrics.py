@@ -0,0 +1,103 @@
+"""
+效能指標測試
+驗證計數器、直方圖與回呼指標的 Prometheus 文字格式，以及 API 服務的 /metrics 輸出
+"""
+
+from metrics import Registry, Counter, Histogram, CallbackMetric, CONTENT_TYPE
+import math
+import re
+import pytest
+
+
+def test_counter_rendering():
+    registry = Registry()
+    counter = Counter('requests_total', 'HTTP 請求數量', ['endpoint', 'status'], registry=registry)
+    counter.labels('/analyze', 200).inc()
+    counter.labels('/analyze', 200).inc(2)
+    counter.labels('/a"b\\c\nd', 500).inc(0.5)
+
+    assert registry.render() == (
+        '# HELP requests_total HTTP 請求數量\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{endpoint="/a\\"b\\\\c\\nd",status="500"} 0.5\n'
+        'requests_total{endpoint="/analyze",status="200"} 3\n'
+    )
+
+
+def test_histogram_rendering():
+    """區間為累計數量，含 +Inf、_sum 與 _count；剛好等於上限的值計入該區間"""
+    registry = Registry()
+    histogram = Histogram('latency_seconds', '延遲', buckets=(0.5, 0.1, 1), registry=registry)
+    for value in (0.05, 0.1, 0.3, 2.5):
+        histogram.observe(value)
+
+    assert registry.render() == (
+        '# HELP latency_seconds 延遲\n'
+        '# TYPE latency_seconds histogram\n'
+        'latency_seconds_bucket{le="0.1"} 2\n'
+        'latency_seconds_bucket{le="0.5"} 3\n'
+        'latency_seconds_bucket{le="1"} 3\n'
+        'latency_seconds_bucket{le="+Inf"} 4\n'
+        'latency_seconds_sum 2.95\n'
+        'latency_seconds_count 4\n'
+    )
+
+
+def test_histogram_timer_and_labels():
+    registry = Registry()
+    histogram = Histogram('stage_seconds', '各階段耗時', ['stage'], buckets=(math.inf,), registry=registry)
+    with histogram.labels('report').time():
+        pass
+    with pytest.raises(ValueError):
+        with histogram.labels('magnetic').time():
+            raise ValueError
+    text = registry.render()
+    assert 'stage_seconds_count{stage="magnetic"} 1' in text
+    assert 'stage_seconds_count{stage="report"} 1' in text
+
+
+def test_callback_metric_and_registry():
+    registry = Registry()
+    values = iter([3, 4.25])
+    CallbackMetric('cache_hits_total', '命中次數', lambda: next(values), 'counter', registry=registry)
+    CallbackMetric('cache_entries', '快取數量', lambda: 7, registry=registry)
+
+    assert registry.render().splitlines() == [
+        '# HELP cache_hits_total 命中次數', '# TYPE cache_hits_total counter', 'cache_hits_total 3',
+        '# HELP cache_entries 快取數量', '# TYPE cache_entries gauge', 'cache_entries 7',
+    ]
+    assert 'cache_hits_total 4.25' in registry.render()
+
+    with pytest.raises(ValueError):
+        Counter('cache_entries', '重複名稱', registry=registry)
+    with pytest.raises(ValueError):
+        Counter('labelled_total', '標籤數量不符', ['a', 'b'], registry=registry).labels('x')
+
+
+def sample(text, name):
+    match = re.search(rf'^{re.escape(name)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_flask_metrics_counters_are_monotonic():
+    """/analyze 記錄各分析階段耗時；清除快取後快取計數器不減少"""
+    import app
+
+    client = app.app.test_client()
+    before = client.get('/metrics').get_data(as_text=True)
+    request = {'phone_number': '0912-000-196', 'birthdate': '1971/05/05'}
+    assert client.post('/analyze', json=request).status_code == 200
+
+    response = client.get('/metrics')
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+    after = response.get_data(as_text=True)
+    for stage in ('magnetic', 'lingdong', 'five_elements', 'aggregation', 'comprehensive_analysis'):
+        name = f'phone_analysis_stage_seconds_count{{stage="{stage}"}}'
+        assert sample(after, name) == sample(before, name) + 1, stage
+
+    app.analysis_cache.clear()
+    cleared = client.get('/metrics').get_data(as_text=True)
+    assert sample(after, 'phone_analysis_cache_misses_total') > 0
+    for name in ('phone_analysis_cache_hits_total', 'phone_analysis_cache_misses_total'):
+        assert sample(cleared, name) == sample(after, name)
+    assert sample(cleared, 'phone_analysis_cache_entries') == 0
@@ -0,0 +1,71 @@
+"""
+號碼倒排索引測試
+驗證批次評分建立的索引與逐一分析加入的索引相同，以及篩選結果與逐一檢查所有號碼相同
+"""
+
+from phone_numerology import PhoneNumerology
+from phone_normalizer import format_phone_number
+from number_index import NumberIndex
+from concurrent.futures import ProcessPoolExecutor
+import random
+import pytest
+
+
+BIRTHDATE = '1990/09/25'
+
+
+@pytest.fixture(scope='module')
+def numbers():
+    rng = random.Random(2)
+    numbers = [format_phone_number(f"09{rng.randrange(10 ** 8):08d}") for _ in range(3000)]
+    # 非 10 碼的號碼以完整分析加入
+    return numbers[:100] + ['097875919', '0912-345-6789', '+886 978 759 196'] + numbers[100:]
+
+
+def postings(index):
+    return (index.numbers, index.scores, index.recommendations,
+            {key: value for key, value in index._by_field.items() if value}, index._by_element,
+            index._by_lingdong_number, index._by_lingdong_type, index._by_band)
+
+
+def test_build_matches_per_number_analysis(numbers):
+    """以 compute_columns 批次評分建立的索引與逐一 comprehensive_analysis 加入的索引相同"""
+    expected = NumberIndex(BIRTHDATE)
+    for number in numbers:
+        expected.add(number)
+
+    built = NumberIndex.build(BIRTHDATE, numbers, chunk_size=700)
+    assert postings(built) == postings(expected)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = NumberIndex.build(BIRTHDATE, numbers, executor=executor, chunk_size=700, max_pending=2)
+    assert postings(parallel) == postings(expected)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'fields': {'天醫': 2}},
+    {'fields': {'延年': 1, '絕命': 1}, 'min_score': 60},
+    {'elements': {'水': 3}, 'lingdong_type': '大吉'},
+    {'lingdong_number': 16, 'max_score': 70},
+    {'min_score': 55.5, 'max_score': 65, 'limit': 20},
+])
+def test_query_matches_scan(numbers, filters):
+    """篩選結果與逐一檢查所有號碼的完整分析相同，依評分由高到低 (同分依加入順序) 排列"""
+    index = NumberIndex.build(BIRTHDATE, numbers)
+    analyzer = PhoneNumerology(BIRTHDATE)
+
+    def matches(analysis):
+        magnetic, five_elements, lingdong = analysis.magnetic_fields, analysis.five_elements, analysis.lingdong_81
+        return (all(magnetic.field_counts.get(name, 0) >= n for name, n in filters.get('fields', {}).items()) and
+                all(five_elements.element_counts.get(name, 0) >= n
+                    for name, n in filters.get('elements', {}).items()) and
+                filters.get('lingdong_number', lingdong.lingdong_number) == lingdong.lingdong_number and
+                filters.get('lingdong_type', lingdong.type) == lingdong.type and
+                analysis.final_score >= filters.get('min_score', 0) and
+                analysis.final_score <= filters.get('max_score', 100))
+
+    analyses = [analyzer.comprehensive_analysis(number) for number in numbers]
+    expected = sorted((i for i, analysis in enumerate(analyses) if matches(analysis)),
+                      key=lambda i: (-analyses[i].final_score, i))[:filters.get('limit')]
+    assert index.query(**filters) == expected
@@ -0,0 +1,54 @@
+"""
+萬用字元號碼搜尋測試
+以窮舉所有符合格式的號碼驗證分支定界找出的前 K 名完全一致
+"""
+
+from phone_numerology import PhoneNumerology
+from pattern_search import parse_pattern, synthesize_best_numbers
+import itertools
+import pytest
+
+
+def brute_force(birthdate, pattern, top_k):
+    """逐一分析所有符合格式的號碼，依 (綜合評分高, 號碼小) 排序取前 K 名"""
+    analyzer = PhoneNumerology(birthdate)
+    scored = []
+    for digits in itertools.product(*parse_pattern(pattern)):
+        number = ''.join(map(str, digits))
+        scored.append((analyzer.comprehensive_analysis(number)['final_score'], number))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:top_k]
+
+
+@pytest.mark.parametrize('birthdate, pattern, top_k', [
+    ('1990/09/25', '09??-???-196', 10),
+    ('1963/08/20', '0978-??4-196', 5),
+    ('2003/03/03', '0?1?2?3?4?', 40),
+    ('1976/01/01', '?9?8?5?1?6', 7),
+    ('1984/02/29', '09??-?34-???', 1),
+    ('1990/09/25', '0978759196', 3),
+])
+def test_matches_brute_force(birthdate, pattern, top_k):
+    """前 K 名的號碼與綜合評分與窮舉結果相同 (符合格式的號碼少於 K 個時全部回傳)"""
+    results = synthesize_best_numbers(birthdate, pattern, top_k)
+    got = [(result['final_score'], result['phone_number'].replace('-', '')) for result in results]
+    assert got == brute_force(birthdate, pattern, top_k)
+
+
+def test_returns_full_analyses():
+    """回傳的是完整的 comprehensive_analysis 結果"""
+    analyzer = PhoneNumerology('1990/09/25')
+    for result in synthesize_best_numbers('1990/09/25', '0978-??4-196', 3):
+        assert result == analyzer.comprehensive_analysis(result['phone_number'])
+
+
+@pytest.mark.parametrize('pattern', ['09??-???-19', '09??-???-1966', '09ab-???-196', ''])
+def test_rejects_invalid_pattern(pattern):
+    """號碼格式必須為 10 碼，僅可包含數字與 ?"""
+    with pytest.raises(ValueError):
+        synthesize_best_numbers('1990/09/25', pattern)
+
+
+def test_rejects_invalid_top_k():
+    with pytest.raises(ValueError):
+        synthesize_best_numbers('1990/09/25', '09??-???-196', 0)
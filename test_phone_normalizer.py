@@ -0,0 +1,82 @@
+"""
+電話號碼正規化測試
+驗證國際格式、換行與全形數字的處理，以及批次模式與單一號碼模式的結果相同
+"""
+
+from phone_normalizer import normalize_phone_number, format_phone_number, normalize_lines, iter_normalized_file
+from phone_numerology import PhoneNumerology
+import pytest
+
+
+@pytest.mark.parametrize('phone_number, expected', [
+    ('0978759196', '0978759196'),
+    ('0978-759-196', '0978759196'),
+    ('(0978) 759 196', '0978759196'),
+    # 886 國際格式（可含 + 號、多餘的開頭 0）
+    ('+886 978 759 196', '0978759196'),
+    ('+886-978-759-196', '0978759196'),
+    ('886978759196', '0978759196'),
+    ('+886 0978 759 196', '0978759196'),
+    ('+886 2 2345 6789', '0223456789'),
+    # 886 後的長度不是國內號碼時維持原樣
+    ('886123', '886123'),
+    ('+886 9787 5919 6123', '886978759196123'),
+    # 換行與空白
+    ('0978759196\r\n', '0978759196'),
+    ('\t0978-759-196\r', '0978759196'),
+    # Unicode 十進位數字轉為 ASCII 數字
+    ('０９７８７５９１９６', '0978759196'),
+    ('０９７８－７５９－１９６', '0978759196'),
+    ('＋８８６ ９７８ ７５９ １９６', '0978759196'),
+    ('٠٩٧٨٧٥٩١٩٦', '0978759196'),
+    ('09７８-759-１96', '0978759196'),
+    ('', ''),
+    ('無號碼', ''),
+])
+def test_normalize_phone_number(phone_number, expected):
+    assert normalize_phone_number(phone_number) == expected
+
+
+def test_unicode_digits_analyse_like_ascii():
+    """全形數字的號碼分析結果與 ASCII 號碼相同"""
+    analyzer = PhoneNumerology('1990/09/25')
+    expected = analyzer.comprehensive_analysis('0978-759-196').to_dict()
+    analysis = analyzer.comprehensive_analysis('０９７８－７５９－１９６').to_dict()
+    assert analysis['phone_number'] == '０９７８－７５９－１９６'
+    del analysis['phone_number'], expected['phone_number']
+    assert analysis == expected
+    assert analyzer.score('０９７８７５９１９６') == analyzer.score('0978759196')
+
+
+LINES = ['0978-759-196', '+886 912 345 678', '886912345678', '', '  ', '0912 345 196', '無號碼', '097875919']
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('extra', [[], ['０９７８７５９１９６', '＋８８６ ９１２ ３４５ ６７８']])
+def test_bulk_mode_matches_single_numbers(tmp_path, newline, extra):
+    """批次模式 (LF 與 CRLF、含或不含全形數字) 與逐行 normalize_phone_number 的結果相同"""
+    lines = LINES + extra
+    expected = [normalize_phone_number(line) for line in lines if normalize_phone_number(line)]
+    data = newline.join(lines).encode('utf-8') + newline.encode('ascii')
+    assert normalize_lines(data) == expected
+
+    path = tmp_path / 'numbers.txt'
+    path.write_bytes(data * 50)
+    # 每塊只有數個位元組時，號碼與 CRLF 會被切在兩塊之間
+    for chunk_size in (1, 7, 1 << 20):
+        assert list(iter_normalized_file(str(path), chunk_size=chunk_size)) == expected * 50
+
+
+def test_file_without_trailing_newline(tmp_path):
+    path = tmp_path / 'numbers.txt'
+    path.write_bytes(b'0978759196\r\n0912345678')
+    assert list(iter_normalized_file(str(path), chunk_size=4)) == ['0978759196', '0912345678']
+
+
+@pytest.mark.parametrize('clean_number, expected', [
+    ('0978759196', '0978-759-196'),
+    ('097875919', '097875919'),
+    ('', ''),
+])
+def test_format_phone_number(clean_number, expected):
+    assert format_phone_number(clean_number) == expected
@@ -0,0 +1,308 @@
+"""
+評分核心測試
+以逐一比對磁場定義的原始演算法 (reference_analysis) 為基準，
+驗證 comprehensive_analysis 與各項加速路徑在隨機號碼上的結果完全相同
+"""
+
+from phone_numerology import PhoneNumerology, AnalysisCache
+from phone_normalizer import normalize_phone_number
+import random
+import re
+import pytest
+
+
+BIRTHDATES = ['1990/09/25', '1985/11/11', '1963/08/20', '2001/01/31', '1977/07/07']
+
+
+def random_numbers(count, seed):
+    """隨機號碼，含連字號、國際格式與全部相同數字等寫法"""
+    rng = random.Random(seed)
+    numbers = ['0900000000', '0999999999', '0978-759-196', '+886 912 345 678', '0912-345-196']
+    for _ in range(count):
+        number = f"09{rng.randrange(10 ** 8):08d}"
+        numbers.append(rng.choice([number, f"{number[:4]}-{number[4:7]}-{number[7:]}"]))
+    return numbers
+
+
+def reference_analysis(birthdate, phone_number):
+    """逐一比對磁場定義、逐一判斷五行關係的原始演算法 (未使用任何查表或快取)"""
+    analyzer = PhoneNumerology(birthdate)
+    clean_number = re.sub(r'\D', '', phone_number)
+    if clean_number.startswith('886') and len(clean_number) == 12:
+        clean_number = '0' + clean_number[3:]
+
+    pairs = [clean_number[i:i+2] for i in range(len(clean_number) - 1)]
+    field_counts = {}
+    total_score = 0
+    for pair in pairs:
+        for field_name, field_info in PhoneNumerology.MAGNETIC_FIELDS.items():
+            if pair in field_info['pairs']:
+                field_counts[field_name] = field_counts.get(field_name, 0) + 1
+                total_score += field_info['score']
+                break
+
+    lingdong_number = (int(clean_number[-4:]) % 80) or 80
+    lingdong_score = PhoneNumerology.LINGDONG_81[lingdong_number]['score']
+
+    relations = PhoneNumerology.ELEMENT_RELATIONS[analyzer.birth_element]
+    compatibility_score = 0
+    for digit in clean_number:
+        element = PhoneNumerology.DIGIT_ELEMENTS[digit]
+        if element == analyzer.birth_element:
+            compatibility_score += 5
+        elif element == relations['生']:
+            compatibility_score += 3
+        elif element == relations['被生']:
+            compatibility_score += 8
+        elif element == relations['剋']:
+            compatibility_score += 2
+        else:
+            compatibility_score -= 3
+
+    final_score = (
+        (total_score / len(pairs) + 10) / 20 * 100 * 0.4 +
+        (lingdong_score + 10) / 20 * 100 * 0.3 +
+        min(100, max(0, compatibility_score)) * 0.3
+    )
+    return {
+        'clean_number': clean_number,
+        'field_counts': field_counts,
+        'magnetic_total': total_score,
+        'lingdong_number': lingdong_number,
+        'lingdong_score': lingdong_score,
+        'compatibility_score': compatibility_score,
+        'final_score': round(final_score, 2),
+        'raw_score': final_score,
+    }
+
+
+def test_pair_table_matches_field_definitions():
+    """100 格索引的每個兩位數組合都對應到磁場定義中唯一包含它的磁場 (或沒有磁場)"""
+    for value in range(100):
+        pair = f"{value:02d}"
+        fields = [name for name, info in PhoneNumerology.MAGNETIC_FIELDS.items() if pair in info['pairs']]
+        assert len(fields) <= 1
+        entry = PhoneNumerology._PAIR_TABLE[value]
+        if fields:
+            assert entry[0] == fields[0]
+            assert entry[1] is PhoneNumerology.MAGNETIC_FIELDS[fields[0]]
+            assert PhoneNumerology._PAIR_SCORES[value] == entry[1]['score']
+        else:
+            assert entry is None
+            assert PhoneNumerology._PAIR_SCORES[value] == 0
+        assert PhoneNumerology._get_field_name(pair) == (fields[0] if fields else '未知')
+
+
+@pytest.mark.parametrize('birthdate', BIRTHDATES)
+def test_comprehensive_analysis_matches_reference(birthdate):
+    """磁場、靈動數、五行與綜合評分和原始演算法相同"""
+    analyzer = PhoneNumerology(birthdate)
+    for number in random_numbers(2000, birthdate):
+        expected = reference_analysis(birthdate, number)
+        analysis = analyzer.comprehensive_analysis(number)
+
+        magnetic = analysis['magnetic_fields']
+        assert magnetic['field_counts'] == expected['field_counts']
+        assert magnetic['total_score'] == expected['magnetic_total']
+        assert [detail['field'] for detail in magnetic['field_details']] == [
+            PhoneNumerology._get_field_name(pair) for pair in magnetic['pairs']
+            if PhoneNumerology._get_field_name(pair) != '未知'
+        ]
+        assert analysis['lingdong_81']['lingdong_number'] == expected['lingdong_number']
+        assert analysis['lingdong_81']['score'] == expected['lingdong_score']
+        assert analysis['five_elements']['compatibility_score'] == expected['compatibility_score']
+        assert sum(item['score'] for item in analysis['five_elements']['element_analysis']) == \
+            expected['compatibility_score']
+        assert analysis['final_score'] == expected['final_score']
+        assert analysis['recommendation'] == PhoneNumerology._recommendation_level(expected['raw_score'])
+
+
+@pytest.mark.parametrize('birthdate', BIRTHDATES)
+def test_score_batch_matches_reference(birthdate):
+    """score_batch 每一列的各欄位與原始演算法相同"""
+    numbers = random_numbers(5000, f"batch-{birthdate}")
+    batch = PhoneNumerology(birthdate).score_batch(numbers)
+    for i, number in enumerate(numbers):
+        expected = reference_analysis(birthdate, number)
+        assert batch['magnetic_total'][i] == expected['magnetic_total']
+        assert batch['lingdong_number'][i] == expected['lingdong_number']
+        assert batch['lingdong_score'][i] == expected['lingdong_score']
+        assert batch['five_elements_score'][i] == expected['compatibility_score']
+        assert batch['final_score'][i] == expected['final_score']
+        assert batch['recommendation'][i] == PhoneNumerology._recommendation_level(expected['raw_score'])
+
+
+def test_score_batch_input_forms():
+    """字串、整數、整數陣列與數字矩陣輸入的結果相同"""
+    import numpy as np
+
+    analyzer = PhoneNumerology('1990/09/25')
+    numbers = [f"09{value:08d}" for value in random.Random(5).sample(range(10 ** 8), 300)]
+    expected = analyzer.score_batch(numbers)
+    digits = np.array([[int(d) for d in number] for number in numbers])
+    for variant in ([int(number) for number in numbers], np.array([int(number) for number in numbers]), digits):
+        batch = analyzer.score_batch(variant)
+        for key in expected:
+            assert list(batch[key]) == list(expected[key])
+
+
+@pytest.mark.parametrize('numbers', [['097875919'], ['09787591961'], [-1], [10 ** 10]])
+def test_score_batch_rejects_invalid_numbers(numbers):
+    with pytest.raises(ValueError):
+        PhoneNumerology('1990/09/25').score_batch(numbers)
+
+
+def test_shared_cache_matches_uncached_analysis():
+    """多個出生日期共用快取時，每個分析結果都與不使用快取相同"""
+    cache = AnalysisCache()
+    numbers = random_numbers(300, 'cache')
+    # 1990 與 2000 年同為金命，快取的五行分析須換成各自的出生年份
+    for birthdate in BIRTHDATES + ['2000/09/25']:
+        cached = PhoneNumerology(birthdate, cache=cache)
+        plain = PhoneNumerology(birthdate)
+        for number in numbers:
+            assert cached.comprehensive_analysis(number).to_dict() == plain.comprehensive_analysis(number).to_dict()
+
+    elements = {PhoneNumerology(birthdate).birth_element for birthdate in BIRTHDATES + ['2000/09/25']}
+    distinct = len({normalize_phone_number(number) for number in numbers})
+    assert len(cache) == distinct
+    # 每個號碼對每種本命五行只計算一次
+    assert cache.misses == distinct * len(elements)
+    assert cache.hits + cache.misses == len(numbers) * (len(BIRTHDATES) + 1)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = AnalysisCache(max_numbers=2)
+    analyzer = PhoneNumerology('1990/09/25', cache=cache)
+    for number in ('0911111111', '0922222222', '0911111111', '0933333333'):
+        analyzer.comprehensive_analysis(number)
+    assert len(cache) == 2
+    misses = cache.misses
+    analyzer.comprehensive_analysis('0911111111')
+    analyzer.comprehensive_analysis('0922222222')
+    assert cache.misses == misses + 1
+
+    with pytest.raises(ValueError):
+        AnalysisCache(max_numbers=0)
+
+
+def test_cache_clear_keeps_counters():
+    """清除快取只移除項目，命中與未命中次數維持累計 (作為 Prometheus 計數器輸出)"""
+    cache = AnalysisCache()
+    analyzer = PhoneNumerology('1990/09/25', cache=cache)
+    for number in ('0911111111', '0911111111', '0922222222'):
+        analyzer.comprehensive_analysis(number)
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 1, 2)
+    analyzer.comprehensive_analysis('0911111111')
+    assert (len(cache), cache.hits, cache.misses) == (1, 1, 3)
+
+
+def test_on_stage_reports_each_stage():
+    """on_stage 回報各分析階段的耗時，結果與未計時的分析器相同；快取命中時不回報已快取的階段"""
+    stages = []
+    cache = AnalysisCache()
+    timed = PhoneNumerology('1990/09/25', cache=cache, on_stage=lambda stage, seconds: stages.append((stage, seconds)))
+    plain = PhoneNumerology('1990/09/25')
+
+    assert timed.comprehensive_analysis('0978-759-196').to_dict() == plain.comprehensive_analysis('0978-759-196').to_dict()
+    assert [stage for stage, _ in stages] == ['magnetic', 'lingdong', 'five_elements', 'aggregation',
+                                              'comprehensive_analysis']
+    assert all(seconds >= 0 for _, seconds in stages)
+
+    del stages[:]
+    assert timed.generate_report('0978-759-196') == plain.generate_report('0978-759-196')
+    assert [stage for stage, _ in stages] == ['aggregation', 'comprehensive_analysis', 'report', 'generate_report']
+    assert set(PhoneNumerology.STAGES) == {'magnetic', 'lingdong', 'five_elements', 'aggregation',
+                                           'comprehensive_analysis', 'report', 'generate_report'}
+
+    # 拋出例外的階段仍回報耗時
+    del stages[:]
+    with pytest.raises(KeyError):
+        timed.render_report({})
+    assert [stage for stage, _ in stages] == ['report']
+
+
+@pytest.mark.parametrize('birthdate', BIRTHDATES)
+def test_score_matches_reference(birthdate):
+    """只計算評分的快速路徑與原始演算法的綜合評分及推薦等級相同"""
+    analyzer = PhoneNumerology(birthdate)
+    for number in random_numbers(2000, f"score-{birthdate}"):
+        expected = reference_analysis(birthdate, number)
+        assert analyzer.score(number) == expected['final_score']
+        assert analyzer.score_with_recommendation(number) == (
+            expected['final_score'], PhoneNumerology._recommendation_level(expected['raw_score'])
+        )
+
+
+@pytest.mark.parametrize('birthdate', BIRTHDATES[:3])
+def test_rescore_digit_matches_full_analysis(birthdate):
+    """替換任一位置為任一數字後的結果與直接分析新號碼相同"""
+    analyzer = PhoneNumerology(birthdate)
+    for number in random_numbers(40, f"rescore-{birthdate}"):
+        analysis = analyzer.comprehensive_analysis(number)
+        clean_number = analysis.magnetic_fields.clean_number
+        for position in range(len(clean_number)):
+            for digit in range(10):
+                rescored = analyzer.rescore_digit(analysis, position, digit)
+                new_number = clean_number[:position] + str(digit) + clean_number[position + 1:]
+                expected = analyzer.comprehensive_analysis(rescored['phone_number'])
+                assert rescored.magnetic_fields.clean_number == new_number
+                assert rescored.to_dict() == expected.to_dict()
+                assert rescored['final_score'] == reference_analysis(birthdate, new_number)['final_score']
+
+
+def test_rescore_digit_keeps_number_format():
+    analyzer = PhoneNumerology('1990/09/25')
+    assert analyzer.rescore_digit(analyzer.comprehensive_analysis('0978-759-196'), 9, 8)['phone_number'] == \
+        '0978-759-198'
+    assert analyzer.rescore_digit(analyzer.comprehensive_analysis('+886 912 345 678'), 4, 0)['phone_number'] == \
+        '0912-045-678'
+
+
+def test_rescore_digit_rejects_invalid_edits():
+    analyzer = PhoneNumerology('1990/09/25')
+    analysis = analyzer.comprehensive_analysis('0978-759-196')
+    for position, digit in ((10, 1), (-1, 1), (3, 10), (3, -1)):
+        with pytest.raises(ValueError):
+            analyzer.rescore_digit(analysis, position, digit)
+    with pytest.raises(ValueError):
+        PhoneNumerology('1985/11/11').rescore_digit(analysis, 3, 1)
+
+
+def test_derived_fields_computed_once():
+    """明細欄位只在首次存取時產生，重複存取回傳同一份資料，且可跨行程傳遞"""
+    import pickle
+
+    analysis = PhoneNumerology('1990/09/25').comprehensive_analysis('0978-759-196')
+    magnetic, five_elements = analysis['magnetic_fields'], analysis['five_elements']
+    for result, key in ((magnetic, 'pairs'), (magnetic, 'field_counts'), (magnetic, 'field_details'),
+                        (five_elements, 'element_counts'), (five_elements, 'element_analysis')):
+        assert result[key] is result[key]
+    assert five_elements.with_birth_year(2000)['element_analysis'] is five_elements['element_analysis']
+    assert pickle.loads(pickle.dumps(analysis)).to_dict() == analysis.to_dict()
+
+
+def test_recommendations_shared_by_key(monkeypatch):
+    """推薦列表依 recommendation_key 快取：快取結果與重新計算相同，推薦原因代入各自的出生日期"""
+    monkeypatch.setattr(PhoneNumerology, '_RECOMMENDATION_TEMPLATES', {})
+    for birthdate in BIRTHDATES + ['1900/01/01', '1984/02/29', '2100/12/31']:
+        analyzer = PhoneNumerology(birthdate)
+        templates = PhoneNumerology.recommendation_templates(analyzer.recommendation_key())
+        for count in (3, 50):
+            recommendations = analyzer.recommend_numbers(count=count)
+            assert [(r['pattern'], r['type'], r['score']) for r in recommendations] == \
+                [(pattern, kind, score) for pattern, kind, _, score in templates[:count]]
+            assert [r['reason'] for r in recommendations] == [
+                reason.format(year=analyzer.birth_year, month=analyzer.birth_month, day=analyzer.birth_day)
+                for _, _, reason, _ in templates[:count]]
+
+    # 推薦條件相同的出生日期共用同一份推薦列表
+    first, second = PhoneNumerology('1900/09/25'), PhoneNumerology('2080/09/25')
+    assert first.recommendation_key() == second.recommendation_key()
+    first.recommend_numbers()
+    cached = len(PhoneNumerology._RECOMMENDATION_TEMPLATES)
+    second.recommend_numbers()
+    assert len(PhoneNumerology._RECOMMENDATION_TEMPLATES) == cached
+    assert PhoneNumerology._RECOMMENDATION_TEMPLATES[first.recommendation_key()] is \
+        PhoneNumerology._RECOMMENDATION_TEMPLATES[second.recommendation_key()]
@@ -0,0 +1,57 @@
+"""
+號碼區段窮舉排名測試
+以逐一分析全部號碼的結果驗證分片窮舉與多行程合併的排名完全一致
+"""
+
+from phone_numerology import PhoneNumerology
+from prefix_ranking import _rank_shard, rank_prefix_blocks
+import numpy as np
+import pytest
+
+
+def brute_force_top(birthdate, numbers, top_k):
+    """以 comprehensive_analysis 逐一評分，依 (綜合評分高, 號碼小) 排序取前 K 名"""
+    analyzer = PhoneNumerology(birthdate)
+    scored = [(analyzer.comprehensive_analysis(number)['final_score'], number) for number in numbers]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:top_k]
+
+
+@pytest.mark.parametrize('birthdate, prefix, fifth_digit', [
+    ('1990/09/25', '0978', 7),
+    ('1963/08/20', '0912', 0),
+])
+def test_rank_shard_matches_brute_force(birthdate, prefix, fifth_digit):
+    """單一分片 (100,000 個號碼) 的前 K 名與逐一分析相同，同分時號碼較小者優先"""
+    heap = _rank_shard(birthdate, prefix, fifth_digit, 25)
+    got = [(score, str(-negative).zfill(10)) for score, negative in sorted(heap, reverse=True)]
+
+    numbers = [f"{prefix}{fifth_digit}{value:05d}" for value in range(100000)]
+    assert got == brute_force_top(birthdate, numbers, 25)
+
+
+def test_rank_prefix_blocks_matches_full_enumeration():
+    """整個前綴 (1,000,000 個號碼) 的排名與批次評分全部號碼後排序相同"""
+    birthdate = '2003/03/03'
+    rankings = rank_prefix_blocks(birthdate, ['0935'], top_k=30, workers=2)
+
+    analyzer = PhoneNumerology(birthdate)
+    numbers = np.arange(935 * 10 ** 6, 936 * 10 ** 6)
+    scores = analyzer.score_batch(numbers)['final_score']
+    order = np.lexsort((numbers, -scores))[:30]
+
+    got = rankings['0935']
+    assert [result['phone_number'].replace('-', '') for result in got] == [f"{numbers[i]:010d}" for i in order]
+    assert [result['final_score'] for result in got] == scores[order].tolist()
+
+    # 回傳的是完整分析結果
+    for result in got[:3]:
+        assert result == analyzer.comprehensive_analysis(result['phone_number'])
+
+
+def test_rank_prefix_blocks_rejects_invalid_arguments():
+    """前綴必須為 4 位數字，名次數量必須大於 0"""
+    with pytest.raises(ValueError):
+        rank_prefix_blocks('1990/09/25', ['097'])
+    with pytest.raises(ValueError):
+        rank_prefix_blocks('1990/09/25', ['0978'], top_k=0)
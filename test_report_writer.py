@@ -0,0 +1,70 @@
+"""
+報告寫入器測試
+驗證各輸出格式的內容與同名略過，以及寫入錯誤在區塊內已有例外時不被丟棄
+"""
+
+from report_writer import ReportWriter, open_sink
+import json
+import logging
+import zipfile
+import pytest
+
+
+REPORTS = [('a.txt', '報告 A', {'rank': 1}), ('b.txt', '報告 B', {'rank': 2}), ('a.txt', '重複', {'rank': 3})]
+
+
+@pytest.mark.parametrize('output_format', ['files', 'zip', 'jsonl'])
+def test_formats_skip_duplicate_names(tmp_path, output_format):
+    path = tmp_path / 'reports'
+    with ReportWriter(open_sink(output_format, str(path), shard_size=1), max_queue=1) as writer:
+        for name, content, fields in REPORTS:
+            writer.write(name, content, **fields)
+    assert (writer.count, writer.written) == (3, 2)
+
+    if output_format == 'files':
+        assert sorted(p.relative_to(path).as_posix() for p in path.rglob('*.txt')) == ['0000/a.txt', '0001/b.txt']
+        assert (path / '0000' / 'a.txt').read_text(encoding='utf-8') == '報告 A'
+    elif output_format == 'zip':
+        with zipfile.ZipFile(path) as archive:
+            assert {name: archive.read(name).decode('utf-8') for name in archive.namelist()} == \
+                {'a.txt': '報告 A', 'b.txt': '報告 B'}
+    else:
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert records == [{'name': 'a.txt', 'rank': 1, 'report': '報告 A'},
+                           {'name': 'b.txt', 'rank': 2, 'report': '報告 B'}]
+
+
+class FailingSink:
+    """寫入或關閉時拋出 OSError 的寫入目標"""
+
+    def __init__(self, fail_on):
+        self.fail_on = fail_on
+
+    def write(self, name, content, fields):
+        if self.fail_on == 'write':
+            raise OSError('磁碟已滿')
+
+    def close(self):
+        if self.fail_on == 'close':
+            raise OSError('無法關閉')
+
+
+@pytest.mark.parametrize('fail_on', ['write', 'close'])
+def test_writer_error_raised_on_close(fail_on):
+    with pytest.raises(OSError):
+        with ReportWriter(FailingSink(fail_on)) as writer:
+            writer.write('a.txt', '報告')
+
+
+@pytest.mark.parametrize('fail_on', ['write', 'close'])
+def test_writer_error_kept_when_block_raises(fail_on, caplog):
+    """區塊內的例外照常拋出，寫入錯誤記錄到日誌並附註在該例外上"""
+    with caplog.at_level(logging.ERROR, logger='report_writer'):
+        with pytest.raises(KeyError) as raised:
+            with ReportWriter(FailingSink(fail_on)) as writer:
+                writer.write('a.txt', '報告')
+                raise KeyError('分析失敗')
+
+    assert [type(record.exc_info[1]) for record in caplog.records] == [OSError]
+    if hasattr(raised.value, 'add_note'):
+        assert any('OSError' in note for note in raised.value.__notes__)
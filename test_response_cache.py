@@ -0,0 +1,149 @@
+"""
+API 回應快取測試
+驗證存活時間、LRU 淘汰與統計，以及 /analyze 的 ETag 與 304 回應
+"""
+
+import response_cache
+from response_cache import ResponseCache, make_etag
+import pytest
+
+
+class FakeClock:
+    """可手動推進的 time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_hit_and_miss(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    assert cache.get('a') is None
+    entry = cache.put('a', b'body')
+    assert cache.get('a') == entry
+    assert entry.body == b'body'
+    assert entry.etag == make_etag(b'body')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expiry(clock):
+    """超過存活時間的項目在讀取時移除並計入過期次數"""
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put('a', b'body')
+    clock.now += 59.9
+    assert cache.get('a') is not None
+    clock.now += 0.1
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.expirations == 1
+    assert cache.misses == 1
+
+
+def test_put_refreshes_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    cache.put('a', b'old')
+    clock.now += 50
+    cache.put('a', b'new')
+    clock.now += 50
+    assert cache.get('a').body == b'new'
+
+
+def test_lru_eviction(clock):
+    """超過容量時淘汰最久未使用者，讀取會更新使用順序"""
+    cache = ResponseCache(max_entries=3, ttl=60)
+    for key in 'abc':
+        cache.put(key, key.encode())
+    assert cache.get('a') is not None      # a 成為最近使用
+    cache.put('d', b'd')                   # 淘汰 b
+    assert cache.get('b') is None
+    cache.put('e', b'e')                   # 淘汰 c
+    assert cache.get('c') is None
+    assert [cache.get(key) is not None for key in 'ade'] == [True, True, True]
+    assert cache.evictions == 2
+    assert len(cache) == 3
+
+
+def test_stats_and_clear(clock):
+    cache = ResponseCache(max_entries=1, ttl=5)
+    cache.put('a', b'a')
+    cache.put('b', b'b')
+    cache.get('b')
+    cache.get('a')
+    assert cache.stats() == {'entries': 1, 'max_entries': 1, 'ttl': 5, 'hits': 1, 'misses': 1,
+                             'evictions': 1, 'expirations': 0}
+    # 清除只移除項目，統計次數維持累計
+    cache.clear()
+    assert cache.stats() == {'entries': 0, 'max_entries': 1, 'ttl': 5, 'hits': 1, 'misses': 1,
+                             'evictions': 1, 'expirations': 0}
+    assert cache.get('b') is None
+    assert cache.misses == 2
+
+
+def test_etag_depends_only_on_body():
+    assert make_etag(b'body') == make_etag(b'body')
+    assert make_etag(b'body') != make_etag(b'body ')
+
+
+@pytest.mark.parametrize('max_entries, ttl', [(0, 60), (10, 0), (10, -1)])
+def test_rejects_invalid_settings(max_entries, ttl):
+    with pytest.raises(ValueError):
+        ResponseCache(max_entries=max_entries, ttl=ttl)
+
+
+@pytest.fixture
+def client():
+    import app
+    app.response_cache.clear()
+    return app.app.test_client()
+
+
+REQUEST = {'phone_number': '0978-759-196', 'birthdate': '1990/09/25'}
+
+
+def test_analyze_etag_and_304(client):
+    """相同 (正規化後的) 輸入回傳相同 ETag，If-None-Match 相符時回傳 304 且沒有內容"""
+    import app
+
+    first = client.post('/analyze', json=REQUEST)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag == f'"{make_etag(first.get_data())}"'
+    assert first.get_json()['score'] > 0
+
+    # 不同寫法的同一號碼使用同一份快取
+    second = client.post('/analyze', json={**REQUEST, 'phone_number': '+886 978 759 196'})
+    assert second.headers['ETag'] == etag
+    assert second.get_data() == first.get_data()
+    assert app.response_cache.hits == 1
+
+    not_modified = client.post('/analyze', json=REQUEST, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+    weak = client.post('/analyze', json=REQUEST, headers={'If-None-Match': f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    stale = client.post('/analyze', json=REQUEST, headers={'If-None-Match': '"other"'})
+    assert stale.status_code == 200
+
+    other = client.post('/analyze', json={**REQUEST, 'birthdate': '1991/09/25'})
+    assert other.headers['ETag'] != etag
+
+
+def test_analyze_errors_are_not_cached(client):
+    import app
+
+    response = client.post('/analyze', json={**REQUEST, 'phone_number': '12'})
+    assert response.status_code == 400
+    assert 'ETag' not in response.headers
+    assert len(app.response_cache) == 0
@@ -0,0 +1,98 @@
+"""
+欄位式分析結果測試
+驗證匯出後再載入的每一列與 comprehensive_analysis 的結果相同
+"""
+
+from phone_numerology import PhoneNumerology
+from result_columns import export_file, export_results, load_results
+import random
+import numpy as np
+import pytest
+
+
+BIRTHDATE = '1990/09/25'
+
+
+def expected_row(analysis):
+    """comprehensive_analysis 結果中對應欄位式檔案的部分"""
+    return {
+        'phone_number': analysis['phone_number'],
+        'magnetic_total': analysis['magnetic_fields']['total_score'],
+        'magnetic_average': analysis['magnetic_fields']['average_score'],
+        'lingdong_number': analysis['lingdong_81']['lingdong_number'],
+        'lingdong_score': analysis['lingdong_81']['score'],
+        'five_elements_score': analysis['five_elements']['compatibility_score'],
+        'field_counts': {name: count for name, count in analysis['magnetic_fields']['field_counts'].items() if count},
+        'element_counts': {name: count for name, count in analysis['five_elements']['element_counts'].items() if count},
+        'final_score': analysis['final_score'],
+        'recommendation': analysis['recommendation'],
+    }
+
+
+@pytest.fixture(scope='module')
+def numbers():
+    rng = random.Random(5)
+    return [f"09{rng.randrange(10 ** 8):08d}" for _ in range(5000)] + ['0978759196', '0900000000']
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_round_trip_matches_analysis(tmp_path, numbers, mmap):
+    """匯出 (分多批寫入) 再載入後，每一列與 comprehensive_analysis 相同"""
+    path = str(tmp_path / 'results.pncols')
+    assert export_results(path, BIRTHDATE, numbers, chunk_size=1234) == len(numbers)
+
+    results = load_results(path, mmap=mmap)
+    assert len(results) == len(numbers)
+    assert results.birthdate == BIRTHDATE
+    analyzer = PhoneNumerology(BIRTHDATE)
+    for i, number in enumerate(numbers):
+        assert results.row(i) == expected_row(analyzer.comprehensive_analysis(number))
+
+
+def test_ranked_orders_by_score_then_row(tmp_path, numbers):
+    path = str(tmp_path / 'results.pncols')
+    export_results(path, BIRTHDATE, numbers)
+    results = load_results(path)
+
+    scores = results['final_score']
+    order = results.ranked()
+    assert sorted(order.tolist()) == list(range(len(numbers)))
+    assert all(scores[a] > scores[b] or (scores[a] == scores[b] and a < b) for a, b in zip(order, order[1:]))
+    assert results.ranked(10).tolist() == order[:10].tolist()
+
+
+def test_export_file_skips_invalid_lines(tmp_path):
+    """號碼檔案中非 10 碼的號碼略過，國際格式正規化後寫入"""
+    numbers_file = tmp_path / 'numbers.txt'
+    numbers_file.write_text('0978-759-196\n123\n\n+886 912 345 678\n', encoding='utf-8')
+    path = str(tmp_path / 'results.pncols')
+
+    assert export_file(path, BIRTHDATE, str(numbers_file)) == 2
+    results = load_results(path)
+    assert results['phone_number'].tolist() == [b'0978759196', b'0912345678']
+
+
+def test_empty_export(tmp_path):
+    path = str(tmp_path / 'empty.pncols')
+    export_results(path, BIRTHDATE, [])
+    results = load_results(path)
+    assert len(results) == 0
+    assert results.ranked().size == 0
+    assert results['field_counts'].shape == (0, 8)
+
+
+def test_columns_are_aligned(tmp_path, numbers):
+    """每個欄位的起點對齊 64 bytes，memmap 載入不需複製"""
+    path = str(tmp_path / 'results.pncols')
+    export_results(path, BIRTHDATE, numbers[:100])
+    results = load_results(path)
+    for values in results.columns.values():
+        assert isinstance(values, np.memmap)
+        assert values.offset % 64 == 0
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'PNSCORE1' + bytes(64))
+    with pytest.raises(ValueError):
+        load_results(str(path))
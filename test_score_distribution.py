@@ -0,0 +1,67 @@
+"""
+評分分佈測試
+以全部號碼的實際評分統計驗證動態規劃算出的分佈與百分位數完全一致
+"""
+
+from phone_numerology import PhoneNumerology
+from score_distribution import score_distribution
+from collections import Counter
+import itertools
+import pytest
+
+
+def enumerate_counts(birthdate, prefix, suffix):
+    """逐一分析所有補全號碼，統計各項評分的數量"""
+    analyzer = PhoneNumerology(birthdate)
+    free = 10 - len(prefix) - len(suffix)
+    counts = {'magnetic': Counter(), 'lingdong': Counter(), 'five_elements': Counter(), 'final': Counter()}
+    for digits in itertools.product('0123456789', repeat=free):
+        analysis = analyzer.comprehensive_analysis(prefix + ''.join(digits) + suffix)
+        counts['magnetic'][analysis['magnetic_fields']['total_score']] += 1
+        counts['lingdong'][analysis['lingdong_81']['score']] += 1
+        counts['five_elements'][analysis['five_elements']['compatibility_score']] += 1
+        counts['final'][analysis['final_score']] += 1
+    return counts
+
+
+@pytest.mark.parametrize('birthdate, prefix, suffix', [
+    ('1990/09/25', '0978', '96'),
+    ('1987/03/02', '09', '19612'),
+    ('2003/12/12', '091', '5'),
+    ('1963/08/20', '0912345678', ''),
+])
+def test_matches_full_enumeration(birthdate, prefix, suffix):
+    """各項評分分佈與逐一分析所有號碼的統計相同"""
+    distribution = score_distribution(birthdate, prefix, suffix)
+    expected = enumerate_counts(birthdate, prefix, suffix)
+
+    assert distribution.total == 10 ** (10 - len(prefix) - len(suffix))
+    assert distribution.magnetic == expected['magnetic']
+    assert distribution.lingdong == expected['lingdong']
+    assert distribution.five_elements == expected['five_elements']
+    assert distribution.final == expected['final']
+
+
+def test_percentiles_match_enumeration():
+    """百分位數與平均值與排序後的全部評分一致"""
+    birthdate, prefix, suffix = '1990/09/25', '0978', '196'
+    distribution = score_distribution(birthdate, prefix, suffix)
+    scores = sorted(enumerate_counts(birthdate, prefix, suffix)['final'].elements())
+
+    assert distribution.mean == pytest.approx(sum(scores) / len(scores))
+    for score in (scores[0], scores[len(scores) // 3], 60.0, scores[-1], scores[-1] + 1):
+        below = sum(1 for s in scores if s < score)
+        assert distribution.percentile(score) == pytest.approx(below / len(scores) * 100)
+    for percentile in (0, 10, 50, 99.9, 100):
+        score = distribution.score_at(percentile)
+        assert sum(1 for s in scores if s <= score) >= percentile / 100 * len(scores)
+        assert all(sum(1 for s in scores if s <= lower) < percentile / 100 * len(scores)
+                   for lower in set(scores) if lower < score)
+
+    with pytest.raises(ValueError):
+        distribution.score_at(101)
+
+
+def test_rejects_too_many_fixed_digits():
+    with pytest.raises(ValueError):
+        score_distribution('1990/09/25', '0978759', '1966')
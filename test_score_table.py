@@ -0,0 +1,80 @@
+"""
+全空間評分表測試
+只建立部分前段的評分表 (稀疏檔，實際寫入約 5 MB)，以 comprehensive_analysis 驗證查詢結果在量化誤差內
+"""
+
+from phone_numerology import PhoneNumerology
+from score_table import ELEMENTS, SCALE, ScoreTable, build_score_table, quantize
+import random
+import pytest
+
+
+# 建立的前段 (第 3-6 碼): 頭尾、連續的一段與隨機的幾個
+HEADS = sorted({0, 9999, 1234, *range(7870, 7880), *random.Random(0).sample(range(10000), 80)})
+
+
+@pytest.fixture(scope='module')
+def table_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('score_table') / 'scores.bin')
+    build_score_table(path, rows_per_chunk=4, progress=False, heads=HEADS)
+    return path
+
+
+@pytest.fixture
+def table(table_path):
+    with ScoreTable(table_path) as table:
+        yield table
+
+
+def element_birthdates():
+    """每種本命五行各一個出生日期"""
+    birthdates = {}
+    for year in range(1990, 2000):
+        birthdate = f"{year}/05/05"
+        birthdates.setdefault(PhoneNumerology(birthdate).birth_element, birthdate)
+    return birthdates
+
+
+def test_lookup_within_quantisation_bound(table):
+    """查詢結果等於量化後的綜合評分，與實際評分的差距不超過半個量化單位"""
+    rng = random.Random(1)
+    numbers = [f"09{rng.choice(HEADS):04d}{rng.randrange(10 ** 4):04d}" for _ in range(5000)]
+    numbers += ['0900000000', '0999999999', '0978759196', '0912340000', '0912349999']
+    birthdates = element_birthdates()
+    assert set(birthdates) == set(ELEMENTS)
+
+    for element, birthdate in birthdates.items():
+        analyzer = PhoneNumerology(birthdate)
+        for number in numbers:
+            final_score = analyzer.comprehensive_analysis(number)['final_score']
+            looked_up = table.lookup(number, element)
+            assert looked_up == quantize(final_score) / SCALE
+            assert abs(looked_up - final_score) <= 0.5 / SCALE
+            assert table.score(number, birthdate) == looked_up
+
+
+def test_unbuilt_heads_are_zero(table):
+    assert table.lookup('0900010000', '金') == 0
+
+
+def test_rejects_invalid_heads(tmp_path):
+    with pytest.raises(ValueError):
+        build_score_table(str(tmp_path / 'scores.bin'), progress=False, heads=[10000])
+
+
+def test_lookup_accepts_formatted_numbers(table):
+    assert table.lookup('0978-759-196', '金') == table.lookup('+886 978 759 196', '金')
+
+
+@pytest.mark.parametrize('number, element', [('0812345678', '金'), ('097875919', '金'), ('0978759196', '風')])
+def test_lookup_rejects_invalid_input(table, number, element):
+    with pytest.raises(ValueError):
+        table.lookup(number, element)
+
+
+def test_rejects_invalid_file(tmp_path):
+    """大小或標頭不正確的檔案無法開啟"""
+    path = tmp_path / 'scores.bin'
+    path.write_bytes(b'not a score table')
+    with pytest.raises(ValueError):
+        ScoreTable(str(path))